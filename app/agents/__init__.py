@@ -1,35 +1,41 @@
 """Agent module initialization.
 
 This module exports the unified agent workflow using PydanticAI.
+Agent profiles are imported on first access, so importing this package
+does not load every profile module.
 """
 
+import importlib
+
 from .workflow import agent_workflow, AgentWorkflow
+from .catalog import AgentCatalog, AgentCatalogEntry, agent_catalog
 
 __all__ = [
     "agent_workflow",
     "AgentWorkflow",
+    "AgentCatalog",
+    "AgentCatalogEntry",
+    "agent_catalog",
 ]
 
-# Import agent profiles for reference
-from .ideation_agent.profile import ideation_agent_profile
-from .idea_analysis_agent.profile import idea_analysis_agent_profile
-from .manager_agent.profile import manager_agent_profile
-from .product_manager_agent.profile import product_manager_agent_profile
-from .strategic_advisor_agent.profile import strategic_advisor_agent_profile
-from .landing_page_designer_agent.profile import landing_page_designer_agent_profile
-from .cto_agent.profile import cto_agent_profile
-from .advertising_strategist_agent.profile import advertising_strategist_agent_profile
+# Agent profile modules, imported lazily for reference
+_PROFILE_MODULES = {
+    "ideation_agent_profile": ".ideation_agent.profile",
+    "idea_analysis_agent_profile": ".idea_analysis_agent.profile",
+    "manager_agent_profile": ".manager_agent.profile",
+    "product_manager_agent_profile": ".product_manager_agent.profile",
+    "strategic_advisor_agent_profile": ".strategic_advisor_agent.profile",
+    "landing_page_designer_agent_profile": ".landing_page_designer_agent.profile",
+    "cto_agent_profile": ".cto_agent.profile",
+    "advertising_strategist_agent_profile": ".advertising_strategist_agent.profile",
+}
 
 # Add agent profiles to __all__
-__all__.extend(
-    [
-        "ideation_agent_profile",
-        "idea_analysis_agent_profile",
-        "manager_agent_profile",
-        "product_manager_agent_profile",
-        "strategic_advisor_agent_profile",
-        "landing_page_designer_agent_profile",
-        "cto_agent_profile",
-        "advertising_strategist_agent_profile",
-    ]
-)
+__all__.extend(_PROFILE_MODULES)
+
+
+def __getattr__(name: str):
+    module_name = _PROFILE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
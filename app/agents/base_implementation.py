@@ -5,15 +5,20 @@ agents consistently across the application using PydanticAI.
 """
 
 from pydantic_ai import Agent
-from app.core.types import AgentProfile
-from app.llm import model
-from typing import Any, Optional
+from app.core import CONFIG, AgentRunError
+from app.core.types import AgentProfile, RunStats
+from app.events import event_bus, RunStarted, TokenDelta, RunFinished, RunFailed
+from app.llm import get_default_model
+from typing import Any, List, Optional
 import asyncio
+import time
+import uuid
 
 
 def create_pydantic_agent(
     profile: AgentProfile,
     model_instance: Any = None,
+    **agent_options: Any,
 ) -> Agent:
     """
     Create a PydanticAI Agent with the given profile.
@@ -24,16 +29,18 @@ def create_pydantic_agent(
     Args:
         profile: The agent profile containing role, goal, and backstory
         model_instance: Optional model instance. If not provided, uses default model
+        **agent_options: Additional Agent options, such as tools and deps_type
 
     Returns:
         Configured PydanticAI Agent instance
     """
     if model_instance is None:
-        model_instance = model
+        model_instance = get_default_model()
 
     return Agent(
         model_instance,
         system_prompt=profile.backstory,
+        **agent_options,
     )
 
 
@@ -54,7 +61,7 @@ class StreamingAgentWrapper:
             model_instance: Optional model instance. If not provided, uses default model
         """
         self.profile = profile
-        self.model_instance = model_instance or model
+        self.model_instance = model_instance or get_default_model()
         self.agent = create_pydantic_agent(profile, model_instance)
 
     async def run_streaming(self, input_data: str, message_history: list = None) -> str:
@@ -67,37 +74,73 @@ class StreamingAgentWrapper:
 
         Returns:
             The final agent response
+
+        Raises:
+            AgentRunError: If the run failed
         """
-        print(f"\n{'='*50}")
-        print(f"🤖 Agent: {self.profile.role}")
-        print(f"{'='*50}\n")
+        run_id = uuid.uuid4().hex
+        agent_name = self.profile.role
+        event_bus.emit(
+            RunStarted(
+                run_id=run_id,
+                agent_name=agent_name,
+                display_name=agent_name,
+                model_name=CONFIG.model_name,
+            )
+        )
 
         # Use message_history directly (already in PydanticAI format)
         if message_history is None:
             message_history = []
 
+        started = time.perf_counter()
         try:
             # Use PydanticAI streaming
             async with self.agent.run_stream(
                 input_data, message_history=message_history
             ) as result:
-                full_response = ""
-                async for text in result.stream_text():
-                    print(text, end="", flush=True)
-                    full_response = (
-                        text  # stream_text() provides complete text each time
+                chunks: List[str] = []
+                async for delta in result.stream_text(delta=True, debounce_by=None):
+                    chunks.append(delta)
+                    event_bus.emit(
+                        TokenDelta(
+                            run_id=run_id,
+                            agent_name=agent_name,
+                            display_name=agent_name,
+                            delta=delta,
+                        )
                     )
+                full_response = "".join(chunks)
+
+            stats = RunStats(
+                run_id=run_id,
+                agent_name=agent_name,
+                model_name=CONFIG.model_name,
+                duration_ms=(time.perf_counter() - started) * 1000,
+                output_chars=len(full_response),
+            )
+            event_bus.emit(
+                RunFinished(
+                    run_id=run_id,
+                    agent_name=agent_name,
+                    display_name=agent_name,
+                    stats=stats,
+                )
+            )
 
-                print("\n")  # New line after streaming
-                print(f"✅ {self.profile.role} completed!")
-                print("=" * 60)
-
-                return full_response
+            return full_response
 
         except Exception as e:
-            error_msg = f"Error in {self.profile.role}: {str(e)}"
-            print(f"❌ {error_msg}")
-            return error_msg
+            event_bus.emit(
+                RunFailed(
+                    run_id=run_id,
+                    agent_name=agent_name,
+                    display_name=agent_name,
+                    error=str(e),
+                    error_type=type(e).__name__,
+                )
+            )
+            raise AgentRunError(agent_name, agent_name, e) from e
 
     def _run_sync(self, input_data: str, message_history: list = None) -> str:
         """
@@ -0,0 +1,178 @@
+"""Catalog of the agents available to the Manager Agent.
+
+This module builds, once, a description of every agent registered in the
+workflow: structured entries for code and a prerendered text for the
+Manager Agent's ``get_available_agents`` tool, which becomes a constant
+time lookup. In development the catalog can watch the agent profile
+modules and rebuild itself when one changes.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from .workflow import agent_workflow
+
+
+__all__ = ["AgentCatalogEntry", "AgentCatalog", "agent_catalog"]
+
+
+logger = logging.getLogger(__name__)
+
+
+AGENTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SELECTION_GUIDELINES = """Agent Selection Guidelines:
+- For tasks aligning with a specific agent's role and goal, use that agent
+- For complex tasks requiring multiple steps: Use ManagerAgent to coordinate
+- For tasks requiring multiple agents: Start with the most relevant agent, then hand off as needed"""
+
+
+@dataclass(frozen=True, slots=True)
+class AgentCatalogEntry:
+    """Description of one available agent."""
+
+    name: str
+    display_name: str
+    role: str
+    goal: str
+    best_for: str
+
+
+class AgentCatalog:
+    """
+    Precomputed descriptions of the workflow's agents.
+
+    The catalog is built on first access, or explicitly at startup with
+    ``build``, and only rebuilt when agent profiles are reloaded.
+    """
+
+    def __init__(self, workflow):
+        """
+        Initialize the AgentCatalog.
+
+        Args:
+            workflow: The AgentWorkflow whose agents are described
+        """
+        self.workflow = workflow
+        self._entries: Optional[Tuple[AgentCatalogEntry, ...]] = None
+        self._by_name: Dict[str, AgentCatalogEntry] = {}
+        self._text = ""
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def build(self) -> None:
+        """Load every agent profile and render the catalog."""
+        entries = []
+        for name in self.workflow.list_agents():
+            profile = self.workflow.get_profile(name)
+            entries.append(
+                AgentCatalogEntry(
+                    name=name,
+                    display_name=self.workflow.get_agent_profile_name(name),
+                    role=profile.role,
+                    goal=profile.goal,
+                    best_for=profile.goal.split(".")[0],
+                )
+            )
+
+        lines = ["Available Agents and Their Capabilities:", ""]
+        for number, entry in enumerate(entries, start=1):
+            lines += [
+                f"{number}. **{entry.role}** (@{entry.name})",
+                f"   - Goal: {entry.goal}",
+                f"   - Best for: {entry.best_for}",
+                "",
+            ]
+        lines.append(SELECTION_GUIDELINES)
+
+        self._entries = tuple(entries)
+        self._by_name = {entry.name: entry for entry in entries}
+        self._text = "\n".join(lines)
+        logger.info(f"Built agent catalog with {len(entries)} agents")
+
+    @property
+    def entries(self) -> Tuple[AgentCatalogEntry, ...]:
+        """Catalog entries in workflow order."""
+        if self._entries is None:
+            self.build()
+        return self._entries
+
+    @property
+    def text(self) -> str:
+        """The catalog rendered for the Manager Agent."""
+        if self._entries is None:
+            self.build()
+        return self._text
+
+    def get(self, name: str) -> Optional[AgentCatalogEntry]:
+        """
+        Get the entry of an agent.
+
+        Args:
+            name: Workflow agent name
+
+        Returns:
+            The agent's entry, or None if it is not in the catalog
+        """
+        if self._entries is None:
+            self.build()
+        return self._by_name.get(name)
+
+    def reload(self, paths: Iterable[str]) -> None:
+        """
+        Reload the profiles defined in changed files and rebuild the catalog.
+
+        Args:
+            paths: Paths of the changed files
+        """
+        changed_paths = {os.path.abspath(path) for path in paths}
+        changed = []
+        for name in self.workflow.list_agents():
+            module = sys.modules.get(self.workflow.get_profile_module(name))
+            if module is not None and module.__file__ in changed_paths:
+                importlib.reload(module)
+                self.workflow.reload_agent(name)
+                changed.append(name)
+
+        if changed:
+            logger.info(f"Reloaded agent profiles: {', '.join(changed)}")
+            self.build()
+
+    def start_watching(self) -> None:
+        """Rebuild the catalog whenever an agent profile file changes."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self) -> None:
+        """Stop watching agent profile files."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self) -> None:
+        try:
+            # Installed with chainlit; only needed when watching in development
+            from watchfiles import awatch
+        except ImportError:
+            logger.warning("watchfiles is not installed, agent catalog reload disabled")
+            return
+
+        logger.info(f"Watching {AGENTS_DIR} for agent profile changes")
+        async for changes in awatch(AGENTS_DIR):
+            try:
+                self.reload(path for _, path in changes)
+            except Exception as e:
+                # A half-saved profile must not stop the watcher
+                logger.warning(f"Agent catalog reload failed: {e}")
+
+
+# Global agent catalog of the workflow
+agent_catalog = AgentCatalog(agent_workflow)
@@ -0,0 +1,246 @@
+"""Local intent classification for messages without an @ mention.
+
+This module routes a message to the specialist agent it is most likely
+meant for without an LLM round-trip. Every agent is described by a
+TF-IDF centroid trained on its profile, a short list of keywords and any
+labeled examples; a message goes to the nearest centroid when the cosine
+similarity and the lead over the runner-up are high enough, and to the
+manager otherwise. Labeled examples can be exported from threads where
+users addressed an agent explicitly, which also makes the classifier
+evaluable offline.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core import CONFIG
+
+
+__all__ = [
+    "IntentPrediction",
+    "IntentClassifier",
+    "INTENT_KEYWORDS",
+    "examples_from_threads",
+    "load_examples",
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#-]*")
+
+_STOPWORDS = frozenset(
+    """a about an and any are as at be but by can could do does for from get
+    give had has have help how i if in into is it its me my need of on or our
+    please should so some that the their them then there these they this to
+    us want was we what when where which who why will with would you your""".split()
+)
+
+# Keywords that strongly suggest an agent, added to its profile text
+INTENT_KEYWORDS: Dict[str, str] = {
+    "manager": "plan project coordinate phases milestones status overview organize",
+    "ideation": "ideas brainstorm startup ideas innovative creative generate concepts",
+    "ideaanalysis": "evaluate idea market potential viability feasibility competitors "
+    "analysis validate risks",
+    "productmanager": "product roadmap features prioritize prd requirements user "
+    "stories mvp backlog",
+    "strategicadvisor": "strategy competitive positioning growth expansion pricing "
+    "business model goals",
+    "landingpage": "landing page website portfolio conversion hero section layout "
+    "design cta",
+    "cto": "technology stack architecture database backend api scalability "
+    "infrastructure deploy code technical",
+    "advertisingstrategist": "advertising ad copy campaign marketing headline "
+    "audience ogilvy promotion",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text, without stopwords."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+@dataclass(frozen=True, slots=True)
+class IntentPrediction:
+    """The classifier's best guess for a message."""
+
+    agent_name: Optional[str]
+    score: float
+    margin: float
+    confident: bool
+
+
+class IntentClassifier:
+    """
+    Nearest-centroid TF-IDF classifier over the workflow's agents.
+
+    Classification is a sparse dot product of the message against one
+    centroid per agent, which takes microseconds for chat-sized messages.
+    """
+
+    def __init__(
+        self, threshold: Optional[float] = None, min_margin: Optional[float] = None
+    ):
+        """
+        Initialize the IntentClassifier.
+
+        Args:
+            threshold: Minimum cosine similarity to route. Defaults to configuration
+            min_margin: Minimum lead over the runner-up to route. Defaults to configuration
+        """
+        self.threshold = (
+            threshold if threshold is not None else CONFIG.intent_routing_threshold
+        )
+        self.min_margin = (
+            min_margin if min_margin is not None else CONFIG.intent_routing_margin
+        )
+        self._idf: Dict[str, float] = {}
+        self._centroids: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def is_fitted(self) -> bool:
+        """Whether the classifier has been trained."""
+        return bool(self._centroids)
+
+    def fit(self, documents: Dict[str, List[str]]) -> None:
+        """
+        Train the classifier.
+
+        Args:
+            documents: Training texts keyed by workflow agent name
+        """
+        texts = [
+            (agent_name, Counter(tokenize(text)))
+            for agent_name, agent_texts in documents.items()
+            for text in agent_texts
+        ]
+        document_frequency: Counter = Counter()
+        for _, counts in texts:
+            document_frequency.update(counts.keys())
+
+        total = len(texts)
+        self._idf = {
+            token: math.log((1 + total) / (1 + frequency)) + 1
+            for token, frequency in document_frequency.items()
+        }
+
+        sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for agent_name, counts in texts:
+            for token, weight in self._vectorize(counts).items():
+                sums[agent_name][token] += weight
+        self._centroids = {
+            agent_name: self._normalize(vector) for agent_name, vector in sums.items()
+        }
+
+    def _vectorize(self, counts: Counter) -> Dict[str, float]:
+        """Normalized TF-IDF vector of token counts."""
+        vector = {
+            # Words never seen in training carry no signal
+            token: (1 + math.log(count)) * self._idf.get(token, 0.0)
+            for token, count in counts.items()
+        }
+        return self._normalize(vector)
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm == 0:
+            return {}
+        return {token: weight / norm for token, weight in vector.items() if weight}
+
+    def scores(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Score a message against every agent.
+
+        Args:
+            text: The user's message
+
+        Returns:
+            (agent name, cosine similarity) pairs, best first
+        """
+        vector = self._vectorize(Counter(tokenize(text)))
+        scores = [
+            (
+                agent_name,
+                sum(
+                    weight * centroid.get(token, 0.0)
+                    for token, weight in vector.items()
+                ),
+            )
+            for agent_name, centroid in self._centroids.items()
+        ]
+        return sorted(scores, key=lambda item: item[1], reverse=True)
+
+    def classify(self, text: str) -> IntentPrediction:
+        """
+        Predict the agent a message is meant for.
+
+        Args:
+            text: The user's message
+
+        Returns:
+            The best agent with its score and lead over the runner-up
+        """
+        scores = self.scores(text)
+        if not scores or scores[0][1] == 0:
+            return IntentPrediction(None, 0.0, 0.0, False)
+
+        agent_name, score = scores[0]
+        margin = score - (scores[1][1] if len(scores) > 1 else 0.0)
+        confident = score >= self.threshold and margin >= self.min_margin
+        return IntentPrediction(agent_name, score, margin, confident)
+
+
+def load_examples(path: str) -> Dict[str, List[str]]:
+    """
+    Load labeled examples from a JSONL file of ``{"text", "agent"}`` records.
+
+    Args:
+        path: The examples file
+
+    Returns:
+        Example texts keyed by agent name; empty if the file does not exist
+    """
+    examples: Dict[str, List[str]] = defaultdict(list)
+    if not path or not os.path.exists(path):
+        return examples
+    with open(path) as lines:
+        for line in lines:
+            if line.strip():
+                record = json.loads(line)
+                examples[record["agent"]].append(record["text"])
+    return examples
+
+
+def examples_from_threads(
+    threads: Iterable[dict], parse_agent_switch
+) -> List[Tuple[str, str]]:
+    """
+    Extract labeled examples from threads where users addressed an agent.
+
+    Every user message starting with a valid @ mention is an example of
+    its remainder being meant for the mentioned agent.
+
+    Args:
+        threads: Chainlit thread dicts with their steps
+        parse_agent_switch: The workflow's @ mention parser
+
+    Returns:
+        (text, agent name) pairs
+    """
+    examples = []
+    for thread in threads:
+        for step in thread.get("steps") or []:
+            if step.get("type") != "user_message" or not step.get("output"):
+                continue
+            agent_name, text = parse_agent_switch(step["output"])
+            if agent_name and text:
+                examples.append((text, agent_name))
+    return examples
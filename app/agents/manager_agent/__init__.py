@@ -5,5 +5,6 @@ maintains plans, and coordinates between different agents.
 """
 
 from .profile import manager_agent_profile
+from .plan import PlanStore, plan_store
 
-__all__ = ["manager_agent_profile"]
+__all__ = ["manager_agent_profile", "PlanStore", "plan_store"]
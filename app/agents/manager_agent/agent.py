@@ -2,273 +2,215 @@
 
 This module contains the ManagerAgent that oversees activities,
 maintains plans, coordinates between agents, and provides conversational guidance.
+Its planning tools work on the thread's plan in the plan store.
 """
 
-from llama_index.core.agent.workflow import FunctionAgent
-from llama_index.core.workflow import Context
-from app.llm import llm
+from pydantic_ai import Agent, RunContext
+from app.core import AgentDeps, AgentProfile
+from app.agents.base_implementation import create_pydantic_agent
+from app.agents.catalog import agent_catalog
+from .plan import Plan, STEP_STATUSES, plan_store
 from .profile import manager_agent_profile
-from typing import Dict, List, Any, Optional
-import json
-from datetime import datetime
+from typing import Any, Optional
 
 
-# Manager Agent Tools
-async def create_plan(ctx: Context, user_request: str, plan_details: str) -> str:
-    """Tool for creating and storing a comprehensive plan for the user's request."""
-    current_state = await ctx.get("state")
-
-    plan = {
-        "user_request": user_request,
-        "plan_details": plan_details,
-        "created_at": datetime.now().isoformat(),
-        "status": "created",
-        "steps": [],
-        "current_step": 0,
-        "agent_assignments": {},
-        "results": {},
-    }
-
-    current_state["plan"] = plan
-    await ctx.set("state", current_state)
-
-    return f"Plan created successfully. Plan details: {plan_details}"
-
-
-async def update_plan(ctx: Context, updates: str, status: str = None) -> str:
-    """Tool for updating the current plan with new information or status changes."""
-    current_state = await ctx.get("state")
-
-    if "plan" not in current_state:
-        return "No plan exists to update. Please create a plan first."
+NO_THREAD = "Plans are only available inside a saved conversation thread."
+NO_PLAN = "No plan exists yet. Please create a plan first."
 
-    plan = current_state["plan"]
-    plan["plan_details"] += f"\n\nUpdate ({datetime.now().isoformat()}): {updates}"
 
-    if status:
-        plan["status"] = status
+async def _get_plan(ctx: RunContext[AgentDeps]) -> Optional[Plan]:
+    """Get the plan of the run's thread."""
+    if ctx.deps is None or not ctx.deps.thread_id:
+        return None
+    return await plan_store.get(ctx.deps.thread_id)
 
-    current_state["plan"] = plan
-    await ctx.set("state", current_state)
 
-    return f"Plan updated successfully. Status: {plan['status']}"
+def _changing_state(ctx: RunContext[AgentDeps]) -> None:
+    """Mark the run as having changed its plan, so it is never retried or rerun."""
+    if ctx.deps is not None:
+        ctx.deps.changed_state = True
 
 
-async def add_plan_step(
-    ctx: Context, step_description: str, assigned_agent: str = None
+# Manager Agent Tools
+async def create_plan(
+    ctx: RunContext[AgentDeps], user_request: str, plan_details: str
 ) -> str:
-    """Tool for adding a new step to the current plan."""
-    current_state = await ctx.get("state")
-
-    if "plan" not in current_state:
-        return "No plan exists. Please create a plan first."
+    """Create and store a comprehensive plan for the user's request, replacing any previous plan.
+
+    Args:
+        user_request: The user's request the plan answers
+        plan_details: Description of the approach
+    """
+    if ctx.deps is None or not ctx.deps.thread_id:
+        return NO_THREAD
+    _changing_state(ctx)
+    await plan_store.create(ctx.deps.thread_id, user_request, plan_details)
+    return f"Plan created successfully. Plan details: {plan_details}"
 
-    plan = current_state["plan"]
-    step = {
-        "description": step_description,
-        "assigned_agent": assigned_agent,
-        "status": "pending",
-        "created_at": datetime.now().isoformat(),
-        "result": None,
-    }
 
-    plan["steps"].append(step)
+async def update_plan(
+    ctx: RunContext[AgentDeps], updates: str, status: Optional[str] = None
+) -> str:
+    """Record new information about the current plan, optionally changing its status.
 
-    if assigned_agent:
-        if "agent_assignments" not in plan:
-            plan["agent_assignments"] = {}
-        plan["agent_assignments"][assigned_agent] = len(plan["steps"]) - 1
+    Args:
+        updates: What changed
+        status: New status of the plan, e.g. in_progress or completed
+    """
+    plan = await _get_plan(ctx)
+    if plan is None:
+        return NO_PLAN
+    _changing_state(ctx)
+    await plan_store.add_note(plan, updates, status)
+    return f"Plan updated successfully. Status: {plan.status}"
 
-    current_state["plan"] = plan
-    await ctx.set("state", current_state)
 
-    return f"Step added to plan: {step_description}" + (
+async def add_plan_step(
+    ctx: RunContext[AgentDeps],
+    step_description: str,
+    assigned_agent: Optional[str] = None,
+) -> str:
+    """Add a new step to the end of the current plan.
+
+    Args:
+        step_description: What the step does
+        assigned_agent: Agent responsible for the step, if known
+    """
+    plan = await _get_plan(ctx)
+    if plan is None:
+        return NO_PLAN
+    _changing_state(ctx)
+    step = await plan_store.add_step(plan, step_description, assigned_agent)
+    return f"Step {step.number} added to plan: {step_description}" + (
         f" (assigned to {assigned_agent})" if assigned_agent else ""
     )
 
 
-async def get_plan_status(ctx: Context) -> str:
-    """Tool for retrieving the current plan status and progress."""
-    current_state = await ctx.get("state")
-
-    if "plan" not in current_state:
+async def get_plan_status(ctx: RunContext[AgentDeps]) -> str:
+    """Get the current plan with its steps, their status and the agents' results."""
+    plan = await _get_plan(ctx)
+    if plan is None:
         return "No plan exists yet."
-
-    plan = current_state["plan"]
-
-    status_report = f"""
-Current Plan Status:
-- Request: {plan['user_request']}
-- Status: {plan['status']}
-- Created: {plan['created_at']}
-- Total Steps: {len(plan['steps'])}
-- Current Step: {plan['current_step']}
-
-Plan Details:
-{plan['plan_details']}
-
-Steps:
-"""
-
-    for i, step in enumerate(plan["steps"]):
-        status_indicator = (
-            "✅"
-            if step["status"] == "completed"
-            else "🔄" if step["status"] == "in_progress" else "⏳"
-        )
-        agent_info = (
-            f" (assigned to {step['assigned_agent']})" if step["assigned_agent"] else ""
-        )
-        status_report += (
-            f"{i+1}. {status_indicator} {step['description']}{agent_info}\n"
-        )
-
-    return status_report
+    return plan.render()
 
 
 async def assign_task_to_agent(
-    ctx: Context, agent_name: str, task_description: str, step_index: int = None
+    ctx: RunContext[AgentDeps],
+    agent_name: str,
+    task_description: str,
+    step_number: Optional[int] = None,
 ) -> str:
-    """Tool for assigning a specific task to an agent and tracking the assignment."""
-    current_state = await ctx.get("state")
-
-    if "plan" not in current_state:
-        return "No plan exists. Please create a plan first."
-
-    plan = current_state["plan"]
-
-    # Create assignment record
-    assignment = {
-        "agent_name": agent_name,
-        "task_description": task_description,
-        "assigned_at": datetime.now().isoformat(),
-        "status": "assigned",
-        "step_index": step_index,
-    }
-
-    if "agent_assignments" not in plan:
-        plan["agent_assignments"] = {}
-
-    plan["agent_assignments"][agent_name] = assignment
-
-    # Update step if step_index is provided
-    if step_index is not None and step_index < len(plan["steps"]):
-        plan["steps"][step_index]["assigned_agent"] = agent_name
-        plan["steps"][step_index]["status"] = "assigned"
+    """Assign a task to an agent, tracking it on a plan step.
+
+    Args:
+        agent_name: Agent the task is assigned to
+        task_description: The task
+        step_number: Step of the plan the task belongs to; a new step is added when omitted
+    """
+    plan = await _get_plan(ctx)
+    if plan is None:
+        return NO_PLAN
+
+    if step_number is None:
+        _changing_state(ctx)
+        step = await plan_store.add_step(plan, task_description, agent_name)
+    else:
+        step = plan.get_step(step_number)
+        if step is None:
+            return f"Step {step_number} does not exist; the plan has {len(plan.steps)} steps."
+        _changing_state(ctx)
+        await plan_store.update_step(
+            plan, step, status="assigned", assigned_agent=agent_name
+        )
+    return f"Task assigned to {agent_name} as step {step.number}: {task_description}"
 
-    current_state["plan"] = plan
-    await ctx.set("state", current_state)
 
-    return f"Task assigned to {agent_name}: {task_description}"
+async def update_step_status(
+    ctx: RunContext[AgentDeps], step_number: int, status: str
+) -> str:
+    """Change the status of a plan step.
+
+    Args:
+        step_number: Number of the step
+        status: One of pending, assigned, in_progress or completed
+    """
+    plan = await _get_plan(ctx)
+    if plan is None:
+        return NO_PLAN
+    if status not in STEP_STATUSES:
+        return f"Unknown status {status}; use one of {', '.join(STEP_STATUSES)}."
+    step = plan.get_step(step_number)
+    if step is None:
+        return (
+            f"Step {step_number} does not exist; the plan has {len(plan.steps)} steps."
+        )
+    _changing_state(ctx)
+    await plan_store.update_step(plan, step, status=status)
+    return f"Step {step_number} is now {status}."
 
 
 async def record_agent_result(
-    ctx: Context, agent_name: str, result: str, step_index: int = None
+    ctx: RunContext[AgentDeps],
+    agent_name: str,
+    result: str,
+    step_number: Optional[int] = None,
 ) -> str:
-    """Tool for recording results from agent execution."""
-    current_state = await ctx.get("state")
-
-    if "plan" not in current_state:
-        current_state["plan"] = {"results": {}}
-
-    plan = current_state["plan"]
-
-    if "results" not in plan:
-        plan["results"] = {}
-
-    plan["results"][agent_name] = {
-        "result": result,
-        "completed_at": datetime.now().isoformat(),
-        "step_index": step_index,
-    }
-
-    # Update step status if step_index is provided
-    if step_index is not None and "steps" in plan and step_index < len(plan["steps"]):
-        plan["steps"][step_index]["status"] = "completed"
-        plan["steps"][step_index]["result"] = result
-
-    current_state["plan"] = plan
-    await ctx.set("state", current_state)
-
-    return (
-        f"Result recorded for {agent_name}: {result[:100]}..."
-        if len(result) > 100
-        else f"Result recorded for {agent_name}: {result}"
-    )
-
-
-import os
-import importlib
-from app.core.types import AgentProfile
-
-
-async def get_available_agents(ctx: Context) -> str:
-    """Tool for getting information about available agents and their capabilities."""
-    agents_info = "Available Agents and Their Capabilities:\n\n"
-    agent_count = 1
-
-    agents_dir = os.path.dirname(os.path.dirname(__file__))
-    for agent_folder in os.listdir(agents_dir):
-        if not agent_folder.endswith("_agent"):
-            continue
-
-        profile_path = os.path.join(agents_dir, agent_folder, "profile.py")
-        if not os.path.isfile(profile_path):
-            continue
-
-        try:
-            module_name = f"app.agents.{agent_folder}.profile"
-            module = importlib.import_module(module_name)
-
-            profile_var_name = f"{agent_folder.replace('_agent', '')}_agent_profile"
-            if hasattr(module, profile_var_name):
-                profile: AgentProfile = getattr(module, profile_var_name)
-                agents_info += f"{agent_count}. **{profile.role}**\n"
-                agents_info += f"   - Role: {profile.role}\n"
-                agents_info += f"   - Goal: {profile.goal}\n"
-                agents_info += "   - Best for: " + profile.goal.split(".")[0] + "\n"
-                agents_info += (
-                    "   - Can hand off to: [To be determined dynamically]\n\n"
-                )
-                agent_count += 1
-        except Exception as e:
-            print(f"Error loading profile for {agent_folder}: {str(e)}")
-
-    agents_info += """
-Agent Selection Guidelines:
-- For tasks aligning with a specific agent's role and goal, use that agent
-- For complex tasks requiring multiple steps: Use ManagerAgent to coordinate
-- For tasks requiring multiple agents: Start with the most relevant agent, then hand off as needed
-"""
-
-    return agents_info
+    """Record the result of an agent's work, completing its step if given.
+
+    Args:
+        agent_name: Agent that produced the result
+        result: The result, summarized
+        step_number: Step of the plan the result completes, if any
+    """
+    plan = await _get_plan(ctx)
+    if plan is None:
+        return NO_PLAN
+
+    _changing_state(ctx)
+    await plan_store.record_result(plan, agent_name, result, step_number)
+    step = plan.get_step(step_number) if step_number is not None else None
+    if step is not None:
+        await plan_store.update_step(plan, step, status="completed", result=result)
+    return f"Result recorded for {agent_name}"
+
+
+def get_available_agents() -> str:
+    """Get the available agents, how to address them and what they are best for."""
+    return agent_catalog.text
+
+
+MANAGER_TOOLS = [
+    create_plan,
+    update_plan,
+    add_plan_step,
+    get_plan_status,
+    assign_task_to_agent,
+    update_step_status,
+    record_agent_result,
+    get_available_agents,
+]
 
 
 # Create the ManagerAgent
-def create_manager_agent() -> FunctionAgent:
-    """Create the ManagerAgent with all necessary tools and capabilities."""
-
-    tools = [
-        create_plan,
-        update_plan,
-        add_plan_step,
-        get_plan_status,
-        assign_task_to_agent,
-        record_agent_result,
-        get_available_agents,
-    ]
-
-    return FunctionAgent(
-        name="ManagerAgent",
-        description="Oversees activities, maintains comprehensive plans, coordinates between agents, and provides conversational guidance to users",
-        system_prompt=manager_agent_profile.backstory,
-        llm=llm,
-        tools=tools,
-        can_handoff_to=["IdeationAgent", "IdeaAnalysisAgent"],
+def create_manager_agent(
+    profile: Optional[AgentProfile] = None, model_instance: Any = None
+) -> Agent:
+    """
+    Create the ManagerAgent with all necessary tools and capabilities.
+
+    Args:
+        profile: Optional profile. If not provided, uses the manager profile
+        model_instance: Optional model instance. If not provided, uses default model
+
+    Returns:
+        PydanticAI Agent with the planning tools, expecting AgentDeps
+    """
+    return create_pydantic_agent(
+        profile or manager_agent_profile,
+        model_instance,
+        deps_type=AgentDeps,
+        tools=MANAGER_TOOLS,
     )
 
 
-# Create the agent instance
-ManagerAgent = create_manager_agent()
-
-__all__ = ["ManagerAgent", "create_manager_agent"]
+__all__ = ["create_manager_agent", "MANAGER_TOOLS"]
@@ -0,0 +1,481 @@
+"""Typed plan store of the Manager Agent.
+
+This module keeps the plan the Manager Agent maintains for each thread.
+Plans are slotted records held in an in-process LRU tier and persisted
+to SQLite row by row: every tool call writes only the rows it changed,
+so updating one step never rewrites the rest of the plan, and plans
+survive restarts.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core import CONFIG
+
+
+__all__ = [
+    "PlanStep",
+    "AgentResult",
+    "Plan",
+    "PlanStore",
+    "plan_store",
+    "STEP_STATUSES",
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses a plan step moves through
+STEP_STATUSES = ("pending", "assigned", "in_progress", "completed")
+
+STATUS_INDICATORS = {"completed": "✅", "in_progress": "🔄", "assigned": "👤"}
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+@dataclass(slots=True)
+class PlanStep:
+    """A single step of a plan."""
+
+    number: int
+    description: str
+    assigned_agent: Optional[str] = None
+    status: str = "pending"
+    result: Optional[str] = None
+    created_at: str = field(default_factory=_now)
+    updated_at: str = field(default_factory=_now)
+
+
+@dataclass(slots=True)
+class AgentResult:
+    """The latest result an agent reported for a plan."""
+
+    agent_name: str
+    result: str
+    step_number: Optional[int] = None
+    completed_at: str = field(default_factory=_now)
+
+
+@dataclass(slots=True)
+class Plan:
+    """The plan of one thread."""
+
+    thread_id: str
+    user_request: str
+    details: str
+    status: str = "created"
+    notes: List[str] = field(default_factory=list)
+    steps: List[PlanStep] = field(default_factory=list)
+    results: Dict[str, AgentResult] = field(default_factory=dict)
+    created_at: str = field(default_factory=_now)
+    updated_at: str = field(default_factory=_now)
+
+    def get_step(self, number: int) -> Optional[PlanStep]:
+        """Get a step by its 1-based number."""
+        if 1 <= number <= len(self.steps):
+            return self.steps[number - 1]
+        return None
+
+    @property
+    def current_step(self) -> Optional[PlanStep]:
+        """The first step that is not completed."""
+        return next((step for step in self.steps if step.status != "completed"), None)
+
+    def render(self) -> str:
+        """Render the plan as a status report."""
+        completed = sum(step.status == "completed" for step in self.steps)
+        current = self.current_step
+        lines = [
+            "Current Plan Status:",
+            f"- Request: {self.user_request}",
+            f"- Status: {self.status}",
+            f"- Created: {self.created_at}",
+            f"- Progress: {completed}/{len(self.steps)} steps completed",
+            f"- Current Step: {current.number if current else 'none'}",
+            "",
+            "Plan Details:",
+            self.details,
+        ]
+        for note in self.notes:
+            lines.append(f"Update: {note}")
+
+        lines += ["", "Steps:"]
+        for step in self.steps:
+            agent_info = (
+                f" (assigned to {step.assigned_agent})" if step.assigned_agent else ""
+            )
+            lines.append(
+                f"{step.number}. {STATUS_INDICATORS.get(step.status, '⏳')} "
+                f"{step.description}{agent_info}"
+            )
+
+        if self.results:
+            lines += ["", "Agent Results:"]
+            for result in self.results.values():
+                lines.append(f"- {result.agent_name}: {result.result}")
+        return "\n".join(lines)
+
+
+class _SQLitePlanTier:
+    """Row-per-record plan persistence, accessed off the event loop."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS plans (
+                thread_id TEXT PRIMARY KEY,
+                user_request TEXT NOT NULL,
+                details TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS plan_notes (
+                thread_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                note TEXT NOT NULL,
+                PRIMARY KEY (thread_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS plan_steps (
+                thread_id TEXT NOT NULL,
+                number INTEGER NOT NULL,
+                description TEXT NOT NULL,
+                assigned_agent TEXT,
+                status TEXT NOT NULL,
+                result TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (thread_id, number)
+            );
+            CREATE TABLE IF NOT EXISTS plan_results (
+                thread_id TEXT NOT NULL,
+                agent_name TEXT NOT NULL,
+                result TEXT NOT NULL,
+                step_number INTEGER,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (thread_id, agent_name)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def load(self, thread_id: str) -> Optional[Plan]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_request, details, status, created_at, updated_at "
+                "FROM plans WHERE thread_id = ?",
+                (thread_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            plan = Plan(thread_id, *row[:3], created_at=row[3], updated_at=row[4])
+            plan.notes = [
+                note
+                for (note,) in self._conn.execute(
+                    "SELECT note FROM plan_notes WHERE thread_id = ? ORDER BY position",
+                    (thread_id,),
+                )
+            ]
+            plan.steps = [
+                PlanStep(*step)
+                for step in self._conn.execute(
+                    "SELECT number, description, assigned_agent, status, result, "
+                    "created_at, updated_at FROM plan_steps "
+                    "WHERE thread_id = ? ORDER BY number",
+                    (thread_id,),
+                )
+            ]
+            plan.results = {
+                result[0]: AgentResult(*result)
+                for result in self._conn.execute(
+                    "SELECT agent_name, result, step_number, completed_at "
+                    "FROM plan_results WHERE thread_id = ? ORDER BY completed_at",
+                    (thread_id,),
+                )
+            }
+            return plan
+
+    def create(self, plan: Plan) -> None:
+        """Store a new plan, replacing the thread's previous one."""
+        with self._lock:
+            for table in ("plan_notes", "plan_steps", "plan_results"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (plan.thread_id,)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    plan.thread_id,
+                    plan.user_request,
+                    plan.details,
+                    plan.status,
+                    plan.created_at,
+                    plan.updated_at,
+                ),
+            )
+            self._conn.commit()
+
+    def save_status(self, plan: Plan) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE plans SET status = ?, updated_at = ? WHERE thread_id = ?",
+                (plan.status, plan.updated_at, plan.thread_id),
+            )
+            self._conn.commit()
+
+    def add_note(self, plan: Plan) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO plan_notes VALUES (?, ?, ?)",
+                (plan.thread_id, len(plan.notes), plan.notes[-1]),
+            )
+            self._conn.execute(
+                "UPDATE plans SET status = ?, updated_at = ? WHERE thread_id = ?",
+                (plan.status, plan.updated_at, plan.thread_id),
+            )
+            self._conn.commit()
+
+    def save_step(self, plan: Plan, step: PlanStep) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    plan.thread_id,
+                    step.number,
+                    step.description,
+                    step.assigned_agent,
+                    step.status,
+                    step.result,
+                    step.created_at,
+                    step.updated_at,
+                ),
+            )
+            self._conn.commit()
+
+    def save_result(self, plan: Plan, result: AgentResult) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_results VALUES (?, ?, ?, ?, ?)",
+                (
+                    plan.thread_id,
+                    result.agent_name,
+                    result.result,
+                    result.step_number,
+                    result.completed_at,
+                ),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PlanStore:
+    """
+    Plans of the Manager Agent keyed by thread.
+
+    Recently used plans are kept in memory; every change is written
+    through to the SQLite tier as the individual rows it touched.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: int = 256):
+        """
+        Initialize the PlanStore.
+
+        Args:
+            path: SQLite file plans are persisted to. Defaults to configuration
+            memory_entries: Number of plans kept in memory
+        """
+        self._path = path if path is not None else CONFIG.plan_store_path
+        self._memory_entries = memory_entries
+        self._plans: OrderedDict[str, Optional[Plan]] = OrderedDict()
+        self._disk: Optional[_SQLitePlanTier] = None
+        self._disk_failed = False
+
+    def _get_disk(self) -> Optional[_SQLitePlanTier]:
+        """Open the persistent tier on first use."""
+        if self._disk is None and self._path and not self._disk_failed:
+            try:
+                self._disk = _SQLitePlanTier(self._path)
+            except sqlite3.Error as e:
+                self._disk_failed = True
+                logger.warning(f"Plan persistence disabled: {e}")
+        return self._disk
+
+    def _remember(self, thread_id: str, plan: Optional[Plan]) -> None:
+        self._plans[thread_id] = plan
+        self._plans.move_to_end(thread_id)
+        while len(self._plans) > self._memory_entries:
+            self._plans.popitem(last=False)
+
+    async def _write(self, method: str, *args) -> None:
+        """Write a change through to the persistent tier."""
+        disk = self._get_disk()
+        if disk is None:
+            return
+        try:
+            await asyncio.to_thread(getattr(disk, method), *args)
+        except sqlite3.Error as e:
+            logger.warning(f"Plan write failed: {e}")
+
+    async def get(self, thread_id: str) -> Optional[Plan]:
+        """
+        Get the plan of a thread.
+
+        Args:
+            thread_id: Thread the plan belongs to
+
+        Returns:
+            The thread's plan, or None if it has none
+        """
+        if thread_id in self._plans:
+            self._plans.move_to_end(thread_id)
+            return self._plans[thread_id]
+
+        plan = None
+        disk = self._get_disk()
+        if disk is not None:
+            try:
+                plan = await asyncio.to_thread(disk.load, thread_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Plan read failed: {e}")
+        self._remember(thread_id, plan)
+        return plan
+
+    async def create(self, thread_id: str, user_request: str, details: str) -> Plan:
+        """
+        Create the plan of a thread, replacing any previous plan.
+
+        Args:
+            thread_id: Thread the plan belongs to
+            user_request: The request the plan answers
+            details: Description of the plan
+
+        Returns:
+            The new plan
+        """
+        plan = Plan(thread_id, user_request, details)
+        self._remember(thread_id, plan)
+        await self._write("create", plan)
+        return plan
+
+    async def add_note(
+        self, plan: Plan, note: str, status: Optional[str] = None
+    ) -> None:
+        """
+        Append an update note to a plan, optionally changing its status.
+
+        Args:
+            plan: The plan to update
+            note: The update
+            status: New status of the plan, if it changed
+        """
+        plan.notes.append(f"({_now()}) {note}")
+        if status:
+            plan.status = status
+        plan.updated_at = _now()
+        await self._write("add_note", plan)
+
+    async def add_step(
+        self, plan: Plan, description: str, assigned_agent: Optional[str] = None
+    ) -> PlanStep:
+        """
+        Append a step to a plan.
+
+        Args:
+            plan: The plan to extend
+            description: What the step does
+            assigned_agent: Agent responsible for the step, if any
+
+        Returns:
+            The new step
+        """
+        step = PlanStep(
+            len(plan.steps) + 1,
+            description,
+            assigned_agent,
+            "assigned" if assigned_agent else "pending",
+        )
+        plan.steps.append(step)
+        await self._write("save_step", plan, step)
+        return step
+
+    async def update_step(
+        self,
+        plan: Plan,
+        step: PlanStep,
+        status: Optional[str] = None,
+        assigned_agent: Optional[str] = None,
+        result: Optional[str] = None,
+    ) -> None:
+        """
+        Update a single step of a plan.
+
+        Args:
+            plan: The plan the step belongs to
+            step: The step to update
+            status: New status of the step, if it changed
+            assigned_agent: Agent now responsible for the step, if it changed
+            result: Result of the step, if it produced one
+        """
+        if status:
+            step.status = status
+        if assigned_agent:
+            step.assigned_agent = assigned_agent
+        if result is not None:
+            step.result = result
+        step.updated_at = _now()
+        await self._write("save_step", plan, step)
+
+    async def record_result(
+        self,
+        plan: Plan,
+        agent_name: str,
+        result: str,
+        step_number: Optional[int] = None,
+    ) -> AgentResult:
+        """
+        Record an agent's result on a plan.
+
+        Args:
+            plan: The plan the result belongs to
+            agent_name: Agent that produced the result
+            result: The result
+            step_number: Step the result completes, if any
+
+        Returns:
+            The recorded result
+        """
+        record = AgentResult(agent_name, result, step_number)
+        plan.results.pop(agent_name, None)
+        plan.results[agent_name] = record
+        await self._write("save_result", plan, record)
+        return record
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+# Global plan store instance
+plan_store = PlanStore()
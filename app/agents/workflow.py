@@ -4,24 +4,124 @@ This module implements a unified agent system that handles all agents
 and manages session-based agent switching with @ notation.
 """
 
-from app.llm import model
+from app.llm import (
+    get_default_model,
+    get_shared_model,
+    ContextBudgetManager,
+    Hedger,
+    ModelRouter,
+    ResilientCaller,
+    request_scheduler,
+    RouteDecision,
+    RoutePolicy,
+    estimate_cost,
+    token_counter,
+    usage_ledger,
+)
+from app.core import (
+    CONFIG,
+    AgentDeps,
+    AgentProfile,
+    AgentRegistry,
+    AgentRunError,
+    CircuitOpenError,
+    FanOutResult,
+    PromptSize,
+    RunStats,
+)
+from app.events import (
+    event_bus,
+    AgentSwitched,
+    RunStarted,
+    TokenDelta,
+    RunFinished,
+    RunFailed,
+)
 from app.agents.base_implementation import create_pydantic_agent
-from typing import Tuple, Optional
+from app.agents.intent import INTENT_KEYWORDS, IntentClassifier, load_examples
+from app.cache import make_cache_key, response_cache, single_flight
+from app.memory import ConversationMemory, HistoryBudget, HistoryCompactor
+from app.prompts import history_summary_prompt
+from app.streaming import replay_text
+from pydantic_ai import Agent
+from pydantic_ai.usage import Usage
+from pydantic_ai.messages import ModelMessage, ModelRequest, SystemPromptPart
+from functools import partial
+from typing import Callable, Dict, List, Tuple, Optional
+import asyncio
+import importlib
+import logging
 import re
+import time
+import uuid
 
-# Import all agent profiles
-from app.agents.ideation_agent.profile import ideation_agent_profile
-from app.agents.idea_analysis_agent.profile import idea_analysis_agent_profile
-from app.agents.manager_agent.profile import manager_agent_profile
-from app.agents.product_manager_agent.profile import product_manager_agent_profile
-from app.agents.strategic_advisor_agent.profile import strategic_advisor_agent_profile
-from app.agents.landing_page_designer_agent.profile import (
-    landing_page_designer_agent_profile,
-)
-from app.agents.cto_agent.profile import cto_agent_profile
-from app.agents.advertising_strategist_agent.profile import (
-    advertising_strategist_agent_profile,
-)
+
+logger = logging.getLogger(__name__)
+
+
+# Scheduling key of runs made without a user
+ANONYMOUS_USER = "anonymous"
+
+
+# Name the history summarizer's runs are reported and accounted under
+SUMMARIZER_AGENT = "summarizer"
+
+
+# Manager input used to synthesize the answers of a fan-out
+FAN_OUT_SYNTHESIS_PROMPT = """Several specialists were asked the same question.
+
+Question:
+{question}
+
+Their answers:
+
+{answers}
+
+Synthesize these answers into one recommendation for the user. Point out \
+where the specialists agree, where they disagree and what to do next."""
+
+
+# Profile locations keyed by workflow agent name, imported on first use
+AGENT_PROFILE_PATHS: Dict[str, str] = {
+    "manager": "app.agents.manager_agent.profile:manager_agent_profile",
+    "ideation": "app.agents.ideation_agent.profile:ideation_agent_profile",
+    "ideaanalysis": "app.agents.idea_analysis_agent.profile:idea_analysis_agent_profile",
+    "productmanager": "app.agents.product_manager_agent.profile:product_manager_agent_profile",
+    "strategicadvisor": "app.agents.strategic_advisor_agent.profile:strategic_advisor_agent_profile",
+    "landingpage": "app.agents.landing_page_designer_agent.profile:landing_page_designer_agent_profile",
+    "cto": "app.agents.cto_agent.profile:cto_agent_profile",
+    "advertisingstrategist": "app.agents.advertising_strategist_agent.profile:advertising_strategist_agent_profile",
+}
+
+
+# Short @ mentions accepted for agents with long names
+AGENT_ALIASES: Dict[str, str] = {
+    "analysis": "ideaanalysis",
+    "product": "productmanager",
+    "strategic": "strategicadvisor",
+    "landing": "landingpage",
+    "advertising": "advertisingstrategist",
+}
+
+
+# Builders of agents that need more than their profile, e.g. tools
+AGENT_BUILDER_PATHS: Dict[str, str] = {
+    "manager": "app.agents.manager_agent.agent:create_manager_agent",
+}
+
+
+def load_profile(path: str) -> AgentProfile:
+    """
+    Import an agent profile from its ``module:attribute`` path.
+
+    Args:
+        path: Location of the profile
+
+    Returns:
+        The agent profile
+    """
+    module_name, attribute = path.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
 
 
 class AgentWorkflow:
@@ -34,28 +134,107 @@ class AgentWorkflow:
 
     def __init__(self):
         """Initialize the unified agent workflow."""
-        self.agents = self._create_all_agents()
+        self.agent_names = list(AGENT_PROFILE_PATHS)
         self.default_agent = "manager"
+        self._intent_classifier: Optional[IntentClassifier] = None
+        self._summarizer: Optional[Agent] = None
+        self._register_agents()
+        self.history_compactor = HistoryCompactor(
+            self.summarize_history, self._create_history_budgets()
+        )
+        self.budget_manager = ContextBudgetManager()
+        self.model_router = ModelRouter(self._create_route_policies())
+        self.hedger = Hedger()
+        self.resilience = ResilientCaller()
+        # Agents whose answers must never be served from the response cache,
+        # like the manager, whose tools change its plan
+        self.uncached_agents: set[str] = set(CONFIG.response_cache_uncached_agents)
+        # Agents never hedged, since both requests could run the same tools
+        self.unhedged_agents: set[str] = {"manager"}
 
-    def _create_all_agents(self) -> dict:
-        """Create all PydanticAI agents."""
+    def _register_agents(self) -> None:
+        """Register lazy profile loaders and agent factories for all agents."""
+        for name in AGENT_PROFILE_PATHS:
+            self.reload_agent(name)
+
+    def get_profile_module(self, agent_name: str) -> str:
+        """Get the name of the module defining an agent's profile."""
+        return AGENT_PROFILE_PATHS[agent_name].split(":")[0]
+
+    def reload_agent(self, agent_name: str) -> None:
+        """
+        Discard an agent's loaded profile and built agent.
+
+        Both are rebuilt from the profile module on next use, so a reloaded
+        module takes effect.
+
+        Args:
+            agent_name: Workflow agent name
+        """
+        path = AGENT_PROFILE_PATHS[agent_name]
+        AgentRegistry.register_profile_factory(agent_name, partial(load_profile, path))
+        AgentRegistry.register_agent_factory(
+            agent_name, partial(self._build_agent, agent_name)
+        )
+        # Retrained from the new profile on next use
+        self._intent_classifier = None
+
+    def get_intent_classifier(self) -> IntentClassifier:
+        """
+        Get the intent classifier, training it on first use.
+
+        Every agent is described by its profile, its keywords and the
+        labeled examples in ``CONFIG.intent_examples_path``.
+
+        Returns:
+            The trained classifier
+        """
+        if self._intent_classifier is None:
+            examples = load_examples(CONFIG.intent_examples_path)
+            documents = {}
+            for name in self.agent_names:
+                profile = self.get_profile(name)
+                documents[name] = [
+                    f"{profile.role}. {profile.goal}",
+                    profile.backstory,
+                    INTENT_KEYWORDS.get(name, ""),
+                    *examples.get(name, []),
+                ]
+            classifier = IntentClassifier()
+            classifier.fit(documents)
+            self._intent_classifier = classifier
+        return self._intent_classifier
+
+    def _build_agent(self, agent_name: str) -> Agent:
+        """Build the PydanticAI agent of a workflow agent."""
+        logger.info(f"Building agent {agent_name}")
+        builder_path = AGENT_BUILDER_PATHS.get(agent_name)
+        if builder_path is not None:
+            module_name, attribute = builder_path.split(":")
+            builder = getattr(importlib.import_module(module_name), attribute)
+            return builder(AgentRegistry.get_profile(agent_name), get_default_model())
+        return create_pydantic_agent(
+            AgentRegistry.get_profile(agent_name), get_default_model()
+        )
+
+    def _create_history_budgets(self) -> dict:
+        """Create per-agent history budgets, overriding the configured default."""
         return {
-            "manager": create_pydantic_agent(manager_agent_profile, model),
-            "ideation": create_pydantic_agent(ideation_agent_profile, model),
-            "ideaanalysis": create_pydantic_agent(idea_analysis_agent_profile, model),
-            "productmanager": create_pydantic_agent(
-                product_manager_agent_profile, model
-            ),
-            "strategicadvisor": create_pydantic_agent(
-                strategic_advisor_agent_profile, model
-            ),
-            "landingpage": create_pydantic_agent(
-                landing_page_designer_agent_profile, model
-            ),
-            "cto": create_pydantic_agent(cto_agent_profile, model),
-            "advertisingstrategist": create_pydantic_agent(
-                advertising_strategist_agent_profile, model
-            ),
+            # Masterplans and landing page specs are long and referenced later
+            "cto": HistoryBudget(max_tokens=12000, keep_turns=8),
+            "landingpage": HistoryBudget(max_tokens=10000),
+            # The ideation loop produces long outputs that are rarely revisited
+            "ideation": HistoryBudget(keep_turns=3),
+        }
+
+    def _create_route_policies(self) -> dict:
+        """Create per-agent model routing policies."""
+        return {
+            # Small talk with the manager does not need a frontier model
+            "manager": RoutePolicy(light_capability=1, heavy_capability=2),
+            "cto": RoutePolicy(light_capability=2, expected_output_tokens=3000),
+            "landingpage": RoutePolicy(light_capability=2, expected_output_tokens=2000),
+            "strategicadvisor": RoutePolicy(light_capability=2),
         }
 
     def parse_agent_switch(self, message: str) -> Tuple[Optional[str], str]:
@@ -79,24 +258,131 @@ class AgentWorkflow:
         agent_part = parts[0][1:].lower()  # Remove @ and lowercase
         remainder = parts[1] if len(parts) > 1 else ""
 
-        # Check if it's a valid agent
-        if agent_part in self.agents:
+        # Check if it's a valid agent or alias
+        agent_part = AGENT_ALIASES.get(agent_part, agent_part)
+        if agent_part in self.agent_names:
             return agent_part, remainder.strip()
 
         # Invalid agent, return original message
         return None, message
 
+    def parse_agent_mentions(self, message: str) -> Tuple[List[str], str]:
+        """
+        Parse every leading @ mention from a message.
+
+        Args:
+            message: The user message that may start with several @ mentions
+
+        Returns:
+            Tuple of (agent_names, cleaned_message)
+            agent_names lists each mentioned agent once, in order of mention;
+            parsing stops at the first word that is not a valid mention
+        """
+        agent_names: List[str] = []
+        remainder = message.strip()
+
+        while remainder.startswith("@"):
+            agent_name, cleaned = self.parse_agent_switch(remainder)
+            if agent_name is None:
+                break
+            if agent_name not in agent_names:
+                agent_names.append(agent_name)
+            remainder = cleaned
+
+        return agent_names, remainder
+
+    def classify_intent(self, message: str, current_agent: str) -> str:
+        """
+        Pick the agent for a message without an @ mention.
+
+        Only conversations with the default agent are routed: once the user
+        has switched to a specialist, follow-up messages stay with it.
+
+        Args:
+            message: The user's message
+            current_agent: Currently active agent name
+
+        Returns:
+            The agent the message should go to
+        """
+        if not CONFIG.intent_routing_enabled or current_agent != self.default_agent:
+            return current_agent
+
+        prediction = self.get_intent_classifier().classify(message)
+        if not prediction.confident:
+            return current_agent
+
+        logger.info(
+            f"Intent routed to {prediction.agent_name} "
+            f"(score={prediction.score:.2f}, margin={prediction.margin:.2f})"
+        )
+        return prediction.agent_name
+
     def get_agent(self, agent_name: str):
         """
         Get agent by name, fallback to default agent.
 
+        The agent is built on first use.
+
         Args:
             agent_name: Name of the agent to retrieve
 
         Returns:
             PydanticAI Agent instance
         """
-        return self.agents.get(agent_name, self.agents[self.default_agent])
+        if agent_name not in self.agent_names:
+            agent_name = self.default_agent
+        return AgentRegistry.get_agent(agent_name)
+
+    def get_profile(self, agent_name: str) -> AgentProfile:
+        """
+        Get an agent's profile, fallback to the default agent's profile.
+
+        Args:
+            agent_name: Name of the agent
+
+        Returns:
+            The agent profile
+        """
+        if agent_name not in self.agent_names:
+            agent_name = self.default_agent
+        return AgentRegistry.get_profile(agent_name)
+
+    def _build_prompt_history(
+        self,
+        agent_name: str,
+        history: List[ModelMessage],
+        user_input: str,
+        model_name: Optional[str] = None,
+    ) -> Tuple[List[ModelMessage], PromptSize]:
+        """
+        Fit history into the context window and prefix the system prompt.
+
+        PydanticAI only adds the agent's system prompt when the history is
+        empty, so it is prepended explicitly whenever history is sent.
+
+        Args:
+            agent_name: Workflow agent name
+            history: History that would be sent with the run
+            user_input: The user's message
+            model_name: Model the prompt is for. Defaults to configuration
+
+        Returns:
+            Tuple of (history to send, computed prompt size)
+
+        Raises:
+            ContextBudgetExceeded: If the prompt cannot fit the context window
+        """
+        system_prompt = self.get_profile(agent_name).backstory
+        history, prompt_size = self.budget_manager.fit(
+            system_prompt, history, user_input, model_name
+        )
+        if history:
+            history = [
+                ModelRequest(parts=[SystemPromptPart(content=system_prompt)]),
+                *history,
+            ]
+        return history, prompt_size
 
     def get_agent_profile_name(self, agent_name: str) -> str:
         """Get human-readable agent name for display."""
@@ -113,76 +399,775 @@ class AgentWorkflow:
         return profile_map.get(agent_name, "Unknown Agent")
 
     async def run_streaming(
-        self, message: str, current_agent: str, message_history: list = None
+        self,
+        message: str,
+        current_agent: str,
+        message_history: list = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+        memory: Optional[ConversationMemory] = None,
+        user_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        on_stats: Optional[Callable[[RunStats], None]] = None,
+        refresh: bool = False,
+        stream_id: Optional[str] = None,
     ) -> Tuple[str, str]:
         """
         Execute the workflow with streaming events.
 
+        When ``memory`` is given, the history sent to the agent is built from it
+        within the agent's history budget, the completed turn is recorded in it,
+        and older turns are summarized in the background.
+
         Args:
             message: The user's message
             current_agent: Currently active agent name
             message_history: List of PydanticAI ModelMessage objects for conversation history
+            on_delta: Optional non-blocking callback receiving each new text delta
+            memory: Optional session memory used instead of message_history
+            user_id: User the run is made for, used for fair scheduling
+            thread_id: Thread the run belongs to, scoping the state agent tools keep
+            on_stats: Optional callback receiving the statistics of the finished run
+            refresh: Generate the answer even if it is cached, replacing the cached one
+            stream_id: UI stream the run's events are tagged with, e.g. the
+                id of the message showing the reply
 
         Returns:
-            Tuple of (response, new_current_agent)
+            Tuple of (response, new_current_agent); an agent picked by intent
+            routing answers this message only, so it is not the new
+            current agent
+
+        Raises:
+            AgentRunError: If the run failed; the turn is not recorded in memory
         """
         # Parse for agent switching
         switch_agent, cleaned_message = self.parse_agent_switch(message)
+        run_id = uuid.uuid4().hex
 
         # Determine which agent to use
         if switch_agent:
             # User is switching agents
             target_agent_name = switch_agent
+            session_agent = switch_agent
             user_input = cleaned_message
-            print(f"\n🔄 Switching to {self.get_agent_profile_name(target_agent_name)}")
+            event_bus.emit(
+                AgentSwitched(
+                    run_id=run_id,
+                    agent_name=target_agent_name,
+                    display_name=self.get_agent_profile_name(target_agent_name),
+                    previous_agent=current_agent,
+                    stream_id=stream_id,
+                )
+            )
         else:
-            # Continue with current agent
-            target_agent_name = current_agent
+            # Continue with current agent, unless a specialist clearly fits
+            target_agent_name = self.classify_intent(message, current_agent)
+            session_agent = current_agent
             user_input = message
+            if target_agent_name != current_agent:
+                event_bus.emit(
+                    AgentSwitched(
+                        run_id=run_id,
+                        agent_name=target_agent_name,
+                        display_name=self.get_agent_profile_name(target_agent_name),
+                        previous_agent=current_agent,
+                        stream_id=stream_id,
+                    )
+                )
+
+        if memory is not None:
+            message_history = self.history_compactor.prepare(memory, target_agent_name)
+        elif message_history is None:
+            message_history = []
+
+        full_response = await self._run_agent(
+            run_id,
+            target_agent_name,
+            user_input,
+            message_history,
+            on_delta,
+            user_id,
+            thread_id,
+            on_stats,
+            refresh,
+            stream_id,
+        )
+
+        if memory is not None:
+            memory.append_turn(user_input, full_response)
+            self.history_compactor.schedule(
+                memory, target_agent_name, user_id, thread_id
+            )
+
+        return full_response, session_agent
+
+    async def run_fan_out(
+        self,
+        agent_names: List[str],
+        user_input: str,
+        message_history: list = None,
+        on_delta: Optional[Callable[[str, str], None]] = None,
+        memory: Optional[ConversationMemory] = None,
+        user_id: Optional[str] = None,
+        synthesize: Optional[bool] = None,
+        on_synthesis_delta: Optional[Callable[[str], None]] = None,
+        thread_id: Optional[str] = None,
+        stream_ids: Optional[Dict[str, str]] = None,
+        synthesis_stream_id: Optional[str] = None,
+    ) -> FanOutResult:
+        """
+        Ask several agents the same question concurrently.
+
+        Every agent runs over the same history, so the wall-clock time is
+        that of the slowest agent. A failing agent does not cancel the
+        others. When synthesis is enabled, the answers are then handed to
+        the manager for a combined answer. The whole exchange is recorded
+        in ``memory`` as a single turn.
+
+        Args:
+            agent_names: Workflow names of the agents to ask
+            user_input: The user's message, without the mentions
+            message_history: List of PydanticAI ModelMessage objects for conversation history
+            on_delta: Optional non-blocking callback receiving each agent's name and new text delta
+            memory: Optional session memory used instead of message_history
+            user_id: User the runs are made for, used for fair scheduling
+            synthesize: Whether the manager synthesizes the answers. Defaults to configuration
+            on_synthesis_delta: Optional non-blocking callback receiving the synthesis's text deltas
+            thread_id: Thread the runs belong to, scoping the state agent tools keep
+            stream_ids: UI stream each agent's run is tagged with, by agent name
+            synthesis_stream_id: UI stream the synthesis run is tagged with
+
+        Returns:
+            The answer and run statistics of every agent, the errors of the
+            failed ones and the synthesis
+
+        Raises:
+            AgentRunError: If every agent failed; the turn is not recorded in memory
+        """
+        if synthesize is None:
+            synthesize = CONFIG.fan_out_synthesis_enabled
+
+        def history_for(agent_name: str) -> List[ModelMessage]:
+            if memory is not None:
+                return self.history_compactor.prepare(memory, agent_name)
+            return list(message_history or [])
 
-        # Get the target agent
+        def delta_for(agent_name: str) -> Optional[Callable[[str], None]]:
+            if on_delta is None:
+                return None
+            return partial(on_delta, agent_name)
+
+        result = FanOutResult()
+
+        def keep_stats(stats: RunStats) -> None:
+            result.stats[stats.agent_name] = stats
+
+        def keep_synthesis_stats(stats: RunStats) -> None:
+            result.synthesis_stats = stats
+
+        outcomes = await asyncio.gather(
+            *(
+                self._run_agent(
+                    uuid.uuid4().hex,
+                    agent_name,
+                    user_input,
+                    history_for(agent_name),
+                    delta_for(agent_name),
+                    user_id,
+                    thread_id,
+                    keep_stats,
+                    stream_id=(stream_ids or {}).get(agent_name),
+                )
+                for agent_name in agent_names
+            ),
+            return_exceptions=True,
+        )
+
+        for agent_name, outcome in zip(agent_names, outcomes):
+            if isinstance(outcome, AgentRunError):
+                result.errors[agent_name] = str(outcome.cause)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                result.replies[agent_name] = outcome
+
+        if not result.replies:
+            raise next(
+                outcome for outcome in outcomes if isinstance(outcome, AgentRunError)
+            )
+
+        if synthesize:
+            try:
+                result.synthesis = await self._run_agent(
+                    uuid.uuid4().hex,
+                    self.default_agent,
+                    self._build_synthesis_prompt(user_input, result.replies),
+                    history_for(self.default_agent),
+                    on_synthesis_delta,
+                    user_id,
+                    thread_id,
+                    keep_synthesis_stats,
+                    stream_id=synthesis_stream_id,
+                )
+            except AgentRunError as e:
+                # The individual answers are still worth keeping
+                result.synthesis_error = str(e.cause)
+
+        if memory is not None:
+            memory.append_turn(user_input, self._render_fan_out(result))
+            for agent_name in result.replies:
+                self.history_compactor.schedule(memory, agent_name, user_id, thread_id)
+
+        return result
+
+    def _build_synthesis_prompt(self, user_input: str, replies: Dict[str, str]) -> str:
+        """Build the manager's input for synthesizing fan-out answers."""
+        answers = "\n\n".join(
+            f"## {self.get_agent_profile_name(agent_name)}\n{reply}"
+            for agent_name, reply in replies.items()
+        )
+        return FAN_OUT_SYNTHESIS_PROMPT.format(question=user_input, answers=answers)
+
+    def _render_fan_out(self, result: FanOutResult) -> str:
+        """Render fan-out answers as the single response recorded in memory."""
+        sections = [
+            f"**{self.get_agent_profile_name(agent_name)}:**\n{reply}"
+            for agent_name, reply in result.replies.items()
+        ]
+        if result.synthesis is not None:
+            sections.append(f"**Synthesis:**\n{result.synthesis}")
+        return "\n\n".join(sections)
+
+    async def _run_agent(
+        self,
+        run_id: str,
+        target_agent_name: str,
+        user_input: str,
+        message_history: List[ModelMessage],
+        on_delta: Optional[Callable[[str], None]],
+        user_id: Optional[str],
+        thread_id: Optional[str] = None,
+        on_stats: Optional[Callable[[RunStats], None]] = None,
+        refresh: bool = False,
+        stream_id: Optional[str] = None,
+    ) -> str:
+        """
+        Run one agent on a prepared history, emitting its stream events.
+
+        The run is refused when the user has used up their usage quota, and
+        its usage is added to the user's and the thread's totals.
+
+        Args:
+            run_id: Unique identifier of the run
+            target_agent_name: Workflow name of the agent to run
+            user_input: The user's message
+            message_history: History that would be sent with the run
+            on_delta: Optional non-blocking callback receiving each new text delta
+            user_id: User the run is made for, used for fair scheduling
+            thread_id: Thread the run belongs to
+            on_stats: Optional callback receiving the statistics of the finished run
+            refresh: Skip the response cache lookup; a cacheable answer is still stored
+            stream_id: UI stream the run's events are tagged with
+
+        Returns:
+            The agent's full response
+
+        Raises:
+            AgentRunError: If the run failed or the user's quota is exhausted
+        """
         agent = self.get_agent(target_agent_name)
+        display_name = self.get_agent_profile_name(target_agent_name)
 
-        # Display agent info
-        print(f"\n{'='*50}")
-        print(f"🤖 Active Agent: {self.get_agent_profile_name(target_agent_name)}")
-        print(f"{'='*50}\n")
+        route = self.model_router.route(target_agent_name, user_input, message_history)
+        stats = RunStats(
+            run_id=run_id,
+            agent_name=target_agent_name,
+            model_name=route.model,
+            route_reason=route.reason,
+            user_id=user_id,
+            thread_id=thread_id,
+        )
 
-        # Use message_history directly (already in PydanticAI format)
-        if message_history is None:
-            message_history = []
+        event_bus.emit(
+            RunStarted(
+                run_id=run_id,
+                stream_id=stream_id,
+                agent_name=target_agent_name,
+                display_name=display_name,
+                model_name=stats.model_name,
+            )
+        )
+
+        started = time.perf_counter()
+
+        def emit_delta(delta: str) -> None:
+            if stats.ttft_ms is None:
+                stats.ttft_ms = (time.perf_counter() - started) * 1000
+            event_bus.emit(
+                TokenDelta(
+                    run_id=run_id,
+                    stream_id=stream_id,
+                    agent_name=target_agent_name,
+                    display_name=display_name,
+                    delta=delta,
+                )
+            )
+            if on_delta is not None:
+                on_delta(delta)
 
         try:
-            # Execute with PydanticAI streaming
-            async with agent.run_stream(
-                user_input, message_history=message_history
-            ) as result:
-                full_response = ""
-                async for text in result.stream_text():
-                    print(text, end="", flush=True)
-                    full_response = text
+            usage_ledger.check_quota(user_id)
+            message_history, stats.prompt = self._build_prompt_history(
+                target_agent_name, message_history, user_input, route.model
+            )
+
+            cache_key = None
+            if (
+                CONFIG.response_cache_enabled
+                and target_agent_name not in self.uncached_agents
+            ):
+                cache_key = make_cache_key(
+                    route.model,
+                    self.get_profile(target_agent_name).backstory,
+                    message_history,
+                    user_input,
+                )
+
+            cached_response = (
+                await response_cache.get(cache_key)
+                if cache_key and not refresh
+                else None
+            )
+            if cached_response is not None:
+                # Replay the cached answer so the UI still streams it
+                stats.cache_hit = True
+                await replay_text(cached_response, emit_delta)
+                full_response = cached_response
+            elif cache_key:
+                # Identical concurrent runs share one provider call
+                async def produce(fan_out: Callable[[str], None]) -> Tuple[str, Usage]:
+                    response, usage = await self._stream_routed(
+                        agent, route, user_input, message_history, fan_out, stats
+                    )
+                    # A fallback or hedge model's answer is stored under its own key
+                    store_key = cache_key
+                    if stats.model_name != route.model:
+                        store_key = make_cache_key(
+                            stats.model_name,
+                            self.get_profile(target_agent_name).backstory,
+                            message_history,
+                            user_input,
+                        )
+                    await response_cache.put(store_key, response)
+                    return response, usage
 
-                print(
-                    f"\n\n✅ {self.get_agent_profile_name(target_agent_name)} completed!"
+                (full_response, usage), is_leader = await single_flight.run(
+                    cache_key, produce, emit_delta
                 )
-                print("=" * 60)
+                stats.coalesced = not is_leader
+                if is_leader:
+                    self._record_usage(stats, usage)
+            else:
+                full_response, usage = await self._stream_routed(
+                    agent, route, user_input, message_history, emit_delta, stats
+                )
+                self._record_usage(stats, usage)
+
+            stats.duration_ms = (time.perf_counter() - started) * 1000
+            stats.output_chars = len(full_response)
+            usage_ledger.record(stats)
+            if on_stats is not None:
+                on_stats(stats)
+            event_bus.emit(
+                RunFinished(
+                    run_id=run_id,
+                    stream_id=stream_id,
+                    agent_name=target_agent_name,
+                    display_name=display_name,
+                    stats=stats,
+                )
+            )
 
-                return full_response, target_agent_name
+            return full_response
 
         except Exception as e:
-            error_msg = (
-                f"Error in {self.get_agent_profile_name(target_agent_name)}: {str(e)}"
+            event_bus.emit(
+                RunFailed(
+                    run_id=run_id,
+                    stream_id=stream_id,
+                    agent_name=target_agent_name,
+                    display_name=display_name,
+                    error=str(e),
+                    error_type=type(e).__name__,
+                )
             )
-            print(f"❌ {error_msg}")
-            return error_msg, target_agent_name
+            raise AgentRunError(target_agent_name, display_name, e) from e
+
+    async def summarize_history(
+        self,
+        prompt: str,
+        user_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> str:
+        """
+        Run the history summarizer as a scheduled, resilient and accounted run.
+
+        Summaries share the user's rate limit and quota with their other
+        runs, go through timeouts, retries and circuit breaking, and their
+        usage and cost are added to the user's and the thread's totals.
+
+        Args:
+            prompt: The current summary and the turns to fold into it
+            user_id: User the summary is made for
+            thread_id: Thread the summarized conversation belongs to
+
+        Returns:
+            The new summary
+
+        Raises:
+            AgentRunError: If the run failed or the user's quota is exhausted
+        """
+        run_id = uuid.uuid4().hex
+        display_name = "History Summarizer"
+        stats = RunStats(
+            run_id=run_id,
+            agent_name=SUMMARIZER_AGENT,
+            model_name=CONFIG.model_name,
+            route_reason="summary",
+            user_id=user_id,
+            thread_id=thread_id,
+        )
+        event_bus.emit(
+            RunStarted(
+                run_id=run_id,
+                agent_name=SUMMARIZER_AGENT,
+                display_name=display_name,
+                model_name=stats.model_name,
+            )
+        )
+        started = time.perf_counter()
+
+        try:
+            usage_ledger.check_quota(user_id)
+            system_tokens = token_counter.count_prompt(history_summary_prompt)
+            input_tokens = token_counter.count_text(prompt)
+            stats.prompt = PromptSize(
+                system_tokens=system_tokens,
+                input_tokens=input_tokens,
+                total_tokens=system_tokens + input_tokens,
+            )
+            async with request_scheduler.run(
+                user_id or ANONYMOUS_USER, stats.prompt.total_tokens
+            ) as scheduled:
+                summary, usage = await self.resilience.call(
+                    stats.model_name,
+                    lambda callback: self._stream_run(
+                        self._get_summarizer(), prompt, [], callback, stats.model_name
+                    ),
+                    lambda delta: None,
+                )
+                stats.queue_wait_ms = scheduled.wait_ms
+                scheduled.settle(usage.total_tokens)
+
+            self._record_usage(stats, usage)
+            stats.duration_ms = (time.perf_counter() - started) * 1000
+            stats.output_chars = len(summary)
+            usage_ledger.record(stats)
+            event_bus.emit(
+                RunFinished(
+                    run_id=run_id,
+                    agent_name=SUMMARIZER_AGENT,
+                    display_name=display_name,
+                    stats=stats,
+                )
+            )
+            return summary
+
+        except Exception as e:
+            event_bus.emit(
+                RunFailed(
+                    run_id=run_id,
+                    agent_name=SUMMARIZER_AGENT,
+                    display_name=display_name,
+                    error=str(e),
+                    error_type=type(e).__name__,
+                )
+            )
+            raise AgentRunError(SUMMARIZER_AGENT, display_name, e) from e
+
+    def _get_summarizer(self) -> Agent:
+        """Get the history summarizer agent, building it on first use."""
+        if self._summarizer is None:
+            self._summarizer = Agent(
+                get_default_model(), system_prompt=history_summary_prompt
+            )
+        return self._summarizer
+
+    @staticmethod
+    def _record_usage(stats: RunStats, usage: Usage) -> None:
+        """Copy provider-reported token usage and its cost onto the run statistics."""
+        stats.request_tokens = usage.request_tokens
+        stats.response_tokens = usage.response_tokens
+        stats.total_tokens = usage.total_tokens
+        # OpenAI-compatible providers report prompt cache hits as cached_tokens
+        cached = (usage.details or {}).get("cached_tokens")
+        if cached is not None and usage.request_tokens is not None:
+            stats.cached_prompt_tokens = cached
+            stats.uncached_prompt_tokens = usage.request_tokens - cached
+        stats.cost_usd = estimate_cost(
+            stats.model_name,
+            usage.request_tokens,
+            usage.response_tokens,
+            stats.cached_prompt_tokens,
+        ) + (stats.hedge_cost_usd or 0.0)
+
+    async def _stream_routed(
+        self,
+        agent: Agent,
+        route: RouteDecision,
+        user_input: str,
+        message_history: List[ModelMessage],
+        on_delta: Callable[[str], None],
+        stats: RunStats,
+    ) -> Tuple[str, Usage]:
+        """
+        Stream a run on the routed model, falling back while nothing has streamed.
+
+        Once a model has streamed text or a tool has changed state, its
+        failure is final: retrying on another model would repeat text the
+        user has already seen, or the tool's changes.
+
+        Args:
+            agent: The PydanticAI agent to run
+            route: Routing decision of the turn
+            user_input: The user's message
+            message_history: History to send with the run
+            on_delta: Callback receiving each new text delta
+            stats: Run statistics, updated with the model that served the run
+
+        Returns:
+            Tuple of (full response, usage reported by the provider)
+        """
+        # Tokens are charged once per run from the prompt estimate, and every
+        # provider request of the run takes a request slot
+        charged_tokens = stats.prompt.total_tokens if stats.prompt else 0
+        async with request_scheduler.run(
+            stats.user_id or ANONYMOUS_USER, charged_tokens
+        ) as scheduled:
+            deps = AgentDeps(thread_id=stats.thread_id, user_id=stats.user_id)
+            last_error: Optional[Exception] = None
+
+            def charge_cancelled(model_name: str, streamed: str) -> None:
+                # The provider bills the losing request's prompt and output
+                completion_tokens = (
+                    token_counter.count_text(streamed, model_name) if streamed else 0
+                )
+                stats.hedge_prompt_tokens = (
+                    stats.hedge_prompt_tokens or 0
+                ) + charged_tokens
+                stats.hedge_completion_tokens = (
+                    stats.hedge_completion_tokens or 0
+                ) + completion_tokens
+                stats.hedge_cost_usd = (stats.hedge_cost_usd or 0.0) + estimate_cost(
+                    model_name, charged_tokens, completion_tokens
+                )
+
+            for model_name in route.candidates:
+                started = time.perf_counter()
+                first_token_at: List[float] = []
+
+                def track(delta: str) -> None:
+                    if not first_token_at:
+                        first_token_at.append(time.perf_counter())
+                    on_delta(delta)
+
+                try:
+                    result, served_model, hedged = await self._stream_attempt(
+                        agent,
+                        route,
+                        model_name,
+                        user_input,
+                        message_history,
+                        track,
+                        deps,
+                        hedge=stats.agent_name not in self.unhedged_agents,
+                        on_cancelled=charge_cancelled,
+                    )
+                except CircuitOpenError as e:
+                    # Nothing was sent, so the router's statistics are left alone
+                    last_error = e
+                    logger.warning(f"Skipping {model_name}: {e}")
+                    continue
+                except Exception as e:
+                    ttft_ms = (
+                        (first_token_at[0] - started) * 1000 if first_token_at else None
+                    )
+                    self.model_router.record(
+                        route,
+                        model_name,
+                        ttft_ms,
+                        (time.perf_counter() - started) * 1000,
+                        ok=False,
+                    )
+                    if first_token_at or deps.changed_state:
+                        raise
+                    last_error = e
+                    logger.warning(f"Model {model_name} failed before streaming: {e}")
+                    continue
+
+                ttft_ms = (
+                    (first_token_at[0] - started) * 1000 if first_token_at else None
+                )
+                self.model_router.record(
+                    route,
+                    served_model,
+                    ttft_ms,
+                    (time.perf_counter() - started) * 1000,
+                    ok=True,
+                )
+                stats.model_name = served_model
+                stats.hedged = hedged
+                stats.queue_wait_ms = scheduled.wait_ms
+                usage_tokens = result[1].total_tokens
+                if usage_tokens is not None:
+                    usage_tokens += (stats.hedge_prompt_tokens or 0) + (
+                        stats.hedge_completion_tokens or 0
+                    )
+                scheduled.settle(usage_tokens)
+                return result
+
+            raise last_error
+
+    async def _stream_attempt(
+        self,
+        agent: Agent,
+        route: RouteDecision,
+        model_name: str,
+        user_input: str,
+        message_history: List[ModelMessage],
+        on_delta: Callable[[str], None],
+        deps: Optional[AgentDeps] = None,
+        hedge: bool = True,
+        on_cancelled: Optional[Callable[[str, str], None]] = None,
+    ) -> Tuple[Tuple[str, Usage], str, bool]:
+        """
+        Stream a run on one model, hedged when hedging is enabled.
+
+        The hedge goes to ``CONFIG.hedge_model``, else to the next routed
+        candidate, else to the same model over a separate request.
+
+        Args:
+            agent: The PydanticAI agent to run
+            route: Routing decision of the turn
+            model_name: Model of the primary request
+            user_input: The user's message
+            message_history: History to send with the run
+            on_delta: Callback receiving each new text delta
+            deps: Dependencies passed to the agent's tools
+            hedge: Whether the agent may be hedged
+            on_cancelled: Optional callback receiving the model and streamed
+                text of a hedge race request cancelled while in flight
+
+        Returns:
+            Tuple of (run result, model that served it, whether a hedge was sent)
+        """
+        if not (CONFIG.hedging_enabled and hedge):
+            result = await self._call_model(
+                agent, user_input, message_history, on_delta, model_name, deps
+            )
+            return result, model_name, False
+
+        candidates = route.candidates
+        position = candidates.index(model_name)
+        next_model = (
+            candidates[position + 1] if position + 1 < len(candidates) else model_name
+        )
+        return await self.hedger.run(
+            model_name,
+            CONFIG.hedge_model or next_model,
+            lambda name, callback: self._call_model(
+                agent, user_input, message_history, callback, name, deps
+            ),
+            on_delta,
+            on_cancelled,
+        )
+
+    async def _call_model(
+        self,
+        agent: Agent,
+        user_input: str,
+        message_history: List[ModelMessage],
+        on_delta: Callable[[str], None],
+        model_name: str,
+        deps: Optional[AgentDeps] = None,
+    ) -> Tuple[str, Usage]:
+        """
+        Stream a run on one model with timeouts, retries and circuit breaking.
+
+        Args:
+            agent: The PydanticAI agent to run
+            user_input: The user's message
+            message_history: History to send with the run
+            on_delta: Callback receiving each new text delta
+            model_name: Model to run on
+            deps: Dependencies passed to the agent's tools
+
+        Returns:
+            Tuple of (full response, usage reported by the provider)
+
+        Raises:
+            ProviderError: If the model failed, timed out or its circuit is open
+        """
+        return await self.resilience.call(
+            model_name,
+            lambda callback: self._stream_run(
+                agent, user_input, message_history, callback, model_name, deps
+            ),
+            on_delta,
+            committed=lambda: deps is not None and deps.changed_state,
+        )
+
+    async def _stream_run(
+        self,
+        agent: Agent,
+        user_input: str,
+        message_history: List[ModelMessage],
+        on_delta: Callable[[str], None],
+        model_name: Optional[str] = None,
+        deps: Optional[AgentDeps] = None,
+    ) -> Tuple[str, Usage]:
+        """
+        Stream a single agent run.
+
+        Args:
+            agent: The PydanticAI agent to run
+            user_input: The user's message
+            message_history: History to send with the run
+            on_delta: Callback receiving each new text delta
+            model_name: Model to run on instead of the agent's default
+            deps: Dependencies passed to the agent's tools
+
+        Returns:
+            Tuple of (full response, usage reported by the provider)
+        """
+        async with agent.run_stream(
+            user_input,
+            message_history=message_history,
+            model=get_shared_model(model_name) if model_name else None,
+            deps=deps,
+        ) as result:
+            chunks: List[str] = []
+            async for delta in result.stream_text(delta=True, debounce_by=None):
+                chunks.append(delta)
+                on_delta(delta)
+            return "".join(chunks), result.usage()
 
     def list_agents(self) -> list[str]:
         """Get list of all available agent names."""
-        return list(self.agents.keys())
+        return list(self.agent_names)
 
     def list_agent_display_names(self) -> list[str]:
         """Get list of all available agent display names."""
-        return [self.get_agent_profile_name(name) for name in self.agents.keys()]
+        return [self.get_agent_profile_name(name) for name in self.agent_names]
 
 
 # Global workflow instance
@@ -0,0 +1,17 @@
+"""Cache module for the universal agent application.
+
+This module provides the tiered response cache for deterministic
+agent runs and single-flight collapsing of identical concurrent runs.
+"""
+
+from .response_cache import ResponseCache, response_cache, make_cache_key
+from .single_flight import SingleFlight, FlightAbandoned, single_flight
+
+__all__ = [
+    "ResponseCache",
+    "response_cache",
+    "make_cache_key",
+    "SingleFlight",
+    "FlightAbandoned",
+    "single_flight",
+]
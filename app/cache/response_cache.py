@@ -0,0 +1,313 @@
+"""Exact-match response cache for deterministic agent runs.
+
+This module caches final agent responses keyed by a hash of everything
+that determines them: the model, the agent's system prompt, the
+normalized history and the user input. Lookups go through an in-process
+LRU tier first and a persistent SQLite tier second.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+
+from app.core import CONFIG
+from app.llm.tokens import message_text
+
+
+__all__ = ["ResponseCache", "response_cache", "make_cache_key"]
+
+
+logger = logging.getLogger(__name__)
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_cache_key(
+    model_name: str,
+    system_prompt: str,
+    history: List[ModelMessage],
+    user_input: str,
+) -> str:
+    """
+    Compute the cache key of an agent run.
+
+    Args:
+        model_name: Name of the model serving the run
+        system_prompt: The agent's system prompt
+        history: History sent with the run
+        user_input: The user's message
+
+    Returns:
+        Hex digest identifying the run's inputs
+    """
+    digest = hashlib.sha256()
+    for value in (model_name, system_prompt):
+        digest.update(value.encode())
+        digest.update(b"\x00")
+    for message in history:
+        digest.update(b"R" if isinstance(message, ModelResponse) else b"Q")
+        digest.update(_normalize(message_text(message)).encode())
+        digest.update(b"\x00")
+    digest.update(b"U")
+    digest.update(_normalize(user_input).encode())
+    return digest.hexdigest()
+
+
+class _MemoryTier:
+    """In-process LRU tier with TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, response = entry
+        if time.time() - created_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: str, created_at: Optional[float] = None) -> None:
+        self._entries[key] = (created_at or time.time(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _SQLiteTier:
+    """Persistent tier backed by a SQLite file, accessed off the event loop."""
+
+    def __init__(self, path: str, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return created_at, response
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode())
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, response, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        cursor = self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+        )
+        self.evictions += cursor.rowcount
+
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        # Remove least recently used entries until the tier fits again
+        excess = total - self.max_bytes
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if excess <= 0:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            excess -= size
+            self.evictions += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of final agent responses.
+
+    Disk hits are promoted to the memory tier. Hit, miss and eviction
+    counts are available through ``stats``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        memory_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Initialize the ResponseCache.
+
+        Args:
+            path: SQLite file of the persistent tier. Defaults to configuration
+            ttl_seconds: Entry lifetime. Defaults to configuration
+            memory_entries: Capacity of the memory tier. Defaults to configuration
+            max_bytes: Size limit of the persistent tier. Defaults to configuration
+        """
+        ttl = ttl_seconds or CONFIG.response_cache_ttl_seconds
+        self._memory = _MemoryTier(
+            memory_entries or CONFIG.response_cache_memory_entries, ttl
+        )
+        self._path = path if path is not None else CONFIG.response_cache_path
+        self._ttl = ttl
+        self._max_bytes = max_bytes or CONFIG.response_cache_max_bytes
+        self._disk: Optional[_SQLiteTier] = None
+        self._disk_failed = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _get_disk(self) -> Optional[_SQLiteTier]:
+        """Open the persistent tier on first use."""
+        if self._disk is None and self._path and not self._disk_failed:
+            try:
+                self._disk = _SQLiteTier(self._path, self._ttl, self._max_bytes)
+            except sqlite3.Error as e:
+                self._disk_failed = True
+                logger.warning(f"Persistent response cache disabled: {e}")
+        return self._disk
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        response = self._memory.get(key)
+        if response is not None:
+            self.memory_hits += 1
+            return response
+
+        disk = self._get_disk()
+        if disk is not None:
+            try:
+                entry = await asyncio.to_thread(disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                created_at, response = entry
+                self._memory.put(key, response, created_at)
+                self.disk_hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: str) -> None:
+        """
+        Store a response in both tiers.
+
+        Args:
+            key: Cache key from make_cache_key
+            response: The final agent response
+        """
+        self._memory.put(key, response)
+        self.stores += 1
+
+        disk = self._get_disk()
+        if disk is not None:
+            try:
+                await asyncio.to_thread(disk.put, key, response)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Get hit, miss and eviction counts of the cache."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (
+                (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            ),
+            "memory_entries": len(self._memory),
+            "memory_evictions": self._memory.evictions,
+            "disk_evictions": self._disk.evictions if self._disk else 0,
+        }
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,141 @@
+"""Single-flight collapsing of identical concurrent agent runs.
+
+This module makes concurrent requests with the same key share a single
+provider call. The first caller runs the producer; later callers replay
+the deltas streamed so far and then receive the remaining deltas live,
+so every waiting session sees the same stream. If the caller running the
+producer is cancelled before anything streamed, a waiting caller takes
+over and runs its own producer instead.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+__all__ = ["SingleFlight", "FlightAbandoned", "single_flight"]
+
+
+logger = logging.getLogger(__name__)
+
+
+DeltaCallback = Callable[[str], None]
+
+
+class FlightAbandoned(Exception):
+    """Raised to callers joined to a call whose producer was cancelled midway."""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__("The shared call was cancelled after it started streaming")
+
+
+class _Flight:
+    """State of one in-flight producer call."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.listeners: List[DeltaCallback] = []
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.followers = 0
+
+    def fan_out(self, delta: str) -> None:
+        self.chunks.append(delta)
+        for listener in self.listeners:
+            listener(delta)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    Keys identify equivalent calls; a key is only shared while its
+    producer is running.
+    """
+
+    def __init__(self):
+        """Initialize the SingleFlight group."""
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.collapsed = 0
+        self.promoted = 0
+
+    def in_flight(self) -> int:
+        """Get the number of producer calls currently running."""
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        """Get leader, collapsed and in-flight call counts."""
+        return {
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "promoted": self.promoted,
+            "in_flight": self.in_flight(),
+        }
+
+    async def run(
+        self,
+        key: str,
+        producer: Callable[[DeltaCallback], Awaitable[Any]],
+        on_delta: DeltaCallback,
+    ) -> Tuple[Any, bool]:
+        """
+        Run the producer for a key, or join the call already running for it.
+
+        Args:
+            key: Identifier of equivalent calls
+            producer: Async callable receiving the delta callback to stream into
+            on_delta: This caller's delta callback
+
+        Returns:
+            Tuple of (producer result, whether this caller ran the producer)
+
+        Raises:
+            FlightAbandoned: If the joined call was cancelled after this
+                caller had received part of its stream
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.collapsed += 1
+            flight.followers += 1
+            for chunk in flight.chunks:
+                on_delta(chunk)
+            flight.listeners.append(on_delta)
+            try:
+                return await asyncio.shield(flight.future), False
+            except FlightAbandoned:
+                # Rerunning would repeat the text this caller already received
+                if flight.chunks:
+                    raise
+            finally:
+                flight.listeners.remove(on_delta)
+                flight.followers -= 1
+            # The producer was cancelled before streaming: take over the call
+            self.promoted += 1
+            return await self.run(key, producer, on_delta)
+
+        flight = _Flight()
+        flight.listeners.append(on_delta)
+        self._flights[key] = flight
+        self.leaders += 1
+        try:
+            result = await producer(flight.fan_out)
+        except Exception as e:
+            # Only propagate to followers; an unobserved future would log a warning
+            if flight.followers:
+                flight.future.set_exception(e)
+            raise
+        except BaseException:
+            # Followers are not cancelled with the leader; they take over or fail
+            if flight.followers:
+                flight.future.set_exception(FlightAbandoned(key))
+            raise
+        finally:
+            del self._flights[key]
+
+        flight.future.set_result(result)
+        return result, True
+
+
+# Global single-flight group for agent runs
+single_flight = SingleFlight()
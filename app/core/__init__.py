@@ -5,15 +5,43 @@ configuration, base classes, types, and factory patterns.
 """
 
 from .config import CONFIG
-from .types import AgentProfile, AgentType, AgentResponse
+from .types import (
+    AgentDeps,
+    AgentProfile,
+    AgentType,
+    AgentResponse,
+    FanOutResult,
+    PromptSize,
+    RunStats,
+)
+from .exceptions import (
+    AgentError,
+    ContextBudgetExceeded,
+    ProviderError,
+    ProviderTimeout,
+    CircuitOpenError,
+    AgentRunError,
+    QuotaExceeded,
+)
 from .base import BaseAgent, BaseAgentConfig, AgentRegistry
 from .factory import AgentFactory
 
 __all__ = [
     "CONFIG",
+    "AgentDeps",
     "AgentProfile",
     "AgentType",
     "AgentResponse",
+    "FanOutResult",
+    "PromptSize",
+    "RunStats",
+    "AgentError",
+    "ContextBudgetExceeded",
+    "ProviderError",
+    "ProviderTimeout",
+    "CircuitOpenError",
+    "AgentRunError",
+    "QuotaExceeded",
     "BaseAgent",
     "BaseAgentConfig",
     "AgentRegistry",
@@ -6,7 +6,7 @@ the application, including base agent classes and common interfaces.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from pydantic_ai import Agent
 from pydantic import BaseModel
 
@@ -89,11 +89,15 @@ class AgentRegistry:
     Registry for managing agent instances and their configurations.
 
     This class provides a centralized way to register, retrieve,
-    and manage different agent types in the application.
+    and manage different agent types in the application. Agents and
+    profiles can be registered as factories, in which case they are
+    constructed on first retrieval and cached.
     """
 
     _agents: Dict[str, BaseAgent] = {}
     _profiles: Dict[str, AgentProfile] = {}
+    _agent_factories: Dict[str, Callable[[], Any]] = {}
+    _profile_factories: Dict[str, Callable[[], AgentProfile]] = {}
 
     @classmethod
     def register_agent(cls, name: str, agent: BaseAgent) -> None:
@@ -106,6 +110,20 @@ class AgentRegistry:
         """
         cls._agents[name] = agent
 
+    @classmethod
+    def register_agent_factory(cls, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Register a factory that builds an agent on first retrieval.
+
+        Any instance already built for the name is discarded.
+
+        Args:
+            name: Unique identifier for the agent
+            factory: Callable returning the agent instance
+        """
+        cls._agent_factories[name] = factory
+        cls._agents.pop(name, None)
+
     @classmethod
     def register_profile(cls, name: str, profile: AgentProfile) -> None:
         """
@@ -117,10 +135,26 @@ class AgentRegistry:
         """
         cls._profiles[name] = profile
 
+    @classmethod
+    def register_profile_factory(
+        cls, name: str, factory: Callable[[], AgentProfile]
+    ) -> None:
+        """
+        Register a factory that loads a profile on first retrieval.
+
+        Any profile already loaded for the name is discarded.
+
+        Args:
+            name: Unique identifier for the profile
+            factory: Callable returning the agent profile
+        """
+        cls._profile_factories[name] = factory
+        cls._profiles.pop(name, None)
+
     @classmethod
     def get_agent(cls, name: str) -> Optional[BaseAgent]:
         """
-        Retrieve a registered agent.
+        Retrieve a registered agent, building it on first use.
 
         Args:
             name: The agent identifier
@@ -128,12 +162,15 @@ class AgentRegistry:
         Returns:
             The agent instance if found, None otherwise
         """
-        return cls._agents.get(name)
+        agent = cls._agents.get(name)
+        if agent is None and name in cls._agent_factories:
+            agent = cls._agents[name] = cls._agent_factories[name]()
+        return agent
 
     @classmethod
     def get_profile(cls, name: str) -> Optional[AgentProfile]:
         """
-        Retrieve a registered profile.
+        Retrieve a registered profile, loading it on first use.
 
         Args:
             name: The profile identifier
@@ -141,14 +178,30 @@ class AgentRegistry:
         Returns:
             The agent profile if found, None otherwise
         """
-        return cls._profiles.get(name)
+        profile = cls._profiles.get(name)
+        if profile is None and name in cls._profile_factories:
+            profile = cls._profiles[name] = cls._profile_factories[name]()
+        return profile
+
+    @classmethod
+    def is_built(cls, name: str) -> bool:
+        """
+        Check whether an agent instance has been constructed.
+
+        Args:
+            name: The agent identifier
+
+        Returns:
+            True if the agent has been built or registered as an instance
+        """
+        return name in cls._agents
 
     @classmethod
     def list_agents(cls) -> list[str]:
-        """Get a list of all registered agent names."""
-        return list(cls._agents.keys())
+        """Get a list of all registered agent names, built or not."""
+        return list(dict.fromkeys([*cls._agent_factories, *cls._agents]))
 
     @classmethod
     def list_profiles(cls) -> list[str]:
-        """Get a list of all registered profile names."""
-        return list(cls._profiles.keys())
+        """Get a list of all registered profile names, loaded or not."""
+        return list(dict.fromkeys([*cls._profile_factories, *cls._profiles]))
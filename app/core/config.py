@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from typing import List, Literal, Optional
 
 
 __all__ = ["CONFIG"]
@@ -38,6 +39,331 @@ class Config(BaseSettings):
         default="https://api.openrouter.ai/v1",
         description="The base URL for the OpenRouter API.",
     )
+    stream_flush_interval_ms: int = Field(
+        default=50,
+        description="Maximum time streamed tokens are buffered before being pushed to the UI.",
+    )
+    stream_flush_chars: int = Field(
+        default=64,
+        description="Number of buffered characters that triggers an immediate UI flush.",
+    )
+    console_stream_events: bool = Field(
+        default=False,
+        description="Echo agent stream events to stdout. Intended for local development only.",
+    )
+    event_sink_queue_size: int = Field(
+        default=1000,
+        description="Maximum number of pending events per event sink before events are dropped.",
+    )
+    history_max_tokens: int = Field(
+        default=6000,
+        description="Default token budget for verbatim conversation history sent to an agent.",
+    )
+    history_keep_turns: int = Field(
+        default=6,
+        description="Default number of most recent turns always kept verbatim in the history.",
+    )
+    context_window_tokens: Optional[int] = Field(
+        default=None,
+        description="Context window of the model in tokens. Inferred from the model name when unset.",
+    )
+    reserved_output_tokens: int = Field(
+        default=4096,
+        description="Tokens of the context window reserved for the model's response.",
+    )
+    token_count_cache_size: int = Field(
+        default=10000,
+        description="Maximum number of cached per-message token counts.",
+    )
+    database_url: Optional[str] = Field(
+        default=None,
+        description="PostgreSQL URL of the Chainlit data layer database.",
+        alias="DATABASE_URL",
+    )
+    database_pool_min_size: int = Field(
+        default=1,
+        description="Minimum number of connections kept in the database pool.",
+    )
+    database_pool_max_size: int = Field(
+        default=10,
+        description="Maximum number of connections in the database pool.",
+    )
+    database_statement_cache_size: int = Field(
+        default=100,
+        description="Prepared statements cached per connection (0 behind pgbouncer).",
+    )
+    database_command_timeout_seconds: float = Field(
+        default=30.0,
+        description="Timeout of a single database query.",
+    )
+    data_layer: Literal["chainlit", "postgres"] = Field(
+        default="chainlit",
+        description="Data layer: Chainlit's own, or the first-party asyncpg one.",
+    )
+    thread_list_cache_ttl_seconds: float = Field(
+        default=5.0,
+        description="Lifetime of a user's cached first page of threads. 0 disables the cache.",
+    )
+    thread_list_cache_max_entries: int = Field(
+        default=1000,
+        description="Maximum number of users whose first page of threads is cached.",
+    )
+    resume_max_messages: int = Field(
+        default=100,
+        description="Maximum number of messages restored into the history of a resumed thread.",
+    )
+    write_behind_enabled: bool = Field(
+        default=True,
+        description="Buffer step and feedback writes and persist them in batches.",
+    )
+    write_behind_flush_interval_ms: int = Field(
+        default=250,
+        description="Longest time a buffered step or feedback write waits.",
+    )
+    write_behind_batch_size: int = Field(
+        default=200,
+        description="Number of buffered records written per batch.",
+    )
+    write_behind_max_pending: int = Field(
+        default=5000,
+        description="Buffered records above which writers wait for a flush.",
+    )
+    write_behind_max_retries: int = Field(
+        default=3,
+        description="Failed flushes after which a batch is spilled to disk.",
+    )
+    write_behind_spill_path: str = Field(
+        default=".data/write_behind.jsonl",
+        description="File that unwritable records are spilled to and replayed from.",
+    )
+    response_cache_enabled: bool = Field(
+        default=True,
+        description="Serve repeated deterministic agent runs from the response cache.",
+    )
+    response_cache_ttl_seconds: int = Field(
+        default=86400,
+        description="Time after which cached responses expire.",
+    )
+    response_cache_memory_entries: int = Field(
+        default=512,
+        description="Maximum number of responses kept in the in-process cache tier.",
+    )
+    response_cache_path: Optional[str] = Field(
+        default=".data/response_cache.sqlite3",
+        description="SQLite file of the persistent cache tier. Disabled when empty.",
+    )
+    response_cache_max_bytes: int = Field(
+        default=100 * 1024 * 1024,
+        description="Maximum total size of responses in the persistent cache tier.",
+    )
+    response_cache_uncached_agents: List[str] = Field(
+        default=["manager"],
+        description="Agents whose answers are never cached, as a JSON list, e.g. agents whose tools change state.",
+    )
+    plan_store_path: Optional[str] = Field(
+        default=".data/plans.sqlite3",
+        description="SQLite file the Manager Agent's plans are persisted to. In-memory only when empty.",
+    )
+    prompt_cache_enabled: bool = Field(
+        default=True,
+        description="Mark the static request prefix for provider prompt caching.",
+    )
+    prompt_cache_model_prefixes: List[str] = Field(
+        default=["anthropic/", "google/gemini-2.5-pro"],
+        description="Models that only cache prompts marked with cache_control breakpoints.",
+    )
+    intent_routing_enabled: bool = Field(
+        default=True,
+        description="Route messages without an @ mention to a specialist with the local intent classifier.",
+    )
+    intent_routing_threshold: float = Field(
+        default=0.15,
+        description="Minimum similarity for the intent classifier to route away from the manager.",
+    )
+    intent_routing_margin: float = Field(
+        default=0.05,
+        description="Minimum lead of the best agent over the runner-up for intent routing.",
+    )
+    intent_examples_path: Optional[str] = Field(
+        default=".data/intent_examples.jsonl",
+        description="JSONL file of labeled {text, agent} examples the intent classifier trains on.",
+    )
+    agent_catalog_watch: bool = Field(
+        default=False,
+        description="Reload agent profiles and the agent catalog when their files change (development).",
+    )
+    starter_prewarm_enabled: bool = Field(
+        default=True,
+        description="Precompute answers to the starter prompts at startup.",
+    )
+    starter_refresh_interval_seconds: int = Field(
+        default=3600,
+        description="Time before their cache expiry at which starter answers are regenerated.",
+    )
+    http_max_connections: int = Field(
+        default=200,
+        description="Maximum concurrent connections to the model provider.",
+    )
+    http_max_keepalive_connections: int = Field(
+        default=50,
+        description="Maximum idle connections kept alive for reuse.",
+    )
+    http_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        description="Time after which idle keep-alive connections are closed.",
+    )
+    http2_enabled: bool = Field(
+        default=False,
+        description="Multiplex provider requests over HTTP/2. Requires the h2 package.",
+    )
+    http_connect_timeout_seconds: float = Field(
+        default=10.0,
+        description="Timeout for establishing a provider connection.",
+    )
+    http_read_timeout_seconds: float = Field(
+        default=120.0,
+        description="Maximum gap between received chunks of a provider response.",
+    )
+    http_write_timeout_seconds: float = Field(
+        default=30.0,
+        description="Timeout for sending a provider request.",
+    )
+    http_pool_timeout_seconds: float = Field(
+        default=30.0,
+        description="Maximum wait for a free connection when the pool is exhausted.",
+    )
+    router_enabled: bool = Field(
+        default=False,
+        description="Route each turn to a model from router_models instead of model_name.",
+    )
+    router_models: List[str] = Field(
+        default_factory=list,
+        description="Models the router may choose from, as a JSON list. model_name is always the last fallback.",
+    )
+    router_heavy_input_tokens: int = Field(
+        default=400,
+        description="User input size from which a turn needs the agent's heavy-turn model.",
+    )
+    router_heavy_history_tokens: int = Field(
+        default=4000,
+        description="History size from which a turn needs the agent's heavy-turn model.",
+    )
+    router_latency_cost_per_second: float = Field(
+        default=0.002,
+        description="Cost in USD the router is willing to pay per second of time to first token saved.",
+    )
+    router_stats_alpha: float = Field(
+        default=0.2,
+        description="Smoothing factor of the router's rolling latency and error statistics.",
+    )
+    router_max_error_rate: float = Field(
+        default=0.5,
+        description="Rolling error rate above which a model is only used as a fallback.",
+    )
+    router_error_half_life_seconds: float = Field(
+        default=60.0,
+        description="Time in which a model's rolling error rate halves, so failed models are tried again.",
+    )
+    hedging_enabled: bool = Field(
+        default=False,
+        description="Send a duplicate request when the first token is slow to arrive.",
+    )
+    hedge_model: Optional[str] = Field(
+        default=None,
+        description="Model of hedge requests. Defaults to the next routed fallback, or the same model.",
+    )
+    hedge_delay_ms: Optional[int] = Field(
+        default=None,
+        description="Fixed wait for a first token before hedging. Learned from recent latency when unset.",
+    )
+    hedge_percentile: float = Field(
+        default=0.95,
+        description="Time-to-first-token percentile used as the learned hedge delay.",
+    )
+    hedge_initial_delay_ms: int = Field(
+        default=2000,
+        description="Hedge delay used until enough latency samples have been observed.",
+    )
+    hedge_min_delay_ms: int = Field(
+        default=300,
+        description="Lower bound of the learned hedge delay.",
+    )
+    hedge_max_rate: float = Field(
+        default=0.1,
+        description="Maximum fraction of recent requests that may be hedged.",
+    )
+    hedge_window: int = Field(
+        default=200,
+        description="Number of recent requests used for the learned delay and the hedge rate.",
+    )
+    first_token_timeout_seconds: float = Field(
+        default=30.0,
+        description="Maximum wait for the first token of a provider request.",
+    )
+    run_timeout_seconds: float = Field(
+        default=300.0,
+        description="Maximum total duration of a provider request.",
+    )
+    retry_max_attempts: int = Field(
+        default=3,
+        description="Attempts per model for retryable failures before any token streamed.",
+    )
+    retry_base_delay_ms: int = Field(
+        default=250,
+        description="Base delay of the jittered exponential retry backoff.",
+    )
+    retry_max_delay_ms: int = Field(
+        default=4000,
+        description="Maximum delay between retries.",
+    )
+    circuit_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive retryable failures that open a model's circuit.",
+    )
+    circuit_reset_seconds: float = Field(
+        default=30.0,
+        description="Time an open circuit fails fast before allowing a trial request.",
+    )
+    requests_per_minute: Optional[int] = Field(
+        default=None,
+        description="Provider request rate limit shared by the process. Unlimited when unset.",
+    )
+    tokens_per_minute: Optional[int] = Field(
+        default=None,
+        description="Provider token rate limit shared by the process. Unlimited when unset.",
+    )
+    rate_limit_burst_seconds: float = Field(
+        default=10.0,
+        description="Seconds of rate the request and token buckets can accumulate for bursts.",
+    )
+    fan_out_synthesis_enabled: bool = Field(
+        default=False,
+        description="Have the manager synthesize the answers when a message mentions several agents.",
+    )
+    user_cost_quota_usd: Optional[float] = Field(
+        default=None,
+        description="Estimated provider cost a user may incur per quota window (unlimited if unset).",
+    )
+    user_token_quota: Optional[int] = Field(
+        default=None,
+        description="Provider tokens a user may use per quota window (unlimited if unset).",
+    )
+    usage_quota_window_seconds: float = Field(
+        default=86400,
+        description="Length of the per-user usage quota window in seconds.",
+    )
+    usage_ledger_max_entries: int = Field(
+        default=10000,
+        description="Number of users and of threads whose usage totals are kept in memory.",
+    )
+    metrics_enabled: bool = Field(
+        default=True,
+        description="Record Prometheus metrics and serve them on the Chainlit app.",
+    )
+    metrics_path: str = Field(
+        default="/metrics",
+        description="Path of the Prometheus scrape endpoint.",
+    )
 
 
 CONFIG = Config()
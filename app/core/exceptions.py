@@ -0,0 +1,136 @@
+"""Exception types for the universal agent application.
+
+This module contains the errors raised by agent runs so that callers
+can handle failures without inspecting error strings.
+"""
+
+__all__ = [
+    "AgentError",
+    "ContextBudgetExceeded",
+    "ProviderError",
+    "ProviderTimeout",
+    "CircuitOpenError",
+    "AgentRunError",
+    "QuotaExceeded",
+]
+
+
+class AgentError(Exception):
+    """Base class for all errors raised by agent runs."""
+
+
+class ContextBudgetExceeded(AgentError):
+    """The prompt cannot fit in the model's context window."""
+
+    def __init__(self, prompt_tokens: int, limit: int):
+        """
+        Initialize the error.
+
+        Args:
+            prompt_tokens: Tokens required by the non-trimmable part of the prompt
+            limit: Tokens available for the prompt
+        """
+        self.prompt_tokens = prompt_tokens
+        self.limit = limit
+        super().__init__(
+            f"Prompt requires {prompt_tokens} tokens but only {limit} are available"
+        )
+
+
+class ProviderError(AgentError):
+    """A request to the model provider failed."""
+
+    def __init__(self, model_name: str, message: str, retryable: bool = False):
+        """
+        Initialize the error.
+
+        Args:
+            model_name: Model the request was sent to
+            message: Description of the failure
+            retryable: Whether retrying the request may succeed
+        """
+        self.model_name = model_name
+        self.retryable = retryable
+        super().__init__(f"{model_name}: {message}")
+
+
+class ProviderTimeout(ProviderError):
+    """A provider request exceeded one of its timeouts."""
+
+    def __init__(self, model_name: str, phase: str, timeout_seconds: float):
+        """
+        Initialize the error.
+
+        Args:
+            model_name: Model the request was sent to
+            phase: Timeout that expired, ``first_token`` or ``total``
+            timeout_seconds: Duration of the expired timeout
+        """
+        self.phase = phase
+        self.timeout_seconds = timeout_seconds
+        super().__init__(
+            model_name,
+            f"no {phase.replace('_', ' ')} within {timeout_seconds:g}s",
+            retryable=True,
+        )
+
+
+class CircuitOpenError(ProviderError):
+    """Requests to a model are failing fast while its provider is degraded."""
+
+    def __init__(self, model_name: str, retry_after: float):
+        """
+        Initialize the error.
+
+        Args:
+            model_name: Model whose circuit is open
+            retry_after: Seconds until a trial request is allowed
+        """
+        self.retry_after = retry_after
+        super().__init__(
+            model_name,
+            f"circuit open, retrying in {retry_after:.1f}s",
+            retryable=False,
+        )
+
+
+class AgentRunError(AgentError):
+    """An agent run failed; the original error is available as ``cause``."""
+
+    def __init__(self, agent_name: str, display_name: str, cause: Exception):
+        """
+        Initialize the error.
+
+        Args:
+            agent_name: Workflow name of the agent that failed
+            display_name: Human-readable agent name
+            cause: The error that ended the run
+        """
+        self.agent_name = agent_name
+        self.display_name = display_name
+        self.cause = cause
+        super().__init__(f"{display_name} failed: {cause}")
+
+
+class QuotaExceeded(AgentError):
+    """A user has used up their usage quota for the current window."""
+
+    def __init__(self, user_id: str, used: float, limit: float, unit: str):
+        """
+        Initialize the error.
+
+        Args:
+            user_id: User whose quota is exhausted
+            used: Usage in the current window
+            limit: Quota of the window
+            unit: ``usd`` or ``tokens``
+        """
+        self.user_id = user_id
+        self.used = used
+        self.limit = limit
+        self.unit = unit
+        if unit == "usd":
+            amount = f"${used:.2f} of ${limit:.2f}"
+        else:
+            amount = f"{used:.0f} of {limit:.0f} tokens"
+        super().__init__(f"Usage quota exceeded: {amount} used")
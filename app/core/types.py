@@ -10,9 +10,13 @@ from enum import Enum
 
 
 __all__ = [
+    "AgentDeps",
     "AgentProfile",
     "AgentType",
     "AgentResponse",
+    "FanOutResult",
+    "PromptSize",
+    "RunStats",
 ]
 
 
@@ -46,6 +50,23 @@ class AgentProfile(BaseModel):
     )
 
 
+class AgentDeps(BaseModel):
+    """Dependencies passed to every agent run.
+
+    Agent tools read these through ``RunContext.deps`` to scope the state
+    they touch to the conversation the run belongs to.
+    """
+
+    thread_id: Optional[str] = Field(
+        default=None, description="Chainlit thread the run belongs to"
+    )
+    user_id: Optional[str] = Field(default=None, description="User the run is made for")
+    changed_state: bool = Field(
+        default=False,
+        description="Set by tools that changed state, after which the run is never repeated",
+    )
+
+
 class AgentResponse(BaseModel):
     """Standardized response format from agents.
 
@@ -66,3 +87,132 @@ class AgentResponse(BaseModel):
     error_message: Optional[str] = Field(
         default=None, description="Error message if the execution failed"
     )
+
+
+class PromptSize(BaseModel):
+    """Token breakdown of the prompt sent for a single agent run.
+
+    This model records where prompt tokens go, as computed by the
+    context budget manager before the request is sent.
+    """
+
+    system_tokens: int = Field(default=0, description="Tokens in the system prompt")
+    history_tokens: int = Field(
+        default=0, description="Tokens in the conversation history sent"
+    )
+    input_tokens: int = Field(default=0, description="Tokens in the user input")
+    total_tokens: int = Field(default=0, description="Total prompt tokens")
+    context_limit: int = Field(
+        default=0, description="Context window of the model in tokens"
+    )
+    trimmed_messages: int = Field(
+        default=0, description="Number of history messages dropped to fit the window"
+    )
+
+
+class RunStats(BaseModel):
+    """Timing and usage statistics for a single agent run.
+
+    This model is filled in while a run streams and is attached to the
+    run_finished event so sinks can report latency and token usage.
+    """
+
+    run_id: str = Field(..., description="Unique identifier of the run")
+    agent_name: str = Field(..., description="Workflow name of the agent that ran")
+    model_name: str = Field(..., description="Name of the model used for the run")
+    ttft_ms: Optional[float] = Field(
+        default=None, description="Time to the first streamed token in milliseconds"
+    )
+    duration_ms: Optional[float] = Field(
+        default=None, description="Total run duration in milliseconds"
+    )
+    output_chars: int = Field(
+        default=0, description="Number of characters in the streamed response"
+    )
+    request_tokens: Optional[int] = Field(
+        default=None, description="Prompt tokens reported by the provider"
+    )
+    response_tokens: Optional[int] = Field(
+        default=None, description="Completion tokens reported by the provider"
+    )
+    total_tokens: Optional[int] = Field(
+        default=None, description="Total tokens reported by the provider"
+    )
+    cached_prompt_tokens: Optional[int] = Field(
+        default=None,
+        description="Prompt tokens the provider served from its prompt cache",
+    )
+    uncached_prompt_tokens: Optional[int] = Field(
+        default=None, description="Prompt tokens the provider processed in full"
+    )
+    cost_usd: Optional[float] = Field(
+        default=None,
+        description="Estimated provider cost of the run in USD, including cancelled hedge requests",
+    )
+    prompt: Optional[PromptSize] = Field(
+        default=None, description="Estimated prompt size computed before sending"
+    )
+    cache_hit: bool = Field(
+        default=False, description="Whether the response was served from the cache"
+    )
+    coalesced: bool = Field(
+        default=False,
+        description="Whether the run shared an identical run's in-flight provider call",
+    )
+    route_reason: Optional[str] = Field(
+        default=None, description="Why the router chose the model"
+    )
+    hedged: bool = Field(
+        default=False, description="Whether a hedge request was sent for the run"
+    )
+    hedge_prompt_tokens: Optional[int] = Field(
+        default=None,
+        description="Estimated prompt tokens of requests cancelled after losing a hedge race",
+    )
+    hedge_completion_tokens: Optional[int] = Field(
+        default=None,
+        description="Estimated completion tokens of requests cancelled after losing a hedge race",
+    )
+    hedge_cost_usd: Optional[float] = Field(
+        default=None,
+        description="Estimated cost of the cancelled requests in USD, included in cost_usd",
+    )
+    user_id: Optional[str] = Field(
+        default=None, description="User the run was made for"
+    )
+    thread_id: Optional[str] = Field(
+        default=None, description="Thread the run belongs to"
+    )
+    queue_wait_ms: Optional[float] = Field(
+        default=None, description="Time spent waiting for the rate limiter"
+    )
+
+
+class FanOutResult(BaseModel):
+    """Answers of several agents asked the same question concurrently.
+
+    This model collects the answer of every agent that completed, the
+    error of every agent that failed and, when enabled, the manager's
+    synthesis of the answers.
+    """
+
+    replies: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Answers keyed by workflow agent name, in order of mention",
+    )
+    errors: Dict[str, str] = Field(
+        default_factory=dict, description="Errors of failed runs keyed by agent name"
+    )
+    synthesis: Optional[str] = Field(
+        default=None, description="The manager's synthesis of the answers"
+    )
+    synthesis_error: Optional[str] = Field(
+        default=None, description="Error of the synthesis run, if it failed"
+    )
+    stats: Dict[str, RunStats] = Field(
+        default_factory=dict,
+        description="Statistics of completed runs keyed by agent name",
+    )
+    synthesis_stats: Optional[RunStats] = Field(
+        default=None, description="Statistics of the synthesis run, if it completed"
+    )
@@ -0,0 +1,54 @@
+"""Data module for the universal agent application.
+
+This module provides direct database access to the Chainlit data layer
+schema, history rebuilding for resumed threads, a first-party Chainlit
+data layer with keyset thread listing, and the buffering of step and
+feedback writes.
+"""
+
+from .pool import get_pool, acquire, close_pool, is_database_configured, pool_stats
+from .history import ThreadHistoryLoader, thread_history_loader
+from .steps import upsert_steps, ensure_steps, upsert_feedback, to_timestamp
+from .thread_list import (
+    ThreadCursor,
+    encode_cursor,
+    decode_cursor,
+    list_threads_query,
+    ThreadListCache,
+    thread_list_cache,
+)
+from .write_behind import WriteBehindBuffer, write_behind_buffer
+from .postgres_layer import PostgresDataLayer
+from .layer import (
+    WriteBehindDataLayer,
+    create_data_layer,
+    create_storage_client,
+    close_data_layer,
+)
+
+__all__ = [
+    "get_pool",
+    "acquire",
+    "close_pool",
+    "is_database_configured",
+    "pool_stats",
+    "ThreadHistoryLoader",
+    "thread_history_loader",
+    "upsert_steps",
+    "ensure_steps",
+    "upsert_feedback",
+    "to_timestamp",
+    "ThreadCursor",
+    "encode_cursor",
+    "decode_cursor",
+    "list_threads_query",
+    "ThreadListCache",
+    "thread_list_cache",
+    "WriteBehindBuffer",
+    "write_behind_buffer",
+    "PostgresDataLayer",
+    "WriteBehindDataLayer",
+    "create_data_layer",
+    "create_storage_client",
+    "close_data_layer",
+]
@@ -0,0 +1,106 @@
+"""Conversation history of resumed threads.
+
+This module rebuilds the PydanticAI history of a resumed thread from the
+steps Chainlit has already loaded to display it. Root message steps are
+walked newest first and kept only while the history token budget allows,
+so resuming costs no database round-trip beyond Chainlit's own and the
+history sent to agents stays bounded however long the thread is.
+"""
+
+import logging
+from typing import Iterable, List, Optional
+
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart
+
+from app.core import CONFIG
+from app.llm import token_counter
+
+
+__all__ = ["ThreadHistoryLoader", "thread_history_loader", "step_to_message"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# Root step types that make up the conversation
+MESSAGE_STEP_TYPES = ("user_message", "assistant_message")
+
+
+def step_to_message(step_type: str, output: Optional[str]) -> ModelMessage:
+    """
+    Convert a persisted root step to a PydanticAI message.
+
+    Args:
+        step_type: The Chainlit step type
+        output: The step output
+
+    Returns:
+        A user request for user messages, a model response otherwise
+    """
+    if step_type == "user_message":
+        return ModelRequest.user_text_prompt(output or "")
+    return ModelResponse(parts=[TextPart(content=output or "")])
+
+
+class ThreadHistoryLoader:
+    """
+    Builds the recent history of a thread within a token budget.
+
+    Root message steps are taken newest first until the budget is spent,
+    the thread is exhausted or the message limit is reached. The history
+    always starts on a user turn.
+    """
+
+    def __init__(self, max_messages: Optional[int] = None):
+        """
+        Initialize the ThreadHistoryLoader.
+
+        Args:
+            max_messages: Maximum messages kept per resume. Defaults to configuration
+        """
+        self.max_messages = max_messages or CONFIG.resume_max_messages
+
+    def history_from_steps(
+        self, steps: Iterable[dict], token_budget: Optional[int] = None
+    ) -> List[ModelMessage]:
+        """
+        Build history from the loaded steps of a thread.
+
+        Args:
+            steps: Steps of the thread, ordered from oldest to newest
+            token_budget: Maximum history tokens to keep. Defaults to configuration
+
+        Returns:
+            PydanticAI messages ordered from oldest to newest
+        """
+        budget = token_budget or CONFIG.history_max_tokens
+        steps = steps if isinstance(steps, list) else list(steps)
+        history: List[ModelMessage] = []
+        used_tokens = 0
+
+        for step in reversed(steps):
+            if (
+                step.get("parentId") is not None
+                or step.get("type") not in MESSAGE_STEP_TYPES
+                or step.get("isError")
+            ):
+                continue
+            message = step_to_message(step["type"], step.get("output"))
+            history.append(message)
+            used_tokens += token_counter.count_message(message)
+            if used_tokens >= budget or len(history) >= self.max_messages:
+                break
+
+        history.reverse()
+        # A reply cut off from its question would open the conversation
+        while history and isinstance(history[0], ModelResponse):
+            history.pop(0)
+
+        logger.info(
+            f"Resumed {len(history)} of {len(steps)} steps ({used_tokens} tokens)"
+        )
+        return history
+
+
+# Global thread history loader instance
+thread_history_loader = ThreadHistoryLoader()
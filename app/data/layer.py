@@ -0,0 +1,221 @@
+"""Chainlit data layer of the application.
+
+This module builds the data layer Chainlit persists threads, steps,
+elements and feedback through. It is Chainlit's own data layer or the
+first-party Postgres one, both on the Prisma schema, wrapped so that step
+and feedback writes go through the write-behind buffer instead of
+waiting on Postgres in the response path.
+"""
+
+import dataclasses
+import logging
+import os
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from chainlit.data.base import BaseDataLayer
+from chainlit.data.utils import queue_until_user_message
+
+from app.core import CONFIG
+from .pool import is_database_configured
+from .postgres_layer import PostgresDataLayer
+from .write_behind import WriteBehindBuffer, write_behind_buffer
+
+if TYPE_CHECKING:
+    from chainlit.data.storage_clients.base import BaseStorageClient
+    from chainlit.element import Element, ElementDict
+    from chainlit.step import StepDict
+    from chainlit.types import (
+        Feedback,
+        PaginatedResponse,
+        Pagination,
+        ThreadDict,
+        ThreadFilter,
+    )
+    from chainlit.user import PersistedUser, User
+
+
+__all__ = [
+    "WriteBehindDataLayer",
+    "create_data_layer",
+    "create_storage_client",
+    "close_data_layer",
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+_data_layer: Optional[BaseDataLayer] = None
+
+
+class WriteBehindDataLayer(BaseDataLayer):
+    """
+    Data layer that buffers step and feedback writes.
+
+    Step creations and updates, and feedback upserts, are merged in the
+    write-behind buffer and written in batches; every other call goes
+    straight to the wrapped data layer. Reading a thread first writes its
+    pending steps, so a resumed thread never misses its latest messages.
+    """
+
+    def __init__(
+        self, inner: BaseDataLayer, buffer: Optional[WriteBehindBuffer] = None
+    ):
+        """
+        Initialize the WriteBehindDataLayer.
+
+        Args:
+            inner: The data layer reads and other writes are delegated to
+            buffer: The buffer for step and feedback writes. Defaults to the global one
+        """
+        self.inner = inner
+        self.buffer = buffer or write_behind_buffer
+
+    async def get_user(self, identifier: str) -> Optional["PersistedUser"]:
+        return await self.inner.get_user(identifier)
+
+    async def create_user(self, user: "User") -> Optional["PersistedUser"]:
+        return await self.inner.create_user(user)
+
+    async def delete_feedback(self, feedback_id: str) -> bool:
+        self.buffer.discard_feedback(feedback_id)
+        return await self.inner.delete_feedback(feedback_id)
+
+    async def upsert_feedback(self, feedback: "Feedback") -> str:
+        record: Dict[str, Any] = dataclasses.asdict(feedback)
+        # Ids are assigned here, since the caller needs one before the write
+        record["id"] = feedback.id or str(uuid.uuid4())
+        await self.buffer.put_feedback(record)
+        return record["id"]
+
+    @queue_until_user_message()
+    async def create_element(self, element: "Element"):
+        return await self.inner.create_element(element)
+
+    async def get_element(
+        self, thread_id: str, element_id: str
+    ) -> Optional["ElementDict"]:
+        return await self.inner.get_element(thread_id, element_id)
+
+    @queue_until_user_message()
+    async def delete_element(self, element_id: str, thread_id: Optional[str] = None):
+        return await self.inner.delete_element(element_id, thread_id)
+
+    @queue_until_user_message()
+    async def create_step(self, step_dict: "StepDict"):
+        await self.buffer.put_step(dict(step_dict))
+
+    @queue_until_user_message()
+    async def update_step(self, step_dict: "StepDict"):
+        await self.buffer.put_step(dict(step_dict))
+
+    @queue_until_user_message()
+    async def delete_step(self, step_id: str):
+        self.buffer.discard_step(step_id)
+        return await self.inner.delete_step(step_id)
+
+    async def get_thread_author(self, thread_id: str) -> str:
+        return await self.inner.get_thread_author(thread_id)
+
+    async def delete_thread(self, thread_id: str):
+        self.buffer.discard_thread(thread_id)
+        return await self.inner.delete_thread(thread_id)
+
+    async def list_threads(
+        self, pagination: "Pagination", filters: "ThreadFilter"
+    ) -> "PaginatedResponse[ThreadDict]":
+        return await self.inner.list_threads(pagination, filters)
+
+    async def get_thread(self, thread_id: str) -> Optional["ThreadDict"]:
+        if self.buffer.has_thread(thread_id):
+            await self.buffer.flush()
+        return await self.inner.get_thread(thread_id)
+
+    async def update_thread(
+        self,
+        thread_id: str,
+        name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        tags: Optional[list] = None,
+    ):
+        return await self.inner.update_thread(
+            thread_id, name=name, user_id=user_id, metadata=metadata, tags=tags
+        )
+
+    async def build_debug_url(self) -> str:
+        return await self.inner.build_debug_url()
+
+    async def close(self) -> None:
+        """Write every buffered record, then close the wrapped data layer."""
+        await self.buffer.close()
+        await self.inner.close()
+
+
+def create_storage_client() -> Optional["BaseStorageClient"]:
+    """
+    Create the S3 storage client for elements, if a bucket is configured.
+
+    Uses the same environment variables as Chainlit's default data layer:
+    ``BUCKET_NAME``, ``APP_AWS_ACCESS_KEY``, ``APP_AWS_SECRET_KEY``,
+    ``APP_AWS_REGION`` and ``DEV_AWS_ENDPOINT`` (for LocalStack).
+
+    Returns:
+        The storage client, or None if ``BUCKET_NAME`` is not set
+    """
+    bucket = os.environ.get("BUCKET_NAME")
+    if not bucket:
+        return None
+
+    # Imported here so startup does not pay for boto3 without a bucket
+    from chainlit.data.storage_clients.s3 import S3StorageClient
+
+    options = {
+        "aws_access_key_id": os.environ.get("APP_AWS_ACCESS_KEY"),
+        "aws_secret_access_key": os.environ.get("APP_AWS_SECRET_KEY"),
+        "region_name": os.environ.get("APP_AWS_REGION"),
+        "endpoint_url": os.environ.get("DEV_AWS_ENDPOINT"),
+    }
+    return S3StorageClient(
+        bucket=bucket, **{key: value for key, value in options.items() if value}
+    )
+
+
+def create_data_layer() -> Optional[BaseDataLayer]:
+    """
+    Create the application's data layer.
+
+    Returns:
+        The data layer selected by ``DATA_LAYER``, behind the write-behind
+        buffer if enabled, or None if no database is configured
+    """
+    global _data_layer
+
+    if not is_database_configured():
+        return None
+
+    data_layer: BaseDataLayer
+    if CONFIG.data_layer == "postgres":
+        data_layer = PostgresDataLayer(storage_client=create_storage_client())
+    else:
+        from chainlit.data.chainlit_data_layer import ChainlitDataLayer
+
+        data_layer = ChainlitDataLayer(
+            database_url=CONFIG.database_url, storage_client=create_storage_client()
+        )
+    logger.info(f"Using the {CONFIG.data_layer} data layer")
+    if CONFIG.write_behind_enabled:
+        data_layer = WriteBehindDataLayer(data_layer)
+        logger.info("Step and feedback writes are buffered behind the response path")
+    _data_layer = data_layer
+    return data_layer
+
+
+async def close_data_layer() -> None:
+    """Flush buffered writes and close the data layer if it was created."""
+    global _data_layer
+
+    if _data_layer is not None:
+        await _data_layer.close()
+        _data_layer = None
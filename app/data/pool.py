@@ -0,0 +1,104 @@
+"""PostgreSQL connection pool.
+
+This module owns the application-wide asyncpg pool used for direct
+queries against the Chainlit data layer schema.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional
+
+from app.core import CONFIG
+from app.metrics import db_pool_wait_seconds
+
+if TYPE_CHECKING:
+    import asyncpg
+
+
+__all__ = ["get_pool", "acquire", "close_pool", "is_database_configured", "pool_stats"]
+
+
+logger = logging.getLogger(__name__)
+
+
+_pool: Optional["asyncpg.Pool"] = None
+_pool_lock = asyncio.Lock()
+
+
+def is_database_configured() -> bool:
+    """Check whether a database URL is configured."""
+    return bool(CONFIG.database_url)
+
+
+async def get_pool() -> "asyncpg.Pool":
+    """
+    Get the shared asyncpg pool, creating it on first use.
+
+    Returns:
+        The application-wide connection pool
+
+    Raises:
+        ValueError: If no database URL is configured
+    """
+    global _pool
+
+    if _pool is not None:
+        return _pool
+
+    if not is_database_configured():
+        raise ValueError("DATABASE_URL is required for database access")
+
+    async with _pool_lock:
+        if _pool is None:
+            # Imported here so startup does not pay for asyncpg without a database
+            import asyncpg
+
+            _pool = await asyncpg.create_pool(
+                CONFIG.database_url,
+                min_size=CONFIG.database_pool_min_size,
+                max_size=CONFIG.database_pool_max_size,
+                statement_cache_size=CONFIG.database_statement_cache_size,
+                command_timeout=CONFIG.database_command_timeout_seconds,
+            )
+            logger.info("Created database connection pool")
+    return _pool
+
+
+@asynccontextmanager
+async def acquire() -> AsyncIterator["asyncpg.Connection"]:
+    """
+    Acquire a connection from the shared pool.
+
+    The time spent waiting for a free connection is recorded, so pool
+    exhaustion shows up in the metrics before it shows up as latency.
+
+    Yields:
+        A pooled connection, released when the block exits
+    """
+    pool = await get_pool()
+    started = time.perf_counter()
+    async with pool.acquire() as connection:
+        db_pool_wait_seconds.observe(time.perf_counter() - started)
+        yield connection
+
+
+def pool_stats() -> Dict[str, int]:
+    """Get the current, idle and maximum number of pooled connections."""
+    if _pool is None:
+        return {}
+    return {
+        "size": _pool.get_size(),
+        "idle": _pool.get_idle_size(),
+        "max_size": _pool.get_max_size(),
+    }
+
+
+async def close_pool() -> None:
+    """Close the shared pool if it was created."""
+    global _pool
+
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,554 @@
+"""First-party Chainlit data layer on the shared asyncpg pool.
+
+This module implements Chainlit's data layer directly on the Prisma
+schema, through the application's connection pool. Each query has a fixed
+text, so asyncpg prepares it once per connection and every later call
+only binds parameters. Reading a thread takes one connection for all of
+its queries. Writing a step or updating a thread is a single round-trip
+or transaction. Pool waits and query durations are recorded as metrics.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from chainlit.data.base import BaseDataLayer
+from chainlit.data.utils import queue_until_user_message
+from chainlit.types import PageInfo, PaginatedResponse
+from chainlit.user import PersistedUser
+
+from app.metrics import db_query_seconds
+from .pool import acquire, close_pool
+from .steps import ensure_steps, upsert_feedback, upsert_steps
+from .thread_list import (
+    decode_cursor,
+    encode_cursor,
+    list_threads_query,
+    thread_list_cache,
+)
+
+if TYPE_CHECKING:
+    import asyncpg
+    from chainlit.data.storage_clients.base import BaseStorageClient
+    from chainlit.element import Element, ElementDict
+    from chainlit.step import StepDict
+    from chainlit.types import Feedback, Pagination, ThreadDict, ThreadFilter
+    from chainlit.user import User
+
+
+__all__ = ["PostgresDataLayer"]
+
+
+logger = logging.getLogger(__name__)
+
+
+GET_USER_QUERY = """
+SELECT "id", "identifier", "createdAt", "metadata"
+FROM "User"
+WHERE "identifier" = $1
+"""
+
+CREATE_USER_QUERY = """
+INSERT INTO "User" ("id", "identifier", "metadata")
+VALUES ($1, $2, $3::jsonb)
+ON CONFLICT ("identifier") DO UPDATE SET
+    "metadata" = EXCLUDED."metadata",
+    "updatedAt" = CURRENT_TIMESTAMP
+RETURNING "id", "identifier", "createdAt", "metadata"
+"""
+
+DELETE_FEEDBACK_QUERY = """
+DELETE FROM "Feedback" WHERE "id" = $1
+"""
+
+GET_THREAD_QUERY = """
+SELECT t.*, u."identifier" AS "userIdentifier"
+FROM "Thread" t
+LEFT JOIN "User" u ON t."userId" = u."id"
+WHERE t."id" = $1 AND t."deletedAt" IS NULL
+"""
+
+GET_THREAD_STEPS_QUERY = """
+SELECT s.*,
+    f."id" AS "feedbackId",
+    f."value" AS "feedbackValue",
+    f."comment" AS "feedbackComment"
+FROM "Step" s
+LEFT JOIN "Feedback" f ON s."id" = f."stepId"
+WHERE s."threadId" = $1
+ORDER BY s."startTime", s."id"
+"""
+
+GET_THREAD_ELEMENTS_QUERY = """
+SELECT * FROM "Element" WHERE "threadId" = $1
+"""
+
+GET_THREAD_AUTHOR_QUERY = """
+SELECT u."identifier"
+FROM "Thread" t
+JOIN "User" u ON t."userId" = u."id"
+WHERE t."id" = $1
+"""
+
+# Name, user and tags keep their values when not given; metadata keys set
+# to None are removed and the others merged into the stored metadata
+UPDATE_THREAD_QUERY = """
+INSERT INTO "Thread" ("id", "name", "userId", "tags", "metadata")
+VALUES ($1, $2, $3, COALESCE($4::text[], ARRAY[]::text[]), $5::jsonb)
+ON CONFLICT ("id") DO UPDATE SET
+    "name" = COALESCE(EXCLUDED."name", "Thread"."name"),
+    "userId" = COALESCE(EXCLUDED."userId", "Thread"."userId"),
+    "tags" = COALESCE($4::text[], "Thread"."tags"),
+    "metadata" = ("Thread"."metadata" || EXCLUDED."metadata") - $6::text[],
+    "updatedAt" = CURRENT_TIMESTAMP
+RETURNING "userId"
+"""
+
+GET_THREAD_OBJECT_KEYS_QUERY = """
+SELECT "objectKey" FROM "Element"
+WHERE "threadId" = $1 AND "objectKey" IS NOT NULL
+"""
+
+DELETE_THREAD_QUERY = """
+WITH deleted_feedback AS (
+    DELETE FROM "Feedback"
+    WHERE "stepId" IN (SELECT "id" FROM "Step" WHERE "threadId" = $1)
+),
+deleted_elements AS (
+    DELETE FROM "Element" WHERE "threadId" = $1
+),
+deleted_steps AS (
+    DELETE FROM "Step" WHERE "threadId" = $1
+)
+DELETE FROM "Thread" WHERE "id" = $1
+RETURNING "userId"
+"""
+
+DELETE_STEP_QUERY = """
+WITH deleted_feedback AS (
+    DELETE FROM "Feedback" WHERE "stepId" = $1
+),
+deleted_elements AS (
+    DELETE FROM "Element" WHERE "stepId" = $1
+)
+DELETE FROM "Step" WHERE "id" = $1
+"""
+
+GET_ELEMENT_QUERY = """
+SELECT * FROM "Element" WHERE "id" = $1 AND "threadId" = $2
+"""
+
+GET_ELEMENT_OBJECT_KEY_QUERY = """
+SELECT "objectKey" FROM "Element" WHERE "id" = $1
+"""
+
+DELETE_ELEMENT_QUERY = """
+DELETE FROM "Element" WHERE "id" = $1 AND ($2::text IS NULL OR "threadId" = $2)
+"""
+
+CREATE_ELEMENT_QUERY = """
+INSERT INTO "Element" (
+    "id", "threadId", "stepId", "metadata", "mime", "name", "objectKey",
+    "url", "chainlitKey", "display", "size", "language", "page", "props"
+)
+VALUES ($1, $2, $3, $4::jsonb, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14::jsonb)
+ON CONFLICT ("id") DO UPDATE SET "props" = EXCLUDED."props"
+"""
+
+
+def _json(value: Any) -> Any:
+    """Decode a JSONB column, which asyncpg returns as text."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value if value is not None else {}
+
+
+def _isoformat(value: Any) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _step_dict(row: "asyncpg.Record") -> "StepDict":
+    """Convert a step row, joined with its feedback, to a Chainlit step dict."""
+    feedback = None
+    if row["feedbackId"] is not None:
+        feedback = {
+            "forId": row["id"],
+            "id": row["feedbackId"],
+            "value": row["feedbackValue"],
+            "comment": row["feedbackComment"],
+        }
+    return {
+        "id": row["id"],
+        "threadId": row["threadId"] or "",
+        "parentId": row["parentId"],
+        "name": row["name"],
+        "type": row["type"],
+        "input": row["input"],
+        "output": row["output"],
+        "metadata": _json(row["metadata"]),
+        "createdAt": _isoformat(row["createdAt"]),
+        "start": _isoformat(row["startTime"]),
+        "end": _isoformat(row["endTime"]),
+        "showInput": row["showInput"],
+        "isError": row["isError"],
+        "feedback": feedback,
+    }
+
+
+def _element_dict(row: "asyncpg.Record", url: Optional[str]) -> "ElementDict":
+    """Convert an element row to a Chainlit element dict."""
+    metadata = _json(row["metadata"])
+    return {
+        "id": row["id"],
+        "threadId": row["threadId"],
+        "type": metadata.get("type", "file"),
+        "url": url,
+        "name": row["name"],
+        "mime": row["mime"],
+        "objectKey": row["objectKey"],
+        "forId": row["stepId"],
+        "chainlitKey": row["chainlitKey"],
+        "display": row["display"],
+        "size": row["size"],
+        "language": row["language"],
+        "page": row["page"],
+        "autoPlay": metadata.get("autoPlay"),
+        "playerConfig": metadata.get("playerConfig"),
+        "props": _json(row["props"]),
+    }
+
+
+def _persisted_user(row: "asyncpg.Record") -> PersistedUser:
+    return PersistedUser(
+        id=row["id"],
+        identifier=row["identifier"],
+        createdAt=row["createdAt"].isoformat(),
+        metadata=_json(row["metadata"]),
+    )
+
+
+class PostgresDataLayer(BaseDataLayer):
+    """
+    Chainlit data layer on the application's asyncpg pool.
+
+    A drop-in replacement for Chainlit's own data layer on the same
+    schema, selected with ``DATA_LAYER=postgres``.
+    """
+
+    def __init__(self, storage_client: Optional["BaseStorageClient"] = None):
+        """
+        Initialize the PostgresDataLayer.
+
+        Args:
+            storage_client: Storage for element files, if elements are persisted
+        """
+        self.storage_client = storage_client
+
+    async def _query(self, name: str, method: str, query: str, *args: Any) -> Any:
+        """Run a query on a pooled connection and record its duration."""
+        async with acquire() as connection:
+            started = time.perf_counter()
+            result = await getattr(connection, method)(query, *args)
+            db_query_seconds.observe(time.perf_counter() - started, name)
+        return result
+
+    async def get_user(self, identifier: str) -> Optional[PersistedUser]:
+        row = await self._query("get_user", "fetchrow", GET_USER_QUERY, identifier)
+        return _persisted_user(row) if row is not None else None
+
+    async def create_user(self, user: "User") -> Optional[PersistedUser]:
+        row = await self._query(
+            "create_user",
+            "fetchrow",
+            CREATE_USER_QUERY,
+            str(uuid.uuid4()),
+            user.identifier,
+            json.dumps(user.metadata or {}),
+        )
+        return _persisted_user(row)
+
+    async def delete_feedback(self, feedback_id: str) -> bool:
+        await self._query(
+            "delete_feedback", "execute", DELETE_FEEDBACK_QUERY, feedback_id
+        )
+        return True
+
+    async def upsert_feedback(self, feedback: "Feedback") -> str:
+        feedback_id = feedback.id or str(uuid.uuid4())
+        record = {
+            "id": feedback_id,
+            "forId": feedback.forId,
+            "value": feedback.value,
+            "comment": feedback.comment,
+        }
+        async with acquire() as connection:
+            started = time.perf_counter()
+            await upsert_feedback(connection, [record])
+            db_query_seconds.observe(time.perf_counter() - started, "upsert_feedback")
+        return feedback_id
+
+    @queue_until_user_message()
+    async def create_element(self, element: "Element"):
+        if self.storage_client is None:
+            logger.warning("No storage client configured, element not persisted")
+            return
+        if not element.for_id:
+            return
+
+        content = element.content
+        if element.path:
+            content = await asyncio.to_thread(Path(element.path).read_bytes)
+        elif content is None and not element.url:
+            raise ValueError("Element url, path or content must be provided")
+
+        object_key = None
+        if content is not None:
+            object_key = (
+                f"threads/{element.thread_id}/files/{element.id}"
+                if element.thread_id
+                else f"files/{element.id}"
+            )
+            await self.storage_client.upload_file(
+                object_key=object_key,
+                data=content,
+                mime=element.mime or "application/octet-stream",
+                overwrite=True,
+            )
+
+        page = getattr(element, "page", None)
+        metadata = {
+            "size": element.size,
+            "language": element.language,
+            "display": element.display,
+            "type": element.type,
+            "page": page,
+        }
+        async with acquire() as connection:
+            started = time.perf_counter()
+            async with connection.transaction():
+                # Elements can arrive before their step and thread are written
+                created_threads = await ensure_steps(
+                    connection, [(element.for_id, element.thread_id)]
+                )
+                await connection.execute(
+                    CREATE_ELEMENT_QUERY,
+                    element.id,
+                    element.thread_id,
+                    element.for_id,
+                    json.dumps(metadata),
+                    element.mime,
+                    element.name,
+                    object_key,
+                    element.url,
+                    element.chainlit_key,
+                    element.display,
+                    element.size,
+                    element.language,
+                    page,
+                    json.dumps(getattr(element, "props", None) or {}),
+                )
+            db_query_seconds.observe(time.perf_counter() - started, "create_element")
+        if created_threads:
+            thread_list_cache.invalidate_all()
+
+    async def get_element(
+        self, thread_id: str, element_id: str
+    ) -> Optional["ElementDict"]:
+        row = await self._query(
+            "get_element", "fetchrow", GET_ELEMENT_QUERY, element_id, thread_id
+        )
+        if row is None:
+            return None
+        return _element_dict(row, await self._element_url(row))
+
+    @queue_until_user_message()
+    async def delete_element(self, element_id: str, thread_id: Optional[str] = None):
+        object_key = await self._query(
+            "get_element", "fetchval", GET_ELEMENT_OBJECT_KEY_QUERY, element_id
+        )
+        if self.storage_client is not None and object_key:
+            await self.storage_client.delete_file(object_key=object_key)
+        await self._query(
+            "delete_element", "execute", DELETE_ELEMENT_QUERY, element_id, thread_id
+        )
+
+    async def _write_step(self, name: str, step_dict: "StepDict") -> None:
+        async with acquire() as connection:
+            started = time.perf_counter()
+            async with connection.transaction():
+                created_threads = await upsert_steps(connection, [dict(step_dict)])
+            db_query_seconds.observe(time.perf_counter() - started, name)
+        if created_threads:
+            thread_list_cache.invalidate_all()
+
+    @queue_until_user_message()
+    async def create_step(self, step_dict: "StepDict"):
+        await self._write_step("create_step", step_dict)
+
+    @queue_until_user_message()
+    async def update_step(self, step_dict: "StepDict"):
+        await self._write_step("update_step", step_dict)
+
+    @queue_until_user_message()
+    async def delete_step(self, step_id: str):
+        await self._query("delete_step", "execute", DELETE_STEP_QUERY, step_id)
+
+    async def get_thread_author(self, thread_id: str) -> str:
+        identifier = await self._query(
+            "get_thread_author", "fetchval", GET_THREAD_AUTHOR_QUERY, thread_id
+        )
+        if identifier is None:
+            raise ValueError(f"Author not found for thread_id {thread_id}")
+        return identifier
+
+    async def delete_thread(self, thread_id: str):
+        if self.storage_client is not None:
+            rows = await self._query(
+                "get_thread_elements",
+                "fetch",
+                GET_THREAD_OBJECT_KEYS_QUERY,
+                thread_id,
+            )
+            for row in rows:
+                await self.storage_client.delete_file(object_key=row["objectKey"])
+        user_id = await self._query(
+            "delete_thread", "fetchval", DELETE_THREAD_QUERY, thread_id
+        )
+        thread_list_cache.invalidate(user_id)
+
+    async def list_threads(
+        self, pagination: "Pagination", filters: "ThreadFilter"
+    ) -> "PaginatedResponse[ThreadDict]":
+        # The first page of a user's listing is served from the cache
+        cacheable = (
+            bool(filters.userId) and not filters.search and not pagination.cursor
+        )
+        if cacheable:
+            page = thread_list_cache.get(filters.userId, pagination.first)
+            if page is not None:
+                return page
+
+        args: List[Any] = []
+        if filters.userId:
+            args.append(filters.userId)
+        if filters.search:
+            args.append(f"%{filters.search}%")
+        after = None
+        if pagination.cursor:
+            position = decode_cursor(pagination.cursor)
+            if position is not None:
+                after = "position"
+                args.extend(position)
+            else:
+                after = "thread"
+                args.append(pagination.cursor)
+        # One extra row tells whether there is a next page
+        args.append(pagination.first + 1)
+        generation = thread_list_cache.generation
+
+        query = list_threads_query(bool(filters.userId), bool(filters.search), after)
+        rows = await self._query("list_threads", "fetch", query, *args)
+
+        has_next_page = len(rows) > pagination.first
+        rows = rows[: pagination.first]
+        threads: List["ThreadDict"] = [
+            {
+                "id": row["id"],
+                "createdAt": row["createdAt"].isoformat(),
+                "name": row["name"],
+                "userId": row["userId"],
+                "userIdentifier": row["userIdentifier"],
+                "tags": row["tags"],
+                "metadata": _json(row["metadata"]),
+                "steps": [],
+                "elements": [],
+            }
+            for row in rows
+        ]
+        page = PaginatedResponse(
+            pageInfo=PageInfo(
+                hasNextPage=has_next_page,
+                startCursor=(
+                    encode_cursor(rows[0]["createdAt"], rows[0]["id"]) if rows else None
+                ),
+                endCursor=(
+                    encode_cursor(rows[-1]["createdAt"], rows[-1]["id"])
+                    if rows
+                    else None
+                ),
+            ),
+            data=threads,
+        )
+        if cacheable:
+            thread_list_cache.put(filters.userId, pagination.first, page, generation)
+        return page
+
+    async def get_thread(self, thread_id: str) -> Optional["ThreadDict"]:
+        async with acquire() as connection:
+            started = time.perf_counter()
+            thread = await connection.fetchrow(GET_THREAD_QUERY, thread_id)
+            if thread is None:
+                return None
+            steps = await connection.fetch(GET_THREAD_STEPS_QUERY, thread_id)
+            elements = await connection.fetch(GET_THREAD_ELEMENTS_QUERY, thread_id)
+            db_query_seconds.observe(time.perf_counter() - started, "get_thread")
+
+        return {
+            "id": thread["id"],
+            "createdAt": thread["createdAt"].isoformat(),
+            "name": thread["name"],
+            "userId": thread["userId"],
+            "userIdentifier": thread["userIdentifier"],
+            "tags": thread["tags"],
+            "metadata": _json(thread["metadata"]),
+            "steps": [_step_dict(row) for row in steps],
+            "elements": [
+                _element_dict(row, await self._element_url(row)) for row in elements
+            ],
+        }
+
+    async def _element_url(self, row: "asyncpg.Record") -> Optional[str]:
+        """Get the URL of an element, signing one for stored files."""
+        if row["url"] or not row["objectKey"] or self.storage_client is None:
+            return row["url"]
+        return await self.storage_client.get_read_url(object_key=row["objectKey"])
+
+    async def update_thread(
+        self,
+        thread_id: str,
+        name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        tags: Optional[List[str]] = None,
+    ):
+        metadata = metadata or {}
+        if name is None:
+            name = metadata.get("name")
+        owner = await self._query(
+            "update_thread",
+            "fetchval",
+            UPDATE_THREAD_QUERY,
+            thread_id,
+            name,
+            user_id,
+            tags,
+            json.dumps(
+                {key: value for key, value in metadata.items() if value is not None},
+                default=str,
+            ),
+            [key for key, value in metadata.items() if value is None],
+        )
+        # The update can set the thread's owner, name or tags, which the
+        # owner's listing shows
+        thread_list_cache.invalidate(owner)
+
+    async def build_debug_url(self) -> str:
+        return ""
+
+    async def close(self) -> None:
+        """Close the shared pool, which this data layer owns no part of."""
+        await close_pool()
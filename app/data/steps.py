@@ -0,0 +1,276 @@
+"""Multi-row upserts of Chainlit steps and feedback.
+
+This module holds the statements that write steps and feedback to the
+Prisma schema. Both the write-behind buffer and the Postgres data layer
+write through them: the buffer with a batch of rows, the data layer with
+a single row. The statements take one array per column, so their text
+never changes with the number of rows and asyncpg prepares each of them
+once per connection.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncpg
+
+
+__all__ = ["upsert_steps", "ensure_steps", "upsert_feedback", "to_timestamp"]
+
+
+# Threads are created by Chainlit, but a step can be written before its
+# thread, so missing threads are created first
+UPSERT_THREADS_QUERY = """
+INSERT INTO "Thread" ("id", "metadata")
+SELECT "id", '{}'::jsonb FROM unnest($1::text[]) AS t("id")
+ON CONFLICT ("id") DO NOTHING
+RETURNING "id"
+"""
+
+# Placeholders for parents and element steps that are not written yet, like
+# the Chainlit data layer creates; the step's own write replaces their type
+INSERT_PLACEHOLDER_STEPS_QUERY = """
+INSERT INTO "Step" ("id", "threadId", "metadata", "type", "startTime", "endTime")
+SELECT p."id", p."threadId", '{}'::jsonb, 'run', p."startTime", p."startTime"
+FROM unnest($1::text[], $2::text[], $3::timestamp[])
+    AS p("id", "threadId", "startTime")
+ON CONFLICT ("id") DO NOTHING
+"""
+
+# Fields a step dict clears by setting them to None; like the Chainlit data
+# layer, fields it leaves out keep their stored values. Bit i of a row's
+# "setFields" flags that the dict contains field i
+CLEARABLE_FIELDS = ("parentId", "input", "name", "output", "showInput", "isError")
+
+# New steps are inserted, existing ones updated field by field: ON CONFLICT
+# cannot see whether a field was set, so the update is a separate statement.
+# It runs on the snapshot taken before the insert, so it only sees the
+# steps that already existed
+UPSERT_STEPS_QUERY = """
+WITH s AS (
+    SELECT * FROM unnest(
+        $1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::text[],
+        $7::text[], $8::text[], $9::timestamp[], $10::timestamp[], $11::text[],
+        $12::boolean[], $13::timestamp[], $14::int[]
+    ) AS s(
+        "id", "threadId", "parentId", "input", "metadata", "name", "output",
+        "type", "startTime", "endTime", "showInput", "isError", "createdAt",
+        "setFields"
+    )
+), inserted AS (
+    INSERT INTO "Step" (
+        "id", "threadId", "parentId", "input", "metadata", "name", "output",
+        "type", "startTime", "endTime", "showInput", "isError", "createdAt"
+    )
+    SELECT
+        s."id", s."threadId", s."parentId", s."input", s."metadata"::jsonb,
+        s."name", s."output", s."type"::"StepType", s."startTime", s."endTime",
+        s."showInput", s."isError", s."createdAt"
+    FROM s
+    ON CONFLICT ("id") DO NOTHING
+)
+UPDATE "Step" SET
+    "parentId" = CASE
+        WHEN (s."setFields" & 1) <> 0 THEN s."parentId" ELSE "Step"."parentId"
+    END,
+    "threadId" = COALESCE(s."threadId", "Step"."threadId"),
+    "input" = CASE
+        WHEN (s."setFields" & 2) <> 0 THEN s."input" ELSE "Step"."input"
+    END,
+    "metadata" = CASE
+        WHEN s."metadata"::jsonb <> '{}'::jsonb THEN s."metadata"::jsonb
+        ELSE "Step"."metadata"
+    END,
+    "name" = CASE
+        WHEN (s."setFields" & 4) <> 0 THEN s."name" ELSE "Step"."name"
+    END,
+    "output" = CASE
+        WHEN (s."setFields" & 8) <> 0 THEN s."output" ELSE "Step"."output"
+    END,
+    "type" = CASE
+        WHEN s."type" = 'run' THEN "Step"."type"
+        ELSE s."type"::"StepType"
+    END,
+    "startTime" = LEAST(s."startTime", "Step"."startTime"),
+    "endTime" = GREATEST(s."endTime", "Step"."endTime"),
+    "showInput" = CASE
+        WHEN (s."setFields" & 16) <> 0 THEN s."showInput" ELSE "Step"."showInput"
+    END,
+    "isError" = CASE
+        WHEN (s."setFields" & 32) <> 0 THEN s."isError" ELSE "Step"."isError"
+    END,
+    "updatedAt" = CURRENT_TIMESTAMP
+FROM s
+WHERE "Step"."id" = s."id"
+"""
+
+UPSERT_FEEDBACK_QUERY = """
+INSERT INTO "Feedback" ("id", "stepId", "name", "value", "comment")
+SELECT * FROM unnest(
+    $1::text[], $2::text[], $3::text[], $4::float8[], $5::text[]
+)
+ON CONFLICT ("id") DO UPDATE SET
+    "stepId" = EXCLUDED."stepId",
+    "name" = EXCLUDED."name",
+    "value" = EXCLUDED."value",
+    "comment" = EXCLUDED."comment",
+    "updatedAt" = CURRENT_TIMESTAMP
+"""
+
+
+def to_timestamp(value: Any) -> Optional[datetime]:
+    """
+    Convert a Chainlit timestamp to the naive UTC the schema stores.
+
+    Args:
+        value: An ISO 8601 string or a datetime, possibly None
+
+    Returns:
+        The timestamp without time zone, or None
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _step_columns(steps: List[Dict[str, Any]]) -> List[list]:
+    """Build the column arrays of the step upsert."""
+    columns: List[list] = [[] for _ in range(14)]
+    for step in steps:
+        created = to_timestamp(step.get("createdAt")) or to_timestamp(
+            datetime.now(timezone.utc)
+        )
+        start = to_timestamp(step.get("start")) or created
+        show_input = step.get("showInput")
+        row = (
+            step["id"],
+            step.get("threadId"),
+            step.get("parentId"),
+            step.get("input"),
+            json.dumps(step.get("metadata") or {}, default=str),
+            step.get("name"),
+            step.get("output"),
+            step.get("type") or "undefined",
+            start,
+            to_timestamp(step.get("end")) or start,
+            str(show_input).lower() if show_input is not None else None,
+            step.get("isError"),
+            created,
+            sum(
+                1 << bit for bit, field in enumerate(CLEARABLE_FIELDS) if field in step
+            ),
+        )
+        for column, value in zip(columns, row):
+            column.append(value)
+    return columns
+
+
+async def _create_threads(
+    connection: "asyncpg.Connection", thread_ids: List[str]
+) -> List[str]:
+    """Create the missing threads among ``thread_ids`` and return their ids."""
+    if not thread_ids:
+        return []
+    rows = await connection.fetch(UPSERT_THREADS_QUERY, thread_ids)
+    return [row["id"] for row in rows]
+
+
+async def upsert_steps(
+    connection: "asyncpg.Connection", steps: Iterable[Dict[str, Any]]
+) -> List[str]:
+    """
+    Create or update steps, with their threads and missing parents.
+
+    Run it in a transaction: parents and threads are written by separate
+    statements before the steps.
+
+    Args:
+        connection: The connection to write on
+        steps: Chainlit step dicts; fields a dict leaves out keep their values,
+            fields it sets to None are cleared
+
+    Returns:
+        Ids of the threads that were created
+    """
+    steps = list(steps)
+    if not steps:
+        return []
+
+    step_ids = {step["id"] for step in steps}
+    created_threads = await _create_threads(
+        connection,
+        list(dict.fromkeys(step["threadId"] for step in steps if step.get("threadId"))),
+    )
+
+    columns = _step_columns(steps)
+    parents = [
+        (step["parentId"], step.get("threadId"), start)
+        for step, start in zip(steps, columns[8])
+        if step.get("parentId") and step["parentId"] not in step_ids
+    ]
+    if parents:
+        await connection.execute(
+            INSERT_PLACEHOLDER_STEPS_QUERY, *map(list, zip(*parents))
+        )
+    await connection.execute(UPSERT_STEPS_QUERY, *columns)
+    return created_threads
+
+
+async def ensure_steps(
+    connection: "asyncpg.Connection", steps: Iterable[Tuple[str, Optional[str]]]
+) -> List[str]:
+    """
+    Create placeholders for steps, and their threads, that are not written yet.
+
+    Existing steps and threads are left untouched.
+
+    Args:
+        connection: The connection to write on
+        steps: (step id, thread id) pairs
+
+    Returns:
+        Ids of the threads that were created
+    """
+    steps = list(steps)
+    created_threads = await _create_threads(
+        connection,
+        list(dict.fromkeys(thread_id for _, thread_id in steps if thread_id)),
+    )
+    if steps:
+        now = to_timestamp(datetime.now(timezone.utc))
+        await connection.execute(
+            INSERT_PLACEHOLDER_STEPS_QUERY,
+            [step_id for step_id, _ in steps],
+            [thread_id for _, thread_id in steps],
+            [now] * len(steps),
+        )
+    return created_threads
+
+
+async def upsert_feedback(
+    connection: "asyncpg.Connection", feedback: Iterable[Dict[str, Any]]
+) -> None:
+    """
+    Create or update feedback on steps.
+
+    Args:
+        connection: The connection to write on
+        feedback: Feedback dicts with ``id``, ``forId``, ``value`` and ``comment``
+    """
+    feedback = list(feedback)
+    if not feedback:
+        return
+
+    await connection.execute(
+        UPSERT_FEEDBACK_QUERY,
+        [item["id"] for item in feedback],
+        [item.get("forId") for item in feedback],
+        [item.get("name") or "user_feedback" for item in feedback],
+        [float(item.get("value") or 0) for item in feedback],
+        [item.get("comment") for item in feedback],
+    )
@@ -0,0 +1,243 @@
+"""Keyset pagination and first-page caching of thread listings.
+
+The sidebar lists a user's threads, newest first, in the order of
+Chainlit's own data layer. Pages are read with keyset cursors on
+``("createdAt", "id")``, which the ``Thread_userId_createdAt_id_idx``
+index serves directly, so a page costs the same however many threads the
+user has. The first page, requested on every page load, is also kept in
+memory for a few seconds per user and dropped as soon as one of the
+user's threads changes or a thread is created.
+
+Both only apply with ``DATA_LAYER=postgres``. Chainlit's own data layer,
+the default, pages with its own queries and is not cached; it only
+benefits from the index.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from app.core import CONFIG
+
+
+__all__ = [
+    "ThreadCursor",
+    "encode_cursor",
+    "decode_cursor",
+    "list_threads_query",
+    "ThreadListCache",
+    "thread_list_cache",
+]
+
+
+# Position of a thread in the listing order
+ThreadCursor = Tuple[datetime, str]
+
+
+CURSOR_SEPARATOR = "|"
+
+
+def encode_cursor(created_at: datetime, thread_id: str) -> str:
+    """
+    Build the opaque cursor of a listed thread.
+
+    Args:
+        created_at: The thread's creation time
+        thread_id: The thread's id
+
+    Returns:
+        A cursor the next page starts after
+    """
+    return f"{created_at.isoformat()}{CURSOR_SEPARATOR}{thread_id}"
+
+
+def decode_cursor(cursor: str) -> Optional[ThreadCursor]:
+    """
+    Read a cursor built by ``encode_cursor``.
+
+    Args:
+        cursor: The cursor sent back by the client
+
+    Returns:
+        The (createdAt, id) position, or None if the cursor is a bare
+        thread id, as Chainlit's own data layer returns them
+    """
+    timestamp, separator, thread_id = cursor.partition(CURSOR_SEPARATOR)
+    if not separator:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp), thread_id
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def list_threads_query(by_user: bool, search: bool, after: Optional[str]) -> str:
+    """
+    Build the thread listing query for the filters in use.
+
+    Every combination of filters has its own fixed text, so each is
+    prepared once per connection and planned for the filters it has.
+
+    Args:
+        by_user: Whether threads are filtered by user id
+        search: Whether thread names are searched
+        after: ``"position"`` to start after a (createdAt, id) position,
+            ``"thread"`` to start after a thread given by id, or None
+
+    Returns:
+        The query, taking the user id, the search pattern and the cursor
+        values, as far as used, and the limit last
+    """
+    conditions = ['t."deletedAt" IS NULL']
+    position = 1
+    if by_user:
+        conditions.append(f't."userId" = ${position}')
+        position += 1
+    if search:
+        conditions.append(f't."name" ILIKE ${position}')
+        position += 1
+    if after == "position":
+        conditions.append(
+            f'(t."createdAt", t."id") < (${position}::timestamp, ${position + 1})'
+        )
+        position += 2
+    elif after == "thread":
+        conditions.append(
+            f'(t."createdAt", t."id") < '
+            f'(SELECT "createdAt", "id" FROM "Thread" WHERE "id" = ${position})'
+        )
+        position += 1
+    where = "\n  AND ".join(conditions)
+    return f"""
+SELECT t."id", t."createdAt", t."name", t."userId",
+    t."metadata", t."tags", u."identifier" AS "userIdentifier"
+FROM "Thread" t
+LEFT JOIN "User" u ON t."userId" = u."id"
+WHERE {where}
+ORDER BY t."createdAt" DESC, t."id" DESC
+LIMIT ${position}
+"""
+
+
+class ThreadListCache:
+    """
+    Short-lived cache of the first listing page of each user.
+
+    Entries expire after ``ttl_seconds``, which bounds how stale another
+    worker's writes can look, and are invalidated at once by this
+    worker's own thread creations, updates and deletions. A page read
+    while an invalidation happened is not cached, since it may predate it.
+    """
+
+    def __init__(
+        self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None
+    ):
+        """
+        Initialize the ThreadListCache.
+
+        Args:
+            ttl_seconds: Lifetime of a cached page, 0 to disable. Defaults to configuration
+            max_entries: Users whose first page is kept. Defaults to configuration
+        """
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else CONFIG.thread_list_cache_ttl_seconds
+        )
+        self.max_entries = max_entries or CONFIG.thread_list_cache_max_entries
+        self._pages: "OrderedDict[Tuple[str, int], Tuple[float, Any]]" = OrderedDict()
+        # Advanced by every invalidation
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str, page_size: int) -> Optional[Any]:
+        """
+        Get a user's cached first page.
+
+        Args:
+            user_id: The user
+            page_size: Number of threads of the page
+
+        Returns:
+            The cached listing, or None if it is missing or expired
+        """
+        if self.ttl_seconds <= 0:
+            return None
+        key = (user_id, page_size)
+        entry = self._pages.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._pages.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(
+        self,
+        user_id: str,
+        page_size: int,
+        page: Any,
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        Cache a user's first page.
+
+        Args:
+            user_id: The user
+            page_size: Number of threads of the page
+            page: The listing to cache
+            generation: ``generation`` when the page was read; the page is
+                not cached if an invalidation happened since
+        """
+        if self.ttl_seconds <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        key = (user_id, page_size)
+        self._pages[key] = (time.monotonic() + self.ttl_seconds, page)
+        self._pages.move_to_end(key)
+        if len(self._pages) > self.max_entries:
+            self._pages.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str]) -> None:
+        """
+        Drop the cached pages of a user whose threads changed.
+
+        Args:
+            user_id: The user, or None for threads without a user
+        """
+        if user_id is None:
+            return
+        self.generation += 1
+        for key in [key for key in self._pages if key[0] == user_id]:
+            del self._pages[key]
+            self.invalidations += 1
+
+    def invalidate_all(self) -> None:
+        """
+        Drop every cached page.
+
+        Used when threads are created by step writes, which do not know
+        the thread's owner.
+        """
+        self.generation += 1
+        self.invalidations += len(self._pages)
+        self._pages.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit, miss and invalidation counts and the number of cached pages."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self._pages),
+        }
+
+
+# Global thread list cache shared by all sessions
+thread_list_cache = ThreadListCache()
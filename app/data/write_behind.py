@@ -0,0 +1,372 @@
+"""Write-behind buffering of Chainlit step and feedback writes.
+
+Chainlit persists every step as it is created and again on every update,
+so a streamed response costs several Postgres round-trips on the path
+that serves the user. This module takes those writes off that path: they
+are merged per step (or feedback) id in memory and written in batches,
+one transaction of multi-row upserts at a time, on a short interval or as
+soon as a batch is full.
+
+Batches are written one after the other and keep the order in which their
+steps were first seen, so the writes of a thread land in order; feedback
+is held back until the batch that writes its step. Memory is bounded:
+once ``max_pending`` records are waiting, writers wait for the next
+flush. Batches that keep failing, and whatever is left on shutdown
+if the database is unreachable, are spilled to a JSONL file that is
+replayed on the next start.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Container, Dict, Optional
+
+from app.core import CONFIG
+from .pool import acquire
+from .steps import upsert_feedback, upsert_steps
+from .thread_list import thread_list_cache
+
+
+__all__ = ["WriteBehindBuffer", "write_behind_buffer"]
+
+
+logger = logging.getLogger(__name__)
+
+
+def _merge(pending: Dict[str, Any], update: Dict[str, Any]) -> None:
+    """
+    Merge an update into a pending record.
+
+    Every field the update contains replaces the pending value, None
+    included, so an update can clear a field; fields it leaves out keep
+    their pending values. Empty metadata leaves the metadata unset, as it
+    does in the upsert.
+    """
+    for key, value in update.items():
+        if key == "metadata" and not value and key in pending:
+            continue
+        pending[key] = value
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces step and feedback writes and flushes them in batches.
+
+    ``put_step`` and ``put_feedback`` only touch dictionaries unless the
+    buffer is full; all database work happens in the flush task.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        max_retries: Optional[int] = None,
+    ):
+        """
+        Initialize the WriteBehindBuffer.
+
+        Args:
+            flush_interval_ms: Longest time a write waits. Defaults to configuration
+            batch_size: Pending records that trigger a flush. Defaults to configuration
+            max_pending: Pending records before writers wait. Defaults to configuration
+            spill_path: JSONL file for unwritable records. Defaults to configuration
+            max_retries: Failed flushes before a batch is spilled. Defaults to configuration
+        """
+        self.flush_interval = (
+            flush_interval_ms or CONFIG.write_behind_flush_interval_ms
+        ) / 1000
+        self.batch_size = batch_size or CONFIG.write_behind_batch_size
+        self.max_pending = max(
+            max_pending or CONFIG.write_behind_max_pending, self.batch_size
+        )
+        self.spill_path = spill_path or CONFIG.write_behind_spill_path
+        self.max_retries = max_retries or CONFIG.write_behind_max_retries
+
+        self._steps: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._feedback: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._failures = 0
+
+        self.flushes = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self.spilled = 0
+        self.waits = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Number of records waiting to be written."""
+        return len(self._steps) + len(self._feedback)
+
+    def start(self) -> None:
+        """Start the flush task and queue the records spilled by a previous run."""
+        if self._task is not None:
+            return
+        self._closed = False
+        self._replay_spill()
+        self._task = asyncio.create_task(self._run())
+
+    async def _put(
+        self, records: "OrderedDict[str, Dict[str, Any]]", record: Dict[str, Any]
+    ) -> None:
+        if self._task is None:
+            self.start()
+        while self.pending >= self.max_pending and not self._closed:
+            # Bounded memory: wait for the flush task to make room
+            self.waits += 1
+            self._drained.clear()
+            self._wakeup.set()
+            await self._drained.wait()
+
+        pending = records.get(record["id"])
+        if pending is None:
+            records[record["id"]] = pending = {}
+        _merge(pending, record)
+        if self.pending >= self.batch_size:
+            self._wakeup.set()
+
+    async def put_step(self, step: Dict[str, Any]) -> None:
+        """
+        Queue the creation or update of a step.
+
+        Args:
+            step: Chainlit step dict; fields it does not set keep their values
+        """
+        await self._put(self._steps, step)
+
+    async def put_feedback(self, feedback: Dict[str, Any]) -> None:
+        """
+        Queue the creation or update of a feedback.
+
+        Args:
+            feedback: Feedback dict with ``id``, ``forId``, ``value`` and ``comment``
+        """
+        await self._put(self._feedback, feedback)
+
+    def discard_step(self, step_id: str) -> None:
+        """Drop the pending writes of a deleted step and of its feedback."""
+        self._steps.pop(step_id, None)
+        for feedback_id in [
+            key for key, item in self._feedback.items() if item.get("forId") == step_id
+        ]:
+            del self._feedback[feedback_id]
+
+    def discard_feedback(self, feedback_id: str) -> None:
+        """Drop the pending writes of a deleted feedback."""
+        self._feedback.pop(feedback_id, None)
+
+    def discard_thread(self, thread_id: str) -> None:
+        """Drop the pending writes of a deleted thread."""
+        for step_id in [
+            key
+            for key, step in self._steps.items()
+            if step.get("threadId") == thread_id
+        ]:
+            self.discard_step(step_id)
+
+    def has_thread(self, thread_id: str) -> bool:
+        """Check whether a thread has pending step writes."""
+        return any(step.get("threadId") == thread_id for step in self._steps.values())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closed:
+                # close() writes what is left once this task has stopped
+                break
+            try:
+                if self.pending and not await self.flush():
+                    # Back off before retrying a failed batch
+                    await asyncio.sleep(self.flush_interval)
+            except Exception as e:
+                logger.error(f"Write-behind flush task error: {e}")
+            self._drained.set()
+
+    async def flush(self) -> bool:
+        """
+        Write every pending record, one batch after the other.
+
+        Returns:
+            True if nothing is left pending, False if a batch failed and
+            was kept for the next flush
+        """
+        async with self._flush_lock:
+            while self.pending:
+                steps = self._take(self._steps)
+                # Feedback waits for the batch that writes its step
+                feedback = self._take(
+                    self._feedback, self.batch_size - len(steps), self._steps
+                )
+                started = time.perf_counter()
+                try:
+                    await self._write(steps, feedback)
+                except asyncio.CancelledError:
+                    # The batch may or may not have been committed; writing
+                    # it again is harmless, losing it is not
+                    self._restore(self._steps, steps)
+                    self._restore(self._feedback, feedback)
+                    raise
+                except Exception as e:
+                    self.failed_flushes += 1
+                    self._failures += 1
+                    if self._failures >= self.max_retries:
+                        logger.error(
+                            f"Write-behind batch failed {self._failures} times, "
+                            f"spilling {len(steps) + len(feedback)} records: {e}"
+                        )
+                        self._spill(steps, feedback)
+                        self._failures = 0
+                        continue
+                    logger.warning(f"Write-behind flush failed, will retry: {e}")
+                    self._restore(self._steps, steps)
+                    self._restore(self._feedback, feedback)
+                    return False
+
+                self._failures = 0
+                self.flushes += 1
+                self.written += len(steps) + len(feedback)
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return True
+
+    def _take(
+        self,
+        records: "OrderedDict[str, Dict[str, Any]]",
+        limit: Optional[int] = None,
+        pending_steps: Optional[Container[str]] = None,
+    ) -> "OrderedDict[str, Dict[str, Any]]":
+        """
+        Remove up to a batch of the oldest pending records.
+
+        Args:
+            records: The pending steps or feedback
+            limit: Most records to take. Defaults to the batch size
+            pending_steps: Ids of steps left pending; feedback on them stays
+        """
+        batch: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        limit = self.batch_size if limit is None else limit
+        if not pending_steps:
+            while records and len(batch) < limit:
+                key, record = records.popitem(last=False)
+                batch[key] = record
+            return batch
+
+        for key in list(records):
+            if len(batch) >= limit:
+                break
+            if records[key].get("forId") not in pending_steps:
+                batch[key] = records.pop(key)
+        return batch
+
+    @staticmethod
+    def _restore(
+        records: "OrderedDict[str, Dict[str, Any]]",
+        batch: "OrderedDict[str, Dict[str, Any]]",
+    ) -> None:
+        """Put a failed batch back in front of the writes queued meanwhile."""
+        for key, newer in records.items():
+            if key in batch:
+                _merge(batch[key], newer)
+            else:
+                batch[key] = newer
+        records.clear()
+        records.update(batch)
+
+    async def _write(
+        self,
+        steps: "OrderedDict[str, Dict[str, Any]]",
+        feedback: "OrderedDict[str, Dict[str, Any]]",
+    ) -> None:
+        """Upsert a batch in a single transaction."""
+        async with acquire() as connection:
+            async with connection.transaction():
+                created_threads = await upsert_steps(connection, steps.values())
+                await upsert_feedback(connection, feedback.values())
+        if created_threads:
+            thread_list_cache.invalidate_all()
+
+    def _spill(
+        self,
+        steps: "OrderedDict[str, Dict[str, Any]]",
+        feedback: "OrderedDict[str, Dict[str, Any]]",
+    ) -> None:
+        """Append records that could not be written to the spill file."""
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spill_path, "a") as spill:
+            for kind, records in (("step", steps), ("feedback", feedback)):
+                for record in records.values():
+                    spill.write(
+                        json.dumps({"kind": kind, "record": record}, default=str) + "\n"
+                    )
+        self.spilled += len(steps) + len(feedback)
+
+    def _replay_spill(self) -> None:
+        """Queue the records of the spill file, then remove it."""
+        if not os.path.exists(self.spill_path):
+            return
+        replayed = 0
+        with open(self.spill_path) as spill:
+            for line in spill:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records = self._steps if entry.get("kind") == "step" else self._feedback
+                record = entry.get("record") or {}
+                if "id" in record:
+                    _merge(records.setdefault(record["id"], {}), record)
+                    replayed += 1
+        os.remove(self.spill_path)
+        if replayed:
+            logger.info(f"Replaying {replayed} spilled write-behind records")
+            self._wakeup.set()
+
+    async def close(self) -> None:
+        """Stop the flush task and write, or else spill, every pending record."""
+        self._closed = True
+        if self._task is not None:
+            # Let a flush in progress finish rather than cancel it mid-batch
+            self._wakeup.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._drained.set()
+
+        if self.pending and not await self.flush():
+            logger.error(f"Spilling {self.pending} unwritten records on shutdown")
+            self._spill(self._steps, self._feedback)
+            self._steps.clear()
+            self._feedback.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get the number of pending, written and spilled records and of flushes."""
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "written": self.written,
+            "failed_flushes": self.failed_flushes,
+            "spilled": self.spilled,
+            "waits": self.waits,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+# Global write-behind buffer shared by the data layer
+write_behind_buffer = WriteBehindBuffer()
@@ -0,0 +1,56 @@
+"""Events module for the universal agent application.
+
+This module provides the event bus that agent runs publish stream events
+into, the event types, and the built-in sinks, including the UI sink chat
+sessions stream replies through.
+"""
+
+from app.core import CONFIG
+from .bus import EventBus, EventSink
+from .events import (
+    StreamEvent,
+    AgentSwitched,
+    RunStarted,
+    TokenDelta,
+    RunFinished,
+    RunFailed,
+)
+from .sinks import UISink, LoggingSink, MetricsSink, ConsoleSink
+
+
+# Global UI sink chat sessions open their reply streams on
+ui_sink = UISink()
+
+
+def _create_event_bus() -> EventBus:
+    """Create the application event bus with the configured default sinks."""
+    bus = EventBus()
+    bus.add_sink(ui_sink)
+    bus.add_sink(LoggingSink())
+    if CONFIG.metrics_enabled:
+        bus.add_sink(MetricsSink())
+    if CONFIG.console_stream_events:
+        bus.add_sink(ConsoleSink())
+    return bus
+
+
+# Global event bus instance
+event_bus = _create_event_bus()
+
+
+__all__ = [
+    "event_bus",
+    "ui_sink",
+    "EventBus",
+    "EventSink",
+    "StreamEvent",
+    "AgentSwitched",
+    "RunStarted",
+    "TokenDelta",
+    "RunFinished",
+    "RunFailed",
+    "UISink",
+    "LoggingSink",
+    "MetricsSink",
+    "ConsoleSink",
+]
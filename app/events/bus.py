@@ -0,0 +1,157 @@
+"""Asynchronous event bus for agent stream events.
+
+This module provides the EventBus that agent runs publish into. Every sink
+gets its own bounded queue and worker task, so a slow sink can never block
+the model stream or the other sinks.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Type
+
+from app.core import CONFIG
+from .events import StreamEvent
+
+
+__all__ = ["EventSink", "EventBus"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class EventSink(ABC):
+    """
+    Abstract base class for event bus consumers.
+
+    Subclasses can restrict the events they receive by setting
+    ``event_types``; events of other types are never queued for them. A
+    sink that must not lose events sets ``queue_size`` to 0 for an
+    unbounded queue.
+    """
+
+    name: str = "sink"
+    event_types: Optional[Tuple[Type[StreamEvent], ...]] = None
+    queue_size: Optional[int] = None
+
+    def accepts(self, event: StreamEvent) -> bool:
+        """Check whether this sink wants to receive the given event."""
+        return self.event_types is None or isinstance(event, self.event_types)
+
+    @abstractmethod
+    async def handle(self, event: StreamEvent) -> None:
+        """
+        Process a single event.
+
+        Args:
+            event: The event to process
+        """
+        pass
+
+    async def close(self) -> None:
+        """Release any resources held by the sink."""
+        pass
+
+
+class _SinkWorker:
+    """Bounded queue and consumer task for a single sink."""
+
+    def __init__(self, sink: EventSink, queue_size: int):
+        self.sink = sink
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, event: StreamEvent) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _run(self) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.sink.handle(event)
+            except Exception as e:
+                logger.warning(f"Event sink {self.sink.name} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class EventBus:
+    """
+    Publish/subscribe bus for agent stream events.
+
+    ``emit`` is synchronous and never blocks: events are put on each
+    interested sink's queue and dropped (and counted) if that queue is full.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        """
+        Initialize the event bus.
+
+        Args:
+            queue_size: Per-sink queue capacity. Defaults to configuration
+        """
+        self._queue_size = queue_size or CONFIG.event_sink_queue_size
+        self._workers: List[_SinkWorker] = []
+
+    def add_sink(self, sink: EventSink) -> None:
+        """
+        Register a sink with the bus.
+
+        Args:
+            sink: The sink to register
+        """
+        queue_size = (
+            sink.queue_size if sink.queue_size is not None else self._queue_size
+        )
+        self._workers.append(_SinkWorker(sink, queue_size))
+
+    def remove_sink(self, sink: EventSink) -> None:
+        """
+        Unregister a sink from the bus.
+
+        Args:
+            sink: The sink to remove
+        """
+        for worker in [w for w in self._workers if w.sink is sink]:
+            if worker.task is not None:
+                worker.task.cancel()
+            self._workers.remove(worker)
+
+    def emit(self, event: StreamEvent) -> None:
+        """
+        Publish an event to every interested sink without blocking.
+
+        Args:
+            event: The event to publish
+        """
+        for worker in self._workers:
+            if worker.sink.accepts(event):
+                worker.offer(event)
+
+    def dropped_events(self) -> dict[str, int]:
+        """Get the number of dropped events per sink."""
+        return {worker.sink.name: worker.dropped for worker in self._workers}
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """
+        Drain pending events and stop all sink workers.
+
+        Args:
+            timeout: Maximum time to wait for each sink to drain
+        """
+        for worker in self._workers:
+            if worker.task is None:
+                continue
+            try:
+                await asyncio.wait_for(worker.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out draining event sink {worker.sink.name}")
+            worker.task.cancel()
+            worker.task = None
+            await worker.sink.close()
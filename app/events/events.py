@@ -0,0 +1,73 @@
+"""Event types emitted by agent runs.
+
+This module defines the lightweight, immutable events published on the
+event bus while an agent run streams. Token deltas are emitted on the hot
+path, so events are slotted dataclasses rather than validated models.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core.types import RunStats
+
+
+__all__ = [
+    "StreamEvent",
+    "AgentSwitched",
+    "RunStarted",
+    "TokenDelta",
+    "RunFinished",
+    "RunFailed",
+]
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class StreamEvent:
+    """Base class for all events emitted during an agent run.
+
+    ``stream_id`` names the UI stream, such as a chat message, that shows
+    the run's output, if the caller gave one.
+    """
+
+    run_id: str
+    agent_name: str
+    display_name: str
+    stream_id: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class AgentSwitched(StreamEvent):
+    """The user switched the active agent with @ notation."""
+
+    previous_agent: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class RunStarted(StreamEvent):
+    """An agent run has been submitted to the model."""
+
+    model_name: str
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class TokenDelta(StreamEvent):
+    """A new chunk of text was streamed by the model."""
+
+    delta: str
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class RunFinished(StreamEvent):
+    """An agent run completed successfully."""
+
+    stats: RunStats
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class RunFailed(StreamEvent):
+    """An agent run raised an error."""
+
+    error: str
+    error_type: str
@@ -0,0 +1,262 @@
+"""Built-in event sinks.
+
+This module provides the standard consumers of the event bus: the chat
+UI, a structured logger and Prometheus metrics for production, and a
+console printer for development.
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from .bus import EventSink
+from .events import (
+    AgentSwitched,
+    RunFailed,
+    RunFinished,
+    RunStarted,
+    StreamEvent,
+    TokenDelta,
+)
+from app.metrics import (
+    agent_switches_total,
+    cost_usd_total,
+    generation_seconds,
+    hedged_runs_total,
+    queue_wait_seconds,
+    run_errors_total,
+    runs_total,
+    tokens_per_second,
+    tokens_total,
+    ttft_seconds,
+)
+
+
+__all__ = ["UISink", "LoggingSink", "MetricsSink", "ConsoleSink"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# Longest wait for a closing stream's queued deltas to be delivered
+STREAM_DRAIN_TIMEOUT_SECONDS = 5.0
+
+
+class UISink(EventSink):
+    """
+    Chat UI sink.
+
+    Forwards the token deltas of open streams, usually one per chat
+    message, to the stream's push callback, such as ``TokenStreamer.push``.
+    Its queue is unbounded, since a dropped delta would be missing from
+    the reply, and a stream is only closed once its queued deltas have
+    been delivered.
+    """
+
+    name = "ui"
+    event_types = (TokenDelta,)
+    queue_size = 0
+
+    def __init__(self):
+        """Initialize the UISink."""
+        self._streams: Dict[str, Callable[[str], None]] = {}
+        self._pending: Dict[str, int] = {}
+        self._idle: Dict[str, asyncio.Event] = {}
+
+    def open_stream(self, stream_id: str, push: Callable[[str], None]) -> None:
+        """
+        Start forwarding the deltas of runs tagged with a stream id.
+
+        Args:
+            stream_id: Stream id the runs are started with
+            push: Non-blocking callback receiving each text delta
+        """
+        self._streams[stream_id] = push
+        self._pending[stream_id] = 0
+        self._idle[stream_id] = asyncio.Event()
+        self._idle[stream_id].set()
+
+    async def close_stream(self, stream_id: str) -> None:
+        """
+        Deliver the stream's queued deltas, then stop forwarding it.
+
+        Args:
+            stream_id: The stream to close
+        """
+        idle = self._idle.get(stream_id)
+        try:
+            if idle is not None:
+                await asyncio.wait_for(idle.wait(), STREAM_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out delivering the deltas of stream {stream_id}")
+        finally:
+            self._streams.pop(stream_id, None)
+            self._pending.pop(stream_id, None)
+            self._idle.pop(stream_id, None)
+
+    def accepts(self, event: StreamEvent) -> bool:
+        if not isinstance(event, TokenDelta) or event.stream_id not in self._streams:
+            return False
+        # Called once per emitted event, so deltas are counted as they are queued
+        self._pending[event.stream_id] += 1
+        self._idle[event.stream_id].clear()
+        return True
+
+    async def handle(self, event: StreamEvent) -> None:
+        push = self._streams.get(event.stream_id)
+        if push is None:
+            return
+        try:
+            push(event.delta)
+        finally:
+            self._pending[event.stream_id] -= 1
+            if not self._pending[event.stream_id]:
+                self._idle[event.stream_id].set()
+
+
+class LoggingSink(EventSink):
+    """
+    Structured logging sink.
+
+    Logs run lifecycle events with their identifiers and statistics as
+    ``extra`` fields. Token deltas are not logged.
+    """
+
+    name = "logging"
+    event_types = (AgentSwitched, RunStarted, RunFinished, RunFailed)
+
+    def __init__(self, logger_name: str = "app.events"):
+        """
+        Initialize the LoggingSink.
+
+        Args:
+            logger_name: Name of the logger to write to
+        """
+        self._logger = logging.getLogger(logger_name)
+
+    async def handle(self, event: StreamEvent) -> None:
+        extra = {"run_id": event.run_id, "agent_name": event.agent_name}
+
+        if isinstance(event, AgentSwitched):
+            self._logger.info(
+                f"Switched agent {event.previous_agent} -> {event.agent_name}",
+                extra=extra,
+            )
+        elif isinstance(event, RunStarted):
+            self._logger.info(
+                f"Run started for {event.agent_name} on {event.model_name}",
+                extra=extra,
+            )
+        elif isinstance(event, RunFinished):
+            stats = event.stats
+            extra["stats"] = stats.model_dump()
+            prompt_tokens = stats.prompt.total_tokens if stats.prompt else None
+            self._logger.info(
+                f"Run finished for {event.agent_name}: "
+                f"ttft={stats.ttft_ms}ms duration={stats.duration_ms}ms "
+                f"prompt_estimate={prompt_tokens} tokens={stats.total_tokens} "
+                f"cached_prompt={stats.cached_prompt_tokens} cost_usd={stats.cost_usd}",
+                extra=extra,
+            )
+        elif isinstance(event, RunFailed):
+            self._logger.error(
+                f"Run failed for {event.agent_name}: {event.error_type}: {event.error}",
+                extra=extra,
+            )
+
+
+class MetricsSink(EventSink):
+    """
+    Prometheus metrics sink.
+
+    Records run latencies, throughput, token usage, cost, errors and agent
+    switches from lifecycle events. Token deltas are not received, so
+    the streaming path pays nothing for metrics.
+    """
+
+    name = "metrics"
+    event_types = (AgentSwitched, RunStarted, RunFinished, RunFailed)
+
+    def __init__(self):
+        """Initialize the MetricsSink."""
+        # Model of every run in progress, since failures do not carry it
+        self._models: Dict[str, str] = {}
+
+    async def handle(self, event: StreamEvent) -> None:
+        if isinstance(event, RunStarted):
+            self._models[event.run_id] = event.model_name
+        elif isinstance(event, AgentSwitched):
+            agent_switches_total.inc(event.previous_agent or "", event.agent_name)
+        elif isinstance(event, RunFinished):
+            self._models.pop(event.run_id, None)
+            self._record_run(event)
+        elif isinstance(event, RunFailed):
+            model_name = self._models.pop(event.run_id, "unknown")
+            run_errors_total.inc(event.agent_name, model_name, event.error_type)
+
+    @staticmethod
+    def _record_run(event: RunFinished) -> None:
+        stats = event.stats
+        labels = (event.agent_name, stats.model_name)
+        if stats.cache_hit:
+            source = "cache"
+        elif stats.coalesced:
+            source = "coalesced"
+        else:
+            source = "model"
+        runs_total.inc(*labels, source)
+        if stats.queue_wait_ms is not None:
+            queue_wait_seconds.observe(stats.queue_wait_ms / 1000, *labels)
+
+        # Replays and shared calls would skew the model's latency
+        if source != "model":
+            return
+        if stats.ttft_ms is not None:
+            ttft_seconds.observe(stats.ttft_ms / 1000, *labels)
+        if stats.duration_ms is not None:
+            generation_seconds.observe(stats.duration_ms / 1000, *labels)
+            if stats.response_tokens and stats.ttft_ms is not None:
+                streaming_seconds = (stats.duration_ms - stats.ttft_ms) / 1000
+                if streaming_seconds > 0:
+                    tokens_per_second.observe(
+                        stats.response_tokens / streaming_seconds, *labels
+                    )
+
+        for kind, tokens in (
+            ("prompt", stats.request_tokens),
+            ("completion", stats.response_tokens),
+            ("cached_prompt", stats.cached_prompt_tokens),
+            ("hedge_prompt", stats.hedge_prompt_tokens),
+            ("hedge_completion", stats.hedge_completion_tokens),
+        ):
+            if tokens:
+                tokens_total.inc(*labels, kind, amount=tokens)
+        if stats.cost_usd:
+            cost_usd_total.inc(*labels, amount=stats.cost_usd)
+        if stats.hedged:
+            hedged_runs_total.inc(*labels)
+
+
+class ConsoleSink(EventSink):
+    """
+    Console sink printing the live stream to stdout.
+
+    This is meant for local development and is disabled by default.
+    """
+
+    name = "console"
+
+    async def handle(self, event: StreamEvent) -> None:
+        if isinstance(event, TokenDelta):
+            print(event.delta, end="", flush=True)
+        elif isinstance(event, AgentSwitched):
+            print(f"\n🔄 Switching to {event.display_name}")
+        elif isinstance(event, RunStarted):
+            print(f"\n{'='*50}")
+            print(f"🤖 Active Agent: {event.display_name}")
+            print(f"{'='*50}\n")
+        elif isinstance(event, RunFinished):
+            print(f"\n\n✅ {event.display_name} completed!")
+            print("=" * 60)
+        elif isinstance(event, RunFailed):
+            print(f"❌ Error in {event.display_name}: {event.error}")
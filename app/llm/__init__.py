@@ -4,6 +4,55 @@ This module provides language model instances and utilities
 for agent communication and processing.
 """
 
-from .llm import model, get_model
+from .llm import get_model, get_shared_model, get_default_model
+from .http_client import SharedHTTPClient, shared_http_client
+from .tokens import TokenCounter, token_counter
+from .budget import ContextBudgetManager, get_context_limit
+from .router import ModelRouter, RouteDecision, RoutePolicy, get_model_profile
+from .hedging import Hedger
+from .resilience import CircuitBreaker, ResilientCaller, classify_error
+from .scheduler import TokenBucket, ScheduledRun, RequestScheduler, request_scheduler
+from .usage import (
+    UsageTotals,
+    UsageLedger,
+    estimate_cost,
+    usage_metadata,
+    usage_ledger,
+)
 
-__all__ = ["model", "get_model"]
+__all__ = [
+    "model",
+    "get_model",
+    "get_shared_model",
+    "get_default_model",
+    "SharedHTTPClient",
+    "shared_http_client",
+    "TokenCounter",
+    "token_counter",
+    "ContextBudgetManager",
+    "get_context_limit",
+    "ModelRouter",
+    "RouteDecision",
+    "RoutePolicy",
+    "get_model_profile",
+    "Hedger",
+    "CircuitBreaker",
+    "ResilientCaller",
+    "classify_error",
+    "TokenBucket",
+    "ScheduledRun",
+    "RequestScheduler",
+    "request_scheduler",
+    "UsageTotals",
+    "UsageLedger",
+    "estimate_cost",
+    "usage_metadata",
+    "usage_ledger",
+]
+
+
+def __getattr__(name: str):
+    # The default model is built lazily on first access
+    if name == "model":
+        return get_default_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
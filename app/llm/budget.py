@@ -0,0 +1,169 @@
+"""Context-window budget management.
+
+This module sizes every prompt before it is sent: it knows the context
+window of the configured model, trims the oldest history to make room
+for the response, and rejects prompts that cannot fit at all instead of
+letting the provider fail after a full round-trip.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from pydantic_ai.messages import ModelMessage, ModelRequest, UserPromptPart
+
+from app.core import CONFIG, ContextBudgetExceeded, PromptSize
+from .tokens import TokenCounter, token_counter
+
+
+__all__ = ["ContextBudgetManager", "MODEL_CONTEXT_LIMITS", "get_context_limit"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# Context windows by model name prefix; the longest matching prefix wins
+MODEL_CONTEXT_LIMITS = {
+    "openai/gpt-4.1": 1_047_576,
+    "openai/gpt-4o": 128_000,
+    "openai/gpt-4-turbo": 128_000,
+    "openai/gpt-3.5-turbo": 16_385,
+    "openai/o1": 200_000,
+    "openai/o3": 200_000,
+    "openai/o4": 200_000,
+    "anthropic/claude": 200_000,
+    "google/gemini": 1_048_576,
+    "meta-llama/llama-3": 131_072,
+    "mistralai/": 32_768,
+    "deepseek/": 64_000,
+}
+
+DEFAULT_CONTEXT_LIMIT = 32_768
+
+
+def get_context_limit(model_name: str) -> int:
+    """
+    Get the context window of a model.
+
+    Args:
+        model_name: OpenRouter model name
+
+    Returns:
+        The configured context window, the known window for the model,
+        or a conservative default
+    """
+    if CONFIG.context_window_tokens:
+        return CONFIG.context_window_tokens
+
+    matches = [
+        prefix for prefix in MODEL_CONTEXT_LIMITS if model_name.startswith(prefix)
+    ]
+    if not matches:
+        return DEFAULT_CONTEXT_LIMIT
+    return MODEL_CONTEXT_LIMITS[max(matches, key=len)]
+
+
+def _is_turn_start(message: ModelMessage) -> bool:
+    return isinstance(message, ModelRequest) and any(
+        isinstance(part, UserPromptPart) for part in message.parts
+    )
+
+
+class ContextBudgetManager:
+    """
+    Fits prompts into the model's context window.
+
+    The system prompt and user input are never trimmed. History is
+    trimmed from the oldest user turn forward; leading messages without a
+    user prompt (such as the rolling summary) are always kept.
+    """
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        reserved_output_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize the ContextBudgetManager.
+
+        Args:
+            counter: Token counter to use. Defaults to the global counter
+            reserved_output_tokens: Tokens kept free for the response. Defaults to configuration
+        """
+        self.counter = counter or token_counter
+        self.reserved_output_tokens = (
+            reserved_output_tokens
+            if reserved_output_tokens is not None
+            else CONFIG.reserved_output_tokens
+        )
+
+    def fit(
+        self,
+        system_prompt: str,
+        history: List[ModelMessage],
+        user_input: str,
+        model_name: Optional[str] = None,
+    ) -> Tuple[List[ModelMessage], PromptSize]:
+        """
+        Trim history so the prompt fits the context window.
+
+        Args:
+            system_prompt: The agent's system prompt
+            history: History that would be sent with the run
+            user_input: The user's message
+            model_name: Model the prompt is for. Defaults to configuration
+
+        Returns:
+            Tuple of (history to send, computed prompt size)
+
+        Raises:
+            ContextBudgetExceeded: If the system prompt and user input alone do not fit
+        """
+        model_name = model_name or CONFIG.model_name
+        context_limit = get_context_limit(model_name)
+        available = context_limit - self.reserved_output_tokens
+
+        system_tokens = self.counter.count_prompt(system_prompt, model_name)
+        input_tokens = self.counter.count_text(user_input, model_name)
+        fixed_tokens = system_tokens + input_tokens
+        if fixed_tokens > available:
+            raise ContextBudgetExceeded(fixed_tokens, available)
+
+        counts = [
+            self.counter.count_message(message, model_name) for message in history
+        ]
+        history_tokens = sum(counts)
+
+        # Leading non-turn messages (the rolling summary) are never trimmed
+        first_turn = next(
+            (i for i, message in enumerate(history) if _is_turn_start(message)),
+            len(history),
+        )
+        kept = list(history)
+        trimmed = 0
+        while fixed_tokens + history_tokens > available:
+            turn_starts = [
+                i for i in range(first_turn, len(kept)) if _is_turn_start(kept[i])
+            ]
+            if not turn_starts:
+                break
+            # Drop the oldest turn, up to the start of the next one
+            end = turn_starts[1] if len(turn_starts) > 1 else len(kept)
+            history_tokens -= sum(counts[first_turn:end])
+            trimmed += end - first_turn
+            del kept[first_turn:end]
+            del counts[first_turn:end]
+
+        if fixed_tokens + history_tokens > available:
+            raise ContextBudgetExceeded(fixed_tokens + history_tokens, available)
+
+        if trimmed:
+            logger.info(f"Trimmed {trimmed} history messages to fit the context window")
+
+        return kept, PromptSize(
+            system_tokens=system_tokens,
+            history_tokens=history_tokens,
+            input_tokens=input_tokens,
+            total_tokens=fixed_tokens + history_tokens,
+            context_limit=context_limit,
+            trimmed_messages=trimmed,
+        )
@@ -0,0 +1,209 @@
+"""Hedged requests to cut time-to-first-token tail latency.
+
+This module races a duplicate request against a slow one. If the primary
+request has not produced a first token within the hedge delay, a second
+request is sent, whichever streams first is forwarded to the caller and
+the other is cancelled. The delay is fixed or learned as a percentile of
+recent time-to-first-token, and the share of hedged requests is capped.
+Cancelled requests are still billed by the provider, so they are reported
+to the caller for accounting.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from app.core import CONFIG
+
+
+__all__ = ["Hedger"]
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+DeltaCallback = Callable[[str], None]
+# Receives the model and the text streamed so far of a cancelled request
+CancelCallback = Callable[[str, str], None]
+StartRequest = Callable[[str, DeltaCallback], Awaitable[T]]
+
+
+# Latency samples needed before the learned delay replaces the initial delay
+MIN_DELAY_SAMPLES = 20
+
+
+class Hedger:
+    """
+    Races a hedge request against a slow primary request.
+
+    Counts of hedged requests and hedge wins are available through
+    ``stats``.
+    """
+
+    def __init__(self):
+        """Initialize the Hedger."""
+        self._ttft_ms: Deque[float] = deque(maxlen=CONFIG.hedge_window)
+        self._hedged: Deque[bool] = deque(maxlen=CONFIG.hedge_window)
+        self.requests = 0
+        self.fired = 0
+        self.won = 0
+        self.skipped = 0
+
+    def delay_ms(self) -> float:
+        """Get the time to wait for a first token before hedging."""
+        if CONFIG.hedge_delay_ms is not None:
+            return CONFIG.hedge_delay_ms
+        if len(self._ttft_ms) < MIN_DELAY_SAMPLES:
+            return CONFIG.hedge_initial_delay_ms
+
+        samples = sorted(self._ttft_ms)
+        index = min(
+            len(samples) - 1, math.ceil(CONFIG.hedge_percentile * len(samples)) - 1
+        )
+        return max(CONFIG.hedge_min_delay_ms, samples[index])
+
+    def _within_budget(self) -> bool:
+        """Check whether one more hedge stays within the maximum hedge rate."""
+        window = len(self._hedged) + 1
+        return (sum(self._hedged) + 1) / window <= CONFIG.hedge_max_rate
+
+    async def run(
+        self,
+        primary_model: str,
+        hedge_model: str,
+        start: StartRequest,
+        on_delta: DeltaCallback,
+        on_cancelled: Optional[CancelCallback] = None,
+    ) -> Tuple[T, str, bool]:
+        """
+        Run a request, hedging it if its first token is slow.
+
+        Deltas of a request are forwarded only once it has won the race;
+        the losing request is cancelled.
+
+        Args:
+            primary_model: Model of the primary request
+            hedge_model: Model of the hedge request
+            start: Coroutine function starting a request on a model with a delta callback
+            on_delta: Callback receiving the winning request's deltas
+            on_cancelled: Optional callback receiving the model and streamed
+                text of every request cancelled while in flight
+
+        Returns:
+            Tuple of (winning request's result, model that served it,
+            whether a hedge was sent)
+
+        Raises:
+            Exception: The last error, if every request failed before streaming
+        """
+        self.requests += 1
+        started = time.perf_counter()
+        models: List[str] = []
+        tasks: List[asyncio.Task] = []
+        # Text of the requests that have not won, in case they are cancelled
+        streamed: List[List[str]] = []
+        winner: Optional[int] = None
+        first_token = asyncio.Event()
+
+        def forward(index: int) -> DeltaCallback:
+            def callback(delta: str) -> None:
+                nonlocal winner
+                if winner is None:
+                    winner = index
+                    self._ttft_ms.append((time.perf_counter() - started) * 1000)
+                    first_token.set()
+                if winner == index:
+                    on_delta(delta)
+                else:
+                    streamed[index].append(delta)
+
+            return callback
+
+        def launch(model_name: str) -> None:
+            models.append(model_name)
+            streamed.append([])
+            tasks.append(asyncio.create_task(start(model_name, forward(len(tasks)))))
+
+        launch(primary_model)
+        hedge_at = time.perf_counter() + self.delay_ms() / 1000
+        errors: List[Exception] = []
+
+        try:
+            while winner is None:
+                pending = [task for task in tasks if not task.done()]
+                if not pending:
+                    raise errors[-1]
+
+                timeout = None
+                if len(tasks) == 1 and hedge_at != math.inf:
+                    timeout = max(0.0, hedge_at - time.perf_counter())
+
+                waiter = asyncio.create_task(first_token.wait())
+                done, _ = await asyncio.wait(
+                    [*pending, waiter],
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                waiter.cancel()
+
+                if winner is not None:
+                    break
+
+                for index, task in enumerate(tasks):
+                    if task not in done:
+                        continue
+                    if task.exception() is None:
+                        # Finished without streaming text, e.g. an empty response
+                        winner = index
+                        break
+                    errors.append(task.exception())
+                    logger.warning(
+                        f"Request to {models[index]} failed before streaming: "
+                        f"{task.exception()}"
+                    )
+
+                if winner is None and len(tasks) == 1 and not done:
+                    # The first token is late
+                    if self._within_budget():
+                        self.fired += 1
+                        logger.info(
+                            f"Hedging {primary_model} with {hedge_model} after "
+                            f"{(time.perf_counter() - started) * 1000:.0f}ms"
+                        )
+                        launch(hedge_model)
+                    else:
+                        self.skipped += 1
+                        # Over budget, keep waiting on the primary alone
+                        hedge_at = math.inf
+        finally:
+            self._hedged.append(len(tasks) > 1)
+            for index, task in enumerate(tasks):
+                if index == winner:
+                    continue
+                if task.done():
+                    if not task.cancelled():
+                        task.exception()  # Mark a late failure as retrieved
+                    continue
+                task.cancel()
+                if on_cancelled is not None:
+                    on_cancelled(models[index], "".join(streamed[index]))
+
+        if winner == 1:
+            self.won += 1
+        return await tasks[winner], models[winner], len(tasks) > 1
+
+    def stats(self) -> Dict[str, float]:
+        """Get hedge counts and the current hedge delay."""
+        return {
+            "requests": self.requests,
+            "fired": self.fired,
+            "won": self.won,
+            "skipped": self.skipped,
+            "fire_rate": self.fired / self.requests if self.requests else 0.0,
+            "win_rate": self.won / self.fired if self.fired else 0.0,
+            "delay_ms": self.delay_ms(),
+        }
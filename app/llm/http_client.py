@@ -0,0 +1,177 @@
+"""Shared HTTP client for model provider requests.
+
+This module owns the single pooled async HTTP client used by every
+agent. Pool size, keep-alive, HTTP/2 and timeouts come from
+configuration, and request counts and a best-effort view of connection
+pool usage are observable through ``SharedHTTPClient.stats``. Every
+request of a scheduled agent run takes a request slot from the request
+scheduler before it is sent.
+"""
+
+import importlib.util
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from app.core import CONFIG
+from .scheduler import request_scheduler
+
+
+__all__ = ["SharedHTTPClient", "shared_http_client"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Connection-pooling transport that rate limits, counts requests and pool waits."""
+
+    def __init__(self, max_connections: int, **kwargs):
+        super().__init__(**kwargs)
+        self.max_connections = max_connections
+        self.requests = 0
+        self.waits = 0
+        self._pool_readable = True
+
+    def pool_usage(self) -> Optional[Dict[str, int]]:
+        """
+        Get the connection pool's usage, best-effort.
+
+        httpx and httpcore keep the pool's connections and queued requests
+        private, so this reads internals that a new version may change.
+        When it cannot, it logs once and returns None from then on.
+
+        Returns:
+            Connection, in-use, idle, available and queued counts, or None
+        """
+        if not self._pool_readable:
+            return None
+        try:
+            pool = self._pool
+            connections = list(pool.connections)
+            idle = sum(1 for connection in connections if connection.is_idle())
+            available = sum(
+                1 for connection in connections if connection.is_available()
+            )
+            queued = sum(1 for request in pool._requests if request.is_queued())
+        except (AttributeError, TypeError) as e:
+            logger.warning(f"Connection pool usage is unavailable: {e}")
+            self._pool_readable = False
+            return None
+        return {
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "available": available,
+            "queued": queued,
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request_scheduler.acquire_request()
+        self.requests += 1
+        usage = self.pool_usage()
+        if (
+            usage is not None
+            and usage["connections"] >= self.max_connections
+            and not usage["available"]
+        ):
+            # Every connection is busy, so this request queues for one
+            self.waits += 1
+        return await super().handle_async_request(request)
+
+
+class SharedHTTPClient:
+    """
+    Application-wide pooled HTTP client.
+
+    The client is created on first use and reused by all providers, so
+    connections and TLS sessions are kept alive across agent runs.
+    """
+
+    def __init__(self):
+        """Initialize the SharedHTTPClient."""
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[_InstrumentedTransport] = None
+
+    def get(self) -> httpx.AsyncClient:
+        """
+        Get the shared client, creating it on first use.
+
+        Returns:
+            The pooled httpx.AsyncClient
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Build the client from configuration."""
+        http2 = CONFIG.http2_enabled
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=CONFIG.http_max_connections,
+            max_keepalive_connections=CONFIG.http_max_keepalive_connections,
+            keepalive_expiry=CONFIG.http_keepalive_expiry_seconds,
+        )
+        timeout = httpx.Timeout(
+            connect=CONFIG.http_connect_timeout_seconds,
+            read=CONFIG.http_read_timeout_seconds,
+            write=CONFIG.http_write_timeout_seconds,
+            pool=CONFIG.http_pool_timeout_seconds,
+        )
+        # One SSL context for all connections, so CA certificates load once
+        self._transport = _InstrumentedTransport(
+            CONFIG.http_max_connections,
+            verify=httpx.create_ssl_context(),
+            http2=http2,
+            limits=limits,
+        )
+        logger.info(
+            f"Created shared HTTP client (max {CONFIG.http_max_connections} "
+            f"connections, http2={http2})"
+        )
+        return httpx.AsyncClient(transport=self._transport, timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get request counts and connection pool usage of the shared client.
+
+        Pool figures are best-effort and left out when the pool's internals
+        cannot be read; see ``_InstrumentedTransport.pool_usage``.
+        """
+        if self._transport is None:
+            return {
+                "requests": 0,
+                "waits": 0,
+                "connections": 0,
+                "in_use": 0,
+                "idle": 0,
+                "queued": 0,
+            }
+
+        stats = {"requests": self._transport.requests, "waits": self._transport.waits}
+        usage = self._transport.pool_usage()
+        if usage is not None:
+            stats.update(
+                connections=usage["connections"],
+                in_use=usage["in_use"],
+                idle=usage["idle"],
+                queued=usage["queued"],
+            )
+        return stats
+
+    async def aclose(self) -> None:
+        """Close the client and all pooled connections."""
+        if self._client is not None:
+            logger.info(f"Closing shared HTTP client: {self.stats()}")
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
+
+
+# Global shared HTTP client instance
+shared_http_client = SharedHTTPClient()
@@ -1,42 +1,92 @@
 """Language Model configuration and initialization.
 
 This module handles the setup and configuration of the language model
-used by all agents in the application using PydanticAI.
+used by all agents in the application using PydanticAI. The default
+model is built on first use, so importing the application does not pay
+for the OpenAI SDK or the provider client.
 """
 
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openrouter import OpenRouterProvider
+from typing import TYPE_CHECKING, Dict, Optional
 from app.core import CONFIG
+from .http_client import shared_http_client
 import logging
 
+if TYPE_CHECKING:
+    from pydantic_ai.models.openai import OpenAIModel
 
-__all__ = ["get_model", "model"]
+
+__all__ = ["get_model", "get_shared_model", "get_default_model", "model"]
 
 
 logger = logging.getLogger(__name__)
 
 
-def get_model() -> OpenAIModel:
+# Shared model instances keyed by model name
+_models: Dict[str, "OpenAIModel"] = {}
+
+
+def get_model(model_name: Optional[str] = None) -> "OpenAIModel":
     """Get a configured PydanticAI model instance.
 
+    Args:
+        model_name: OpenRouter model name. Defaults to configuration
+
     Returns:
         Configured PydanticAI OpenAIModel using OpenRouter
 
     Raises:
         ValueError: If required configuration is missing
     """
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.providers.openrouter import OpenRouterProvider
+    from .prompt_cache import CacheControlOpenAIModel, needs_cache_control
+
     try:
         if not CONFIG.openrouter_api_key:
             raise ValueError("OpenRouter API key is required")
 
-        return OpenAIModel(
-            CONFIG.model_name,
-            provider=OpenRouterProvider(api_key=CONFIG.openrouter_api_key),
+        model_name = model_name or CONFIG.model_name
+        # Models without automatic prefix caching need explicit cache markers
+        model_class = (
+            CacheControlOpenAIModel if needs_cache_control(model_name) else OpenAIModel
+        )
+        return model_class(
+            model_name,
+            provider=OpenRouterProvider(
+                api_key=CONFIG.openrouter_api_key,
+                http_client=shared_http_client.get(),
+            ),
         )
     except Exception as e:
         logger.error(f"Failed to initialize model: {e}")
         raise
 
 
-# Global model instance
-model = get_model()
+def get_shared_model(model_name: str) -> "OpenAIModel":
+    """Get the shared instance of a model, creating it on first use.
+
+    Args:
+        model_name: OpenRouter model name
+
+    Returns:
+        The application-wide PydanticAI model of that name
+    """
+    if model_name not in _models:
+        _models[model_name] = get_model(model_name)
+    return _models[model_name]
+
+
+def get_default_model() -> "OpenAIModel":
+    """Get the shared default model, creating it on first use.
+
+    Returns:
+        The application-wide PydanticAI model
+    """
+    return get_shared_model(CONFIG.model_name)
+
+
+def __getattr__(name: str):
+    # Keep `llm.model` working without building the model at import time
+    if name == "model":
+        return get_default_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,91 @@
+"""Provider prompt caching for the static prefix of agent requests.
+
+Every request starts with the agent's system prompt followed by the
+conversation history, and only the newest user message changes between
+turns. Providers with automatic prefix caching (OpenAI, DeepSeek, Gemini
+Flash) reuse that prefix as long as it is byte-identical; providers that
+need explicit markers (Anthropic, Gemini Pro through OpenRouter) are sent
+``cache_control`` breakpoints at the end of the system prompt and at the
+end of the history.
+"""
+
+from typing import Any, Dict, List
+
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.openai import OpenAIModel
+
+from app.core import CONFIG
+
+
+__all__ = [
+    "CacheControlOpenAIModel",
+    "add_cache_breakpoints",
+    "needs_cache_control",
+]
+
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def needs_cache_control(model_name: str) -> bool:
+    """
+    Check whether a model only caches prompts marked with ``cache_control``.
+
+    Args:
+        model_name: OpenRouter model name
+
+    Returns:
+        True if prompt caching is enabled and the model needs explicit markers
+    """
+    return CONFIG.prompt_cache_enabled and any(
+        model_name.startswith(prefix) for prefix in CONFIG.prompt_cache_model_prefixes
+    )
+
+
+def _mark(message: Dict[str, Any]) -> bool:
+    """Put a cache breakpoint at the end of a chat message's content."""
+    content = message.get("content")
+    if isinstance(content, str) and content:
+        message["content"] = [
+            {"type": "text", "text": content, "cache_control": CACHE_CONTROL}
+        ]
+        return True
+    if isinstance(content, list) and content and content[-1].get("type") == "text":
+        content[-1] = {**content[-1], "cache_control": CACHE_CONTROL}
+        return True
+    return False
+
+
+def add_cache_breakpoints(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Mark the cacheable prefix of a chat completion request.
+
+    The first breakpoint ends the agent's system prompt, which is the
+    same for every thread; the second ends the history before the newest
+    message, which is the same for the next turn of the thread.
+
+    Args:
+        messages: Chat completion messages, in request order
+
+    Returns:
+        The messages, with at most two text contents marked
+    """
+    if messages and messages[0].get("role") == "system":
+        _mark(messages[0])
+
+    # The newest message is the only part that is never reused
+    for message in reversed(messages[1:-1]):
+        if _mark(message):
+            break
+    return messages
+
+
+class CacheControlOpenAIModel(OpenAIModel):
+    """OpenAI-compatible model that marks the cacheable request prefix."""
+
+    async def _map_messages(
+        self, messages: List[ModelMessage], *args: Any, **kwargs: Any
+    ) -> List[Any]:
+        return add_cache_breakpoints(
+            await super()._map_messages(messages, *args, **kwargs)
+        )
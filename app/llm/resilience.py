@@ -0,0 +1,305 @@
+"""Retries, timeouts and circuit breaking for provider requests.
+
+This module wraps every provider request with a first-token timeout and
+a total timeout (connect timeouts are set on the shared HTTP client),
+retries retryable failures with jittered exponential backoff as long as
+no token has been streamed and no tool has changed state, and keeps a
+circuit breaker per model that fails fast while the model's provider is
+degraded or keeps rejecting requests. Failures are raised as typed
+``ProviderError`` subclasses.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from app.core import CONFIG, CircuitOpenError, ProviderError, ProviderTimeout
+from .scheduler import request_scheduler
+
+
+__all__ = ["CircuitBreaker", "ResilientCaller", "classify_error"]
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+DeltaCallback = Callable[[str], None]
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def classify_error(model_name: str, error: Exception) -> ProviderError:
+    """
+    Convert a provider failure into a typed error.
+
+    Args:
+        model_name: Model the request was sent to
+        error: The raised exception
+
+    Returns:
+        The error as a ProviderError, marked retryable where appropriate
+    """
+    if isinstance(error, ProviderError):
+        return error
+
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        retryable = status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+        typed = ProviderError(model_name, f"HTTP {status_code}: {error}", retryable)
+    else:
+        # SDK connection errors wrap the underlying httpx transport error
+        cause: Optional[BaseException] = error
+        while cause is not None and not isinstance(cause, httpx.TransportError):
+            cause = cause.__cause__
+        typed = ProviderError(model_name, str(error), retryable=cause is not None)
+
+    typed.__cause__ = error
+    return typed
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker of one model.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail fast for ``reset_seconds``. Then a single trial request
+    is let through: its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(self, model_name: str, failure_threshold: int, reset_seconds: float):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            model_name: Model guarded by the breaker
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Time the circuit stays open
+        """
+        self.model_name = model_name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opens = 0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state: ``closed``, ``open`` or ``half_open``."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def acquire(self) -> bool:
+        """
+        Check that a request may be sent.
+
+        Returns:
+            True if the request is the half-open trial request
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a trial is already running
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        retry_after = max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+        raise CircuitOpenError(self.model_name, retry_after)
+
+    def release(self, trial: bool) -> None:
+        """Release the trial slot taken by ``acquire``."""
+        if trial:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        if self.opened_at is not None:
+            logger.info(f"Circuit closed for {self.model_name}")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+                logger.warning(
+                    f"Circuit opened for {self.model_name} after "
+                    f"{self.failures} consecutive failures"
+                )
+            self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+    Runs provider requests with timeouts, retries and circuit breaking.
+
+    Retry, timeout and circuit counts are available through ``stats``.
+    """
+
+    def __init__(self):
+        """Initialize the ResilientCaller."""
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def get_breaker(self, model_name: str) -> CircuitBreaker:
+        """Get the circuit breaker of a model, creating it on first use."""
+        breaker = self._breakers.get(model_name)
+        if breaker is None:
+            breaker = self._breakers[model_name] = CircuitBreaker(
+                model_name,
+                CONFIG.circuit_failure_threshold,
+                CONFIG.circuit_reset_seconds,
+            )
+        return breaker
+
+    async def call(
+        self,
+        model_name: str,
+        start: Callable[[DeltaCallback], Awaitable[T]],
+        on_delta: DeltaCallback,
+        committed: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        """
+        Run a streaming provider request with retries.
+
+        Args:
+            model_name: Model the request is sent to
+            start: Coroutine function starting the request with a delta callback
+            on_delta: Callback receiving each new text delta
+            committed: Tells whether the request had effects besides its
+                text, such as tool calls, that a retry would repeat
+
+        Returns:
+            The request's result
+
+        Raises:
+            ProviderError: If the request failed, timed out or the circuit is open
+        """
+        breaker = self.get_breaker(model_name)
+
+        for attempt in range(1, CONFIG.retry_max_attempts + 1):
+            try:
+                trial = breaker.acquire()
+            except CircuitOpenError:
+                self.rejected += 1
+                raise
+
+            streamed = False
+
+            def forward(delta: str) -> None:
+                nonlocal streamed
+                streamed = True
+                on_delta(delta)
+
+            try:
+                # Wait for a rate limit slot before the attempt's timeouts start
+                async with request_scheduler.attempt():
+                    result = await self._attempt(model_name, start, forward)
+            except Exception as e:
+                error = classify_error(model_name, e)
+                if isinstance(error, ProviderTimeout):
+                    self.timeouts += 1
+                if error.retryable or isinstance(getattr(e, "status_code", None), int):
+                    # Rejections count too, or a model failing every request
+                    # with a client error would never trip its circuit
+                    breaker.record_failure()
+                if (
+                    streamed
+                    or (committed is not None and committed())
+                    or not error.retryable
+                    or attempt == CONFIG.retry_max_attempts
+                ):
+                    raise error
+
+                delay = self._backoff(attempt)
+                self.retries += 1
+                logger.warning(
+                    f"Attempt {attempt} on {model_name} failed ({error}), "
+                    f"retrying in {delay * 1000:.0f}ms"
+                )
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                breaker.release(trial)
+
+            breaker.record_success()
+            return result
+
+    async def _attempt(
+        self,
+        model_name: str,
+        start: Callable[[DeltaCallback], Awaitable[T]],
+        on_delta: DeltaCallback,
+    ) -> T:
+        """Run one attempt under the first-token and total timeouts."""
+        first_token = asyncio.Event()
+
+        def forward(delta: str) -> None:
+            first_token.set()
+            on_delta(delta)
+
+        started = time.monotonic()
+        task = asyncio.create_task(start(forward))
+        try:
+            waiter = asyncio.create_task(first_token.wait())
+            done, _ = await asyncio.wait(
+                [task, waiter],
+                timeout=CONFIG.first_token_timeout_seconds,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            waiter.cancel()
+            if not done:
+                raise ProviderTimeout(
+                    model_name, "first_token", CONFIG.first_token_timeout_seconds
+                )
+
+            remaining = CONFIG.run_timeout_seconds - (time.monotonic() - started)
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), max(0.0, remaining))
+            except asyncio.TimeoutError:
+                raise ProviderTimeout(
+                    model_name, "total", CONFIG.run_timeout_seconds
+                ) from None
+        finally:
+            if not task.done():
+                task.cancel()
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff in seconds."""
+        ceiling = min(
+            CONFIG.retry_max_delay_ms, CONFIG.retry_base_delay_ms * 2 ** (attempt - 1)
+        )
+        return random.uniform(0, ceiling) / 1000
+
+    def stats(self) -> Dict[str, object]:
+        """Get retry, timeout and circuit counts."""
+        return {
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "circuits": {
+                name: {
+                    "state": breaker.state,
+                    "failures": breaker.failures,
+                    "opens": breaker.opens,
+                }
+                for name, breaker in self._breakers.items()
+            },
+        }
@@ -0,0 +1,346 @@
+"""Latency- and cost-aware model routing.
+
+This module picks the model of each turn from a configured pool. Every
+agent has a routing policy that sets the minimum model capability for
+light and heavy turns; among capable models that fit the prompt, the one
+with the lowest expected cost plus latency penalty wins and the others
+become fallbacks. Rolling time-to-first-token and error statistics are
+kept per model, and every decision and its outcome are logged. Error
+rates decay over time, so a model demoted for failing is routed to
+again once its errors are old enough.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from pydantic_ai.messages import ModelMessage
+
+from app.core import CONFIG
+from .budget import get_context_limit
+from .tokens import TokenCounter, token_counter
+
+
+__all__ = [
+    "ModelProfile",
+    "MODEL_PROFILES",
+    "get_model_profile",
+    "RoutePolicy",
+    "RouteDecision",
+    "ModelRouter",
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModelProfile(BaseModel):
+    """Capability tier and pricing of a model."""
+
+    capability: int = Field(
+        ..., description="Capability tier: 1 small, 2 medium, 3 frontier"
+    )
+    input_cost: float = Field(..., description="USD per million prompt tokens")
+    output_cost: float = Field(..., description="USD per million completion tokens")
+    cached_input_cost: Optional[float] = Field(
+        default=None,
+        description="USD per million prompt tokens read from the provider's prompt "
+        "cache. Defaults to input_cost",
+    )
+
+
+# Model profiles by model name prefix; the longest matching prefix wins
+MODEL_PROFILES = {
+    "openai/gpt-4.1": ModelProfile(
+        capability=3, input_cost=2.0, output_cost=8.0, cached_input_cost=0.5
+    ),
+    "openai/gpt-4.1-mini": ModelProfile(
+        capability=2, input_cost=0.4, output_cost=1.6, cached_input_cost=0.1
+    ),
+    "openai/gpt-4.1-nano": ModelProfile(
+        capability=1, input_cost=0.1, output_cost=0.4, cached_input_cost=0.025
+    ),
+    "openai/gpt-4o": ModelProfile(
+        capability=3, input_cost=2.5, output_cost=10.0, cached_input_cost=1.25
+    ),
+    "openai/gpt-4o-mini": ModelProfile(
+        capability=2, input_cost=0.15, output_cost=0.6, cached_input_cost=0.075
+    ),
+    "anthropic/claude-3.5-haiku": ModelProfile(
+        capability=2, input_cost=0.8, output_cost=4.0, cached_input_cost=0.08
+    ),
+    "anthropic/claude-3.5-sonnet": ModelProfile(
+        capability=3, input_cost=3.0, output_cost=15.0, cached_input_cost=0.3
+    ),
+    "anthropic/claude-3.7-sonnet": ModelProfile(
+        capability=3, input_cost=3.0, output_cost=15.0, cached_input_cost=0.3
+    ),
+    "anthropic/claude-sonnet-4": ModelProfile(
+        capability=3, input_cost=3.0, output_cost=15.0, cached_input_cost=0.3
+    ),
+    "google/gemini-2.0-flash": ModelProfile(
+        capability=2, input_cost=0.1, output_cost=0.4, cached_input_cost=0.025
+    ),
+    "google/gemini-2.5-flash": ModelProfile(
+        capability=2, input_cost=0.3, output_cost=2.5, cached_input_cost=0.075
+    ),
+    "google/gemini-2.5-pro": ModelProfile(
+        capability=3, input_cost=1.25, output_cost=10.0, cached_input_cost=0.31
+    ),
+}
+
+DEFAULT_MODEL_PROFILE = ModelProfile(capability=2, input_cost=1.0, output_cost=4.0)
+
+
+def get_model_profile(model_name: str) -> ModelProfile:
+    """
+    Get the capability and pricing of a model.
+
+    Args:
+        model_name: OpenRouter model name
+
+    Returns:
+        The known profile of the model, or a mid-tier default
+    """
+    matches = [prefix for prefix in MODEL_PROFILES if model_name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_MODEL_PROFILE
+    return MODEL_PROFILES[max(matches, key=len)]
+
+
+class RoutePolicy(BaseModel):
+    """Per-agent routing policy."""
+
+    light_capability: int = Field(
+        default=1, description="Minimum model capability for light turns"
+    )
+    heavy_capability: int = Field(
+        default=3, description="Minimum model capability for heavy turns"
+    )
+    heavy_input_tokens: int = Field(
+        default_factory=lambda: CONFIG.router_heavy_input_tokens,
+        description="User input size from which a turn is heavy",
+    )
+    heavy_history_tokens: int = Field(
+        default_factory=lambda: CONFIG.router_heavy_history_tokens,
+        description="History size from which a turn is heavy",
+    )
+    expected_output_tokens: int = Field(
+        default=800, description="Typical response length used for cost estimates"
+    )
+
+
+class RouteDecision(BaseModel):
+    """Model chosen for a turn, with its fallbacks and the reason."""
+
+    agent_name: str = Field(..., description="Workflow agent name")
+    model: str = Field(..., description="Model chosen for the turn")
+    fallbacks: List[str] = Field(
+        default_factory=list, description="Models to try, in order, if it fails"
+    )
+    heavy: bool = Field(default=False, description="Whether the turn was heavy")
+    prompt_tokens: int = Field(default=0, description="Estimated prompt tokens")
+    reason: str = Field(default="", description="Why the model was chosen")
+
+    @property
+    def candidates(self) -> List[str]:
+        """The chosen model followed by its fallbacks."""
+        return [self.model, *self.fallbacks]
+
+
+class _ModelStats:
+    """Rolling latency and error statistics of one model."""
+
+    __slots__ = ("ttft_ms", "_error_rate", "_updated_at", "samples")
+
+    def __init__(self):
+        self.ttft_ms: Optional[float] = None
+        self._error_rate = 0.0
+        self._updated_at = time.monotonic()
+        self.samples = 0
+
+    @property
+    def error_rate(self) -> float:
+        """Rolling error rate, halved every half-life without new outcomes."""
+        elapsed = time.monotonic() - self._updated_at
+        return self._error_rate * 0.5 ** (
+            elapsed / CONFIG.router_error_half_life_seconds
+        )
+
+    def record(self, ttft_ms: Optional[float], ok: bool, alpha: float) -> None:
+        self.samples += 1
+        error_rate = self.error_rate
+        self._error_rate = error_rate + alpha * ((0.0 if ok else 1.0) - error_rate)
+        self._updated_at = time.monotonic()
+        if ttft_ms is not None:
+            self.ttft_ms = (
+                ttft_ms
+                if self.ttft_ms is None
+                else self.ttft_ms + alpha * (ttft_ms - self.ttft_ms)
+            )
+
+
+class ModelRouter:
+    """
+    Chooses a model per agent and turn.
+
+    When routing is disabled or no pool is configured, every turn goes to
+    ``CONFIG.model_name``.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, RoutePolicy]] = None,
+        counter: Optional[TokenCounter] = None,
+    ):
+        """
+        Initialize the ModelRouter.
+
+        Args:
+            policies: Routing policies keyed by agent name
+            counter: Token counter used to size turns. Defaults to the shared counter
+        """
+        self.policies = policies or {}
+        self.counter = counter or token_counter
+        self._stats: Dict[str, _ModelStats] = {}
+
+    def get_policy(self, agent_name: str) -> RoutePolicy:
+        """Get an agent's routing policy, falling back to the default policy."""
+        policy = self.policies.get(agent_name)
+        if policy is None:
+            policy = self.policies[agent_name] = RoutePolicy()
+        return policy
+
+    def pool(self) -> List[str]:
+        """Get the models available for routing, ending with the configured model."""
+        models = [name for name in CONFIG.router_models if name != CONFIG.model_name]
+        return [*models, CONFIG.model_name]
+
+    def route(
+        self, agent_name: str, user_input: str, history: List[ModelMessage]
+    ) -> RouteDecision:
+        """
+        Choose the model for a turn.
+
+        Args:
+            agent_name: Workflow agent name
+            user_input: The user's message
+            history: History that would be sent with the turn
+
+        Returns:
+            The routing decision
+        """
+        if not CONFIG.router_enabled or not CONFIG.router_models:
+            return RouteDecision(
+                agent_name=agent_name, model=CONFIG.model_name, reason="default"
+            )
+
+        policy = self.get_policy(agent_name)
+        input_tokens = self.counter.count_text(user_input)
+        history_tokens = self.counter.count_messages(history)
+        prompt_tokens = input_tokens + history_tokens
+        heavy = (
+            input_tokens >= policy.heavy_input_tokens
+            or history_tokens >= policy.heavy_history_tokens
+        )
+        required = policy.heavy_capability if heavy else policy.light_capability
+
+        pool = self.pool()
+        fitting = [
+            name
+            for name in pool
+            if get_context_limit(name) - CONFIG.reserved_output_tokens > prompt_tokens
+        ] or pool
+        capable = [
+            name for name in fitting if get_model_profile(name).capability >= required
+        ]
+        if not capable:
+            best = max(get_model_profile(name).capability for name in fitting)
+            capable = [
+                name for name in fitting if get_model_profile(name).capability == best
+            ]
+
+        ranked = sorted(
+            capable, key=lambda name: self._score(name, prompt_tokens, policy)
+        )
+        # Less capable models are a last resort, most capable first
+        fallbacks = ranked[1:] + sorted(
+            (name for name in pool if name not in ranked),
+            key=lambda name: -get_model_profile(name).capability,
+        )
+        decision = RouteDecision(
+            agent_name=agent_name,
+            model=ranked[0],
+            fallbacks=fallbacks,
+            heavy=heavy,
+            prompt_tokens=prompt_tokens,
+            reason=(
+                f"{'heavy' if heavy else 'light'} turn, "
+                f"capability>={required}, {len(capable)} capable"
+            ),
+        )
+        logger.info(
+            f"Routed {agent_name} to {decision.model} ({decision.reason}, "
+            f"{prompt_tokens} prompt tokens, fallbacks={decision.fallbacks})"
+        )
+        return decision
+
+    def _score(self, model_name: str, prompt_tokens: int, policy: RoutePolicy) -> float:
+        """Expected cost of a turn in USD, with latency and failures priced in."""
+        profile = get_model_profile(model_name)
+        cost = (
+            prompt_tokens * profile.input_cost
+            + policy.expected_output_tokens * profile.output_cost
+        ) / 1_000_000
+
+        stats = self._stats.get(model_name)
+        if stats is None:
+            return cost
+        if stats.ttft_ms is not None:
+            cost += stats.ttft_ms / 1000 * CONFIG.router_latency_cost_per_second
+        if stats.error_rate > CONFIG.router_max_error_rate:
+            # Unhealthy models sort after every healthy one until their errors decay
+            cost += 1_000_000
+        return cost
+
+    def record(
+        self,
+        decision: RouteDecision,
+        model_name: str,
+        ttft_ms: Optional[float],
+        duration_ms: float,
+        ok: bool,
+    ) -> None:
+        """
+        Record the observed outcome of a routed call.
+
+        Args:
+            decision: The decision the call was made for
+            model_name: Model that was called
+            ttft_ms: Observed time to first token, if any token arrived
+            duration_ms: Observed duration of the call
+            ok: Whether the call succeeded
+        """
+        stats = self._stats.get(model_name)
+        if stats is None:
+            stats = self._stats[model_name] = _ModelStats()
+        stats.record(ttft_ms, ok, CONFIG.router_stats_alpha)
+
+        ttft = f"{ttft_ms:.0f}ms" if ttft_ms is not None else "none"
+        logger.info(
+            f"Route outcome for {decision.agent_name}: {model_name} "
+            f"{'ok' if ok else 'failed'}, ttft={ttft}, duration={duration_ms:.0f}ms, "
+            f"chosen={model_name == decision.model}"
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Get the rolling statistics of every model that has been called."""
+        return {
+            name: {
+                "ttft_ms": stats.ttft_ms,
+                "error_rate": stats.error_rate,
+                "samples": stats.samples,
+            }
+            for name, stats in self._stats.items()
+        }
@@ -0,0 +1,378 @@
+"""Outbound rate limiting and fair scheduling of provider requests.
+
+This module holds the process-wide scheduler every provider request goes
+through. Request and token buckets enforce the provider's rate limits;
+requests that do not fit are queued per user and granted round-robin
+across users, so one heavy user cannot starve the others. An agent run
+is charged its estimated prompt tokens once, up front, and settled
+against the provider-reported usage, or refunded if it failed. Every
+provider request the run makes, including retries, hedges, fallbacks
+and tool-call round trips, takes its own request slot.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from app.core import CONFIG
+
+
+__all__ = ["TokenBucket", "ScheduledRun", "RequestScheduler", "request_scheduler"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Amounts larger than the capacity are charged as the full capacity, so
+    oversized requests still pass once the bucket is full.
+    """
+
+    def __init__(self, per_minute: int, burst_seconds: float):
+        """
+        Initialize the TokenBucket.
+
+        Args:
+            per_minute: Refill rate per minute
+            burst_seconds: Seconds of refill the bucket can hold
+        """
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        """Get the seconds until ``amount`` can be taken."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Take ``amount`` from the bucket."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) a correction; debt is allowed."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class _Waiter:
+    """A queued request."""
+
+    __slots__ = ("tokens", "requests", "future", "enqueued_at")
+
+    def __init__(self, tokens: int, requests: int):
+        self.tokens = tokens
+        self.requests = requests
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class ScheduledRun:
+    """
+    Rate limiting state of one agent run.
+
+    Provider requests made while the run is scheduled, in its task or in
+    tasks it starts, are charged to it.
+    """
+
+    __slots__ = ("user_id", "tokens", "wait_ms", "usage_tokens", "settled")
+
+    def __init__(self, user_id: str, tokens: int):
+        """
+        Initialize the ScheduledRun.
+
+        Args:
+            user_id: User the run is made for
+            tokens: Estimated prompt tokens charged for the run
+        """
+        self.user_id = user_id
+        self.tokens = tokens
+        self.wait_ms = 0.0
+        self.usage_tokens: Optional[int] = None
+        self.settled = False
+
+    def settle(self, usage_tokens: Optional[int]) -> None:
+        """
+        Mark the run as completed, with the usage the provider reported.
+
+        Args:
+            usage_tokens: Total tokens reported by the provider, if any
+        """
+        self.usage_tokens = usage_tokens
+        self.settled = True
+
+
+# Run whose provider requests are being made in the current context
+_scheduled_run: ContextVar[Optional[ScheduledRun]] = ContextVar(
+    "scheduled_run", default=None
+)
+
+
+class _AttemptSlot:
+    """The request slot taken for a provider attempt."""
+
+    __slots__ = ("used",)
+
+    def __init__(self):
+        self.used = False
+
+
+# Slot of the attempt being made in the current context
+_attempt_slot: ContextVar[Optional[_AttemptSlot]] = ContextVar(
+    "attempt_slot", default=None
+)
+
+
+class RequestScheduler:
+    """
+    Process-wide request and token rate limiter with per-user fairness.
+
+    Queue depth and wait times are available through ``stats``.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        burst_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the RequestScheduler.
+
+        Args:
+            requests_per_minute: Request rate limit. Defaults to configuration
+            tokens_per_minute: Token rate limit. Defaults to configuration
+            burst_seconds: Burst size of both buckets. Defaults to configuration
+        """
+        burst = burst_seconds or CONFIG.rate_limit_burst_seconds
+        requests = requests_per_minute or CONFIG.requests_per_minute
+        tokens = tokens_per_minute or CONFIG.tokens_per_minute
+        self._requests = TokenBucket(requests, burst) if requests else None
+        self._tokens = TokenBucket(tokens, burst) if tokens else None
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+        self._rotation: Deque[str] = deque()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._enqueued = asyncio.Event()
+        self.granted = 0
+        self.queued = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    @property
+    def limited(self) -> bool:
+        """Whether any rate limit is configured."""
+        return self._requests is not None or self._tokens is not None
+
+    def _delay(self, tokens: int, requests: int) -> float:
+        """Seconds until ``requests`` and ``tokens`` fit both buckets."""
+        delay = 0.0
+        if self._requests is not None and requests:
+            delay = self._requests.time_until(requests)
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.time_until(tokens))
+        return delay
+
+    def _take(self, tokens: int, requests: int) -> None:
+        if self._requests is not None:
+            self._requests.take(requests)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+
+    async def acquire(self, user_id: str, tokens: int, requests: int = 1) -> float:
+        """
+        Wait until requests may be sent, charging their estimated tokens.
+
+        Args:
+            user_id: User the requests are made for
+            tokens: Estimated prompt tokens to charge
+            requests: Request slots to take
+
+        Returns:
+            Time spent waiting in milliseconds
+        """
+        if not self.limited:
+            self.granted += 1
+            return 0.0
+
+        if not self._rotation and self._delay(tokens, requests) == 0:
+            self._take(tokens, requests)
+            self.granted += 1
+            return 0.0
+
+        waiter = _Waiter(tokens, requests)
+        if user_id not in self._queues:
+            self._queues[user_id] = deque()
+            self._rotation.append(user_id)
+        self._queues[user_id].append(waiter)
+        self.queued += 1
+        if self._dispatcher is None:
+            # Created with the task, on the loop it waits on
+            self._enqueued = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._enqueued.set()
+
+        await waiter.future
+        wait_ms = (time.monotonic() - waiter.enqueued_at) * 1000
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        return wait_ms
+
+    def settle(self, charged_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Correct the token bucket with the usage the provider reported.
+
+        Args:
+            charged_tokens: Tokens charged up front by ``acquire``
+            actual_tokens: Total tokens reported by the provider, if any
+        """
+        if self._tokens is not None and actual_tokens is not None:
+            self._tokens.adjust(actual_tokens - charged_tokens)
+
+    def refund(self, charged_tokens: int) -> None:
+        """
+        Give back tokens charged for a run that failed.
+
+        Args:
+            charged_tokens: Tokens charged up front by ``acquire``
+        """
+        if self._tokens is not None:
+            self._tokens.adjust(-charged_tokens)
+
+    @asynccontextmanager
+    async def run(self, user_id: str, tokens: int) -> AsyncIterator[ScheduledRun]:
+        """
+        Schedule the provider requests of one agent run.
+
+        The run's estimated tokens are charged once on entry. On exit they
+        are settled if the run called ``ScheduledRun.settle``, and refunded
+        otherwise.
+
+        Args:
+            user_id: User the run is made for
+            tokens: Estimated prompt tokens of the run
+
+        Yields:
+            The scheduled run, accumulating its queue wait
+        """
+        scheduled = ScheduledRun(user_id, tokens)
+        scheduled.wait_ms = await self.acquire(user_id, tokens, requests=0)
+        reset = _scheduled_run.set(scheduled)
+        try:
+            yield scheduled
+        finally:
+            _scheduled_run.reset(reset)
+            if scheduled.settled:
+                self.settle(tokens, scheduled.usage_tokens)
+            else:
+                self.refund(tokens)
+
+    @asynccontextmanager
+    async def attempt(self) -> AsyncIterator[None]:
+        """
+        Take the request slot of a provider attempt of the scheduled run.
+
+        Entered before the attempt's timeouts start, so queueing never
+        counts as a slow provider. The attempt's first request uses the
+        slot; further requests, like tool-call round trips, take their own.
+        The slot is given back if the attempt failed before sending any.
+        """
+        scheduled = _scheduled_run.get()
+        if scheduled is None:
+            yield
+            return
+        scheduled.wait_ms += await self.acquire(scheduled.user_id, 0)
+        slot = _AttemptSlot()
+        reset = _attempt_slot.set(slot)
+        try:
+            yield
+        finally:
+            _attempt_slot.reset(reset)
+            if not slot.used and self._requests is not None:
+                self._requests.adjust(-1)
+
+    async def acquire_request(self) -> None:
+        """Take the request slot of a provider request of the scheduled run, if any."""
+        scheduled = _scheduled_run.get()
+        if scheduled is None:
+            return
+        slot = _attempt_slot.get()
+        if slot is not None and not slot.used:
+            slot.used = True
+            return
+        scheduled.wait_ms += await self.acquire(scheduled.user_id, 0)
+
+    async def _dispatch(self) -> None:
+        """Grant queued requests round-robin across users as the buckets allow."""
+        try:
+            while self._rotation:
+                self._enqueued.clear()
+                shortest: Optional[float] = None
+                for user_id in list(self._rotation):
+                    queue = self._queues[user_id]
+                    while queue and queue[0].future.done():
+                        queue.popleft()  # Cancelled while waiting
+                    if not queue:
+                        self._rotation.remove(user_id)
+                        del self._queues[user_id]
+                        continue
+
+                    waiter = queue[0]
+                    delay = self._delay(waiter.tokens, waiter.requests)
+                    if delay > 0:
+                        # Serve the next user rather than wait for this one
+                        shortest = delay if shortest is None else min(shortest, delay)
+                        continue
+
+                    self._take(waiter.tokens, waiter.requests)
+                    queue.popleft()
+                    waiter.future.set_result(None)
+                    self.granted += 1
+                    # Users that were skipped or not reached go first
+                    self._rotation.remove(user_id)
+                    self._rotation.append(user_id)
+                    break
+                else:
+                    if shortest is not None:
+                        # Until the first waiter fits, or a new one arrives
+                        try:
+                            await asyncio.wait_for(self._enqueued.wait(), shortest)
+                        except asyncio.TimeoutError:
+                            pass
+        finally:
+            self._dispatcher = None
+
+    def queue_depth(self) -> int:
+        """Get the number of requests waiting to be sent."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> Dict[str, float]:
+        """Get queue depth, grant counts and wait times."""
+        return {
+            "queue_depth": self.queue_depth(),
+            "users_waiting": len(self._rotation),
+            "granted": self.granted,
+            "queued": self.queued,
+            "avg_wait_ms": self.total_wait_ms / self.queued if self.queued else 0.0,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+
+# Global request scheduler shared by all sessions
+request_scheduler = RequestScheduler()
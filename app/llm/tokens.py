@@ -0,0 +1,241 @@
+"""Token counting for prompts and conversation history.
+
+This module counts tokens for text and PydanticAI messages with the
+tokenizer of the model they are sent to. Message counts are memoized by
+content hash, so every message in a long conversation is tokenized only
+once per encoding. ``tiktoken`` is used when it is installed and its
+encoding loads; otherwise a character-based estimate is used.
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+
+from app.core import CONFIG
+
+
+__all__ = ["TokenCounter", "token_counter", "message_text"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# Average number of characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Approximate framing overhead the chat format adds to every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_text(message: ModelMessage) -> str:
+    """
+    Extract the textual content of a message.
+
+    Args:
+        message: A PydanticAI ModelRequest or ModelResponse
+
+    Returns:
+        The concatenated text of all message parts
+    """
+    texts = []
+    for part in message.parts:
+        content = getattr(part, "content", None)
+        if content is None:
+            content = getattr(part, "args", None)
+        if content is None:
+            continue
+        texts.append(content if isinstance(content, str) else str(content))
+    return "\n".join(texts)
+
+
+class TokenCounter:
+    """
+    Token counter with a bounded cache of per-message counts.
+
+    Counts are keyed by a hash of the encoding, message kind and text, so
+    identical messages share a cache entry regardless of object identity.
+    Estimates are not cached: they are cheap, and a count estimated before
+    the tokenizer loaded is made again with it.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, cache_size: int = None):
+        """
+        Initialize the TokenCounter.
+
+        Args:
+            model_name: Model whose tokenizer is used by default. Defaults to configuration
+            cache_size: Maximum number of cached message counts. Defaults to configuration
+        """
+        self.model_name = model_name or CONFIG.model_name
+        self._cache_size = cache_size or CONFIG.token_count_cache_size
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self._encodings: Dict[str, Any] = {}
+        self._loading: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self, model_names: Optional[Iterable[str]] = None) -> None:
+        """
+        Load the tokenizers of models in a worker thread.
+
+        tiktoken downloads encodings it has not cached yet, so this is
+        called at startup rather than leaving the first count to block the
+        event loop. Counts for a model whose tokenizer is loading use the
+        estimate.
+
+        Args:
+            model_names: Models to load. Defaults to the default and routed models
+        """
+        names = [
+            name
+            for name in dict.fromkeys(
+                model_names or [self.model_name, *CONFIG.router_models]
+            )
+            if name not in self._encodings and name not in self._loading
+        ]
+        self._loading.update(names)
+        try:
+            for name in names:
+                self._encodings[name] = await asyncio.to_thread(
+                    self._load_encoding, name
+                )
+        finally:
+            self._loading.difference_update(names)
+
+    def _get_encoding(self, model_name: Optional[str] = None) -> Any:
+        """Get a model's tiktoken encoding, loading it on first use, or None."""
+        model_name = model_name or self.model_name
+        if model_name in self._encodings:
+            return self._encodings[model_name]
+        if model_name in self._loading:
+            return None
+        encoding = self._encodings[model_name] = self._load_encoding(model_name)
+        return encoding
+
+    def _load_encoding(self, model_name: str) -> Any:
+        """Load a model's tiktoken encoding, or None to use estimates."""
+        try:
+            import tiktoken
+        except ImportError:
+            logger.info("tiktoken is not installed, using estimated token counts")
+            return None
+
+        # OpenRouter model names are prefixed with the provider
+        base_name = model_name.split("/")[-1]
+        try:
+            return tiktoken.encoding_for_model(base_name)
+        except KeyError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to load tokenizer, using estimates: {e}")
+            return None
+
+        # Models tiktoken does not know are counted with the newest encoding
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"Failed to load tokenizer, using estimates: {e}")
+            return None
+
+    @staticmethod
+    def _estimate(text: str) -> int:
+        """Estimate the tokens in text from its length."""
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    def count_text(self, text: str, model_name: Optional[str] = None) -> int:
+        """
+        Count the tokens in a piece of text.
+
+        Args:
+            text: The text to count
+            model_name: Model whose tokenizer to use. Defaults to the counter's model
+
+        Returns:
+            Token count
+        """
+        if not text:
+            return 0
+        encoding = self._get_encoding(model_name)
+        if encoding is None:
+            return self._estimate(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def _cached_count(
+        self, kind: bytes, text: str, overhead: int, model_name: Optional[str]
+    ) -> int:
+        """Count tokens for text, memoized by a hash of its encoding, kind and content."""
+        encoding = self._get_encoding(model_name)
+        if encoding is None:
+            return self._estimate(text) + overhead
+
+        key = hashlib.blake2b(
+            encoding.name.encode() + b"\0" + kind + text.encode(), digest_size=16
+        ).digest()
+        count = self._cache.get(key)
+        if count is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return count
+
+        self.misses += 1
+        count = len(encoding.encode(text, disallowed_special=())) + overhead
+        self._cache[key] = count
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return count
+
+    def count_prompt(self, system_prompt: str, model_name: Optional[str] = None) -> int:
+        """
+        Count the tokens in a system prompt, using the cache when possible.
+
+        Args:
+            system_prompt: The system prompt text
+            model_name: Model whose tokenizer to use. Defaults to the counter's model
+
+        Returns:
+            Token count including per-message overhead
+        """
+        return self._cached_count(
+            b"s", system_prompt, MESSAGE_OVERHEAD_TOKENS, model_name
+        )
+
+    def count_message(
+        self, message: ModelMessage, model_name: Optional[str] = None
+    ) -> int:
+        """
+        Count the tokens in a message, using the cache when possible.
+
+        Args:
+            message: A PydanticAI ModelRequest or ModelResponse
+            model_name: Model whose tokenizer to use. Defaults to the counter's model
+
+        Returns:
+            Token count including per-message overhead
+        """
+        kind = b"r" if isinstance(message, ModelResponse) else b"q"
+        return self._cached_count(
+            kind, message_text(message), MESSAGE_OVERHEAD_TOKENS, model_name
+        )
+
+    def count_messages(
+        self, messages: Iterable[ModelMessage], model_name: Optional[str] = None
+    ) -> int:
+        """
+        Count the tokens in a list of messages.
+
+        Args:
+            messages: PydanticAI messages
+            model_name: Model whose tokenizer to use. Defaults to the counter's model
+
+        Returns:
+            Total token count
+        """
+        return sum(self.count_message(message, model_name) for message in messages)
+
+
+# Global token counter instance
+token_counter = TokenCounter()
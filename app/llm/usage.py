@@ -0,0 +1,256 @@
+"""Usage and cost accounting of agent runs.
+
+This module prices the tokens providers report for every run and keeps
+running totals per user and per thread in memory. User totals cover a
+fixed window and back the optional per-user quotas; thread totals cover
+the lifetime of the process. Both are bounded, dropping the least
+recently active users and threads first.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+from app.core import CONFIG, QuotaExceeded, RunStats
+
+from .router import get_model_profile
+
+
+__all__ = [
+    "UsageTotals",
+    "UsageLedger",
+    "estimate_cost",
+    "usage_metadata",
+    "usage_ledger",
+]
+
+
+def estimate_cost(
+    model_name: str,
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    cached_prompt_tokens: Optional[int] = None,
+) -> float:
+    """
+    Estimate the provider cost of a run from its token usage.
+
+    Args:
+        model_name: Model that served the run
+        prompt_tokens: Prompt tokens, including cached ones
+        completion_tokens: Completion tokens
+        cached_prompt_tokens: Prompt tokens read from the provider's prompt cache
+
+    Returns:
+        The cost in USD, from the model's list prices
+    """
+    profile = get_model_profile(model_name)
+    cached = cached_prompt_tokens or 0
+    uncached = max((prompt_tokens or 0) - cached, 0)
+    cached_cost = (
+        profile.cached_input_cost
+        if profile.cached_input_cost is not None
+        else profile.input_cost
+    )
+    return (
+        uncached * profile.input_cost
+        + cached * cached_cost
+        + (completion_tokens or 0) * profile.output_cost
+    ) / 1_000_000
+
+
+def usage_metadata(stats: RunStats) -> Dict[str, dict]:
+    """
+    Describe a run's usage for the metadata of its Chainlit step.
+
+    Args:
+        stats: Statistics of the finished run
+
+    Returns:
+        Step metadata holding the run's usage under ``usage``
+    """
+    return {
+        "usage": {
+            "run_id": stats.run_id,
+            "agent": stats.agent_name,
+            "model": stats.model_name,
+            "prompt_tokens": stats.request_tokens,
+            "completion_tokens": stats.response_tokens,
+            "cached_prompt_tokens": stats.cached_prompt_tokens,
+            "cost_usd": stats.cost_usd,
+            "cache_hit": stats.cache_hit,
+            "ttft_ms": stats.ttft_ms,
+            "duration_ms": stats.duration_ms,
+        }
+    }
+
+
+@dataclass(slots=True)
+class UsageTotals:
+    """Usage summed over the runs of a user or a thread."""
+
+    runs: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    cost_usd: float = 0.0
+    window_started: float = field(default_factory=time.monotonic)
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt and completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, stats: RunStats) -> None:
+        """Add the usage of a finished run."""
+        self.runs += 1
+        # Cancelled hedge requests are billed too
+        self.prompt_tokens += (stats.request_tokens or 0) + (
+            stats.hedge_prompt_tokens or 0
+        )
+        self.completion_tokens += (stats.response_tokens or 0) + (
+            stats.hedge_completion_tokens or 0
+        )
+        self.cached_prompt_tokens += stats.cached_prompt_tokens or 0
+        self.cost_usd += stats.cost_usd or 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """The totals, without the window start."""
+        totals = asdict(self)
+        del totals["window_started"]
+        return totals
+
+
+class UsageLedger:
+    """
+    In-memory usage totals per user and per thread.
+
+    Recording and quota checks are dictionary operations on the event
+    loop, so they run on every turn without measurable cost.
+    """
+
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        cost_quota_usd: Optional[float] = None,
+        token_quota: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the UsageLedger.
+
+        Args:
+            window_seconds: Length of a user's quota window. Defaults to configuration
+            cost_quota_usd: Cost a user may incur per window. Defaults to configuration
+            token_quota: Tokens a user may use per window. Defaults to configuration
+            max_entries: Users and threads tracked each. Defaults to configuration
+        """
+        self.window_seconds = window_seconds or CONFIG.usage_quota_window_seconds
+        self.cost_quota_usd = (
+            cost_quota_usd if cost_quota_usd is not None else CONFIG.user_cost_quota_usd
+        )
+        self.token_quota = (
+            token_quota if token_quota is not None else CONFIG.user_token_quota
+        )
+        self.max_entries = max_entries or CONFIG.usage_ledger_max_entries
+        self._users: "OrderedDict[str, UsageTotals]" = OrderedDict()
+        self._threads: "OrderedDict[str, UsageTotals]" = OrderedDict()
+        self.rejected = 0
+
+    def _totals(
+        self, entries: "OrderedDict[str, UsageTotals]", key: str
+    ) -> UsageTotals:
+        totals = entries.get(key)
+        if totals is None:
+            totals = entries[key] = UsageTotals()
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(key)
+        return totals
+
+    def _user_window(self, user_id: str) -> Optional[UsageTotals]:
+        totals = self._users.get(user_id)
+        if (
+            totals is not None
+            and time.monotonic() - totals.window_started >= self.window_seconds
+        ):
+            # A new window starts with the user's next run
+            del self._users[user_id]
+            return None
+        return totals
+
+    def record(self, stats: RunStats) -> None:
+        """
+        Add a finished run to the totals of its user and thread.
+
+        Args:
+            stats: Statistics of the run, with its cost
+        """
+        if stats.user_id:
+            self._user_window(stats.user_id)
+            self._totals(self._users, stats.user_id).add(stats)
+        if stats.thread_id:
+            self._totals(self._threads, stats.thread_id).add(stats)
+
+    def for_user(self, user_id: str) -> Optional[UsageTotals]:
+        """
+        Get a user's usage in the current quota window.
+
+        Args:
+            user_id: The user
+
+        Returns:
+            The user's totals, or None if the user has no runs in the window
+        """
+        return self._user_window(user_id)
+
+    def for_thread(self, thread_id: str) -> Optional[UsageTotals]:
+        """
+        Get the usage of a thread.
+
+        Args:
+            thread_id: The thread
+
+        Returns:
+            The thread's totals, or None if it has no recorded runs
+        """
+        return self._threads.get(thread_id)
+
+    def check_quota(self, user_id: Optional[str]) -> None:
+        """
+        Check that a user may start another run.
+
+        Args:
+            user_id: The user, or None for runs made without a user
+
+        Raises:
+            QuotaExceeded: If the user's usage in the window reached a quota
+        """
+        if user_id is None or (
+            self.cost_quota_usd is None and self.token_quota is None
+        ):
+            return
+        totals = self._user_window(user_id)
+        if totals is None:
+            return
+        if self.cost_quota_usd is not None and totals.cost_usd >= self.cost_quota_usd:
+            self.rejected += 1
+            raise QuotaExceeded(user_id, totals.cost_usd, self.cost_quota_usd, "usd")
+        if self.token_quota is not None and totals.total_tokens >= self.token_quota:
+            self.rejected += 1
+            raise QuotaExceeded(
+                user_id, totals.total_tokens, self.token_quota, "tokens"
+            )
+
+    def stats(self) -> Dict[str, float]:
+        """Get the number of tracked users and threads and of rejected runs."""
+        return {
+            "users": len(self._users),
+            "threads": len(self._threads),
+            "rejected": self.rejected,
+        }
+
+
+# Global usage ledger shared by all sessions
+usage_ledger = UsageLedger()
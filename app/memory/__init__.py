@@ -0,0 +1,13 @@
+"""Memory module for the universal agent application.
+
+This module provides conversation memory and token-budgeted
+history compaction for agent runs.
+"""
+
+from .compaction import HistoryBudget, ConversationMemory, HistoryCompactor
+
+__all__ = [
+    "HistoryBudget",
+    "ConversationMemory",
+    "HistoryCompactor",
+]
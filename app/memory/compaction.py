@@ -0,0 +1,261 @@
+"""Token-budgeted rolling summarization of conversation history.
+
+This module keeps the most recent turns of a conversation verbatim and
+folds older turns into a rolling summary once the history exceeds an
+agent's token budget. Summarization runs in the background after a
+response completes, so it never sits on the critical path of a turn.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
+
+from app.core import CONFIG
+from app.llm import token_counter
+from app.llm.tokens import message_text
+
+
+__all__ = ["HistoryBudget", "ConversationMemory", "HistoryCompactor"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# Produces the summary of a prompt for a (user id, thread id)
+Summarize = Callable[[str, Optional[str], Optional[str]], Awaitable[str]]
+
+
+class HistoryBudget(BaseModel):
+    """History budget for a single agent.
+
+    Defines how much verbatim history an agent receives before
+    older turns are folded into the rolling summary.
+    """
+
+    max_tokens: int = Field(
+        default_factory=lambda: CONFIG.history_max_tokens,
+        description="Token budget for verbatim history",
+        gt=0,
+    )
+    keep_turns: int = Field(
+        default_factory=lambda: CONFIG.history_keep_turns,
+        description="Number of most recent turns always kept verbatim",
+        ge=1,
+    )
+    enabled: bool = Field(
+        default=True, description="Whether history compaction is enabled"
+    )
+
+
+class ConversationMemory:
+    """
+    Per-session conversation state.
+
+    Holds the full message history of a session together with the rolling
+    summary of its oldest messages. ``summarized_count`` leading messages
+    are represented by ``summary`` and are no longer sent to the model.
+    """
+
+    def __init__(self, messages: Optional[List[ModelMessage]] = None):
+        """
+        Initialize the conversation memory.
+
+        Args:
+            messages: Existing PydanticAI message history, if any
+        """
+        self.messages: List[ModelMessage] = list(messages or [])
+        self.summary: str = ""
+        self.summarized_count: int = 0
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def append_turn(self, user_input: str, response: str) -> None:
+        """
+        Record a completed turn.
+
+        Args:
+            user_input: The user's message
+            response: The agent's final response
+        """
+        self.messages.append(ModelRequest.user_text_prompt(user_input))
+        self.messages.append(ModelResponse(parts=[TextPart(content=response)]))
+
+    @property
+    def recent_messages(self) -> List[ModelMessage]:
+        """Messages that have not been folded into the summary."""
+        return self.messages[self.summarized_count :]
+
+    @property
+    def is_summarizing(self) -> bool:
+        """Whether a background summarization is in progress."""
+        return self._summary_task is not None and not self._summary_task.done()
+
+
+def _turn_starts(messages: List[ModelMessage]) -> List[int]:
+    """Get the index of every message that starts a new user turn."""
+    return [
+        i
+        for i, message in enumerate(messages)
+        if isinstance(message, ModelRequest)
+        and any(isinstance(part, UserPromptPart) for part in message.parts)
+    ]
+
+
+def _render_transcript(messages: List[ModelMessage]) -> str:
+    """Render messages as a plain-text transcript for the summarizer."""
+    lines = []
+    for message in messages:
+        text = message_text(message)
+        if not text:
+            continue
+        speaker = "Assistant" if isinstance(message, ModelResponse) else "User"
+        lines.append(f"{speaker}: {text}")
+    return "\n\n".join(lines)
+
+
+class HistoryCompactor:
+    """
+    Builds token-budgeted history for agent runs.
+
+    ``prepare`` is called on the critical path and only slices the
+    existing state. ``schedule`` is called after a response completes and
+    starts a background summarization when the verbatim history exceeds
+    the agent's budget. Summaries are produced by the ``summarize``
+    callable, so they are scheduled and accounted like any other run.
+    """
+
+    def __init__(
+        self,
+        summarize: Summarize,
+        budgets: Optional[Dict[str, HistoryBudget]] = None,
+    ):
+        """
+        Initialize the HistoryCompactor.
+
+        Args:
+            summarize: Coroutine function producing the summary of a prompt
+                for a user and a thread
+            budgets: Per-agent history budgets keyed by workflow agent name
+        """
+        self.summarize = summarize
+        self.budgets = budgets or {}
+        self.default_budget = HistoryBudget()
+
+    def get_budget(self, agent_name: str) -> HistoryBudget:
+        """
+        Get the history budget for an agent.
+
+        Args:
+            agent_name: Workflow agent name
+
+        Returns:
+            The agent's budget, or the default budget
+        """
+        return self.budgets.get(agent_name, self.default_budget)
+
+    def prepare(
+        self, memory: ConversationMemory, agent_name: str
+    ) -> List[ModelMessage]:
+        """
+        Build the message history to send to an agent.
+
+        Args:
+            memory: The session's conversation memory
+            agent_name: Workflow agent name
+
+        Returns:
+            Rolling summary (if any) followed by the verbatim recent messages
+        """
+        budget = self.get_budget(agent_name)
+        recent = memory.recent_messages
+
+        if budget.enabled:
+            # Safety net while a summary is still being computed: never send
+            # more than twice the budget, but always keep the last K turns.
+            starts = _turn_starts(recent)
+            while (
+                len(starts) > budget.keep_turns
+                and token_counter.count_messages(recent) > 2 * budget.max_tokens
+            ):
+                recent = recent[starts[1] :]
+                starts = _turn_starts(recent)
+
+        if not memory.summary:
+            return list(recent)
+
+        summary_message = ModelRequest(
+            parts=[
+                SystemPromptPart(
+                    content=f"Summary of the earlier conversation:\n{memory.summary}"
+                )
+            ]
+        )
+        return [summary_message, *recent]
+
+    def schedule(
+        self,
+        memory: ConversationMemory,
+        agent_name: str,
+        user_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> None:
+        """
+        Start a background summarization if the history exceeds its budget.
+
+        Args:
+            memory: The session's conversation memory
+            agent_name: Workflow agent name
+            user_id: User the summary's usage is charged to
+            thread_id: Thread the summary's usage is recorded against
+        """
+        budget = self.get_budget(agent_name)
+        if not budget.enabled or memory.is_summarizing:
+            return
+
+        recent = memory.recent_messages
+        if token_counter.count_messages(recent) <= budget.max_tokens:
+            return
+
+        starts = _turn_starts(recent)
+        if len(starts) <= budget.keep_turns:
+            return
+
+        # Fold everything before the last K turns into the summary
+        fold_until = memory.summarized_count + starts[-budget.keep_turns]
+        memory._summary_task = asyncio.create_task(
+            self._summarize(memory, fold_until, user_id, thread_id)
+        )
+
+    async def _summarize(
+        self,
+        memory: ConversationMemory,
+        fold_until: int,
+        user_id: Optional[str],
+        thread_id: Optional[str],
+    ) -> None:
+        """Fold messages up to ``fold_until`` into the memory's summary."""
+        transcript = _render_transcript(
+            memory.messages[memory.summarized_count : fold_until]
+        )
+        prompt = (
+            f"Current summary:\n{memory.summary or '(empty)'}\n\n"
+            f"Conversation turns to fold in:\n{transcript}"
+        )
+        try:
+            summary = await self.summarize(prompt, user_id, thread_id)
+        except Exception as e:
+            logger.warning(f"History summarization failed: {e}")
+            return
+
+        memory.summary = summary
+        memory.summarized_count = fold_until
+        logger.info(f"Folded history into summary up to message {fold_until}")
@@ -0,0 +1,57 @@
+"""Metrics module for the universal agent application.
+
+This module provides the Prometheus metrics of agent runs, sessions and
+database access, the registry rendering them and the scrape endpoint.
+"""
+
+from .registry import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    LATENCY_BUCKETS,
+    metrics_registry,
+)
+from .instruments import (
+    RUN_LABELS,
+    ttft_seconds,
+    generation_seconds,
+    tokens_per_second,
+    queue_wait_seconds,
+    runs_total,
+    run_errors_total,
+    tokens_total,
+    cost_usd_total,
+    hedged_runs_total,
+    agent_switches_total,
+    active_sessions,
+    DATABASE_BUCKETS,
+    db_pool_wait_seconds,
+    db_query_seconds,
+)
+from .endpoint import mount_metrics
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "LATENCY_BUCKETS",
+    "metrics_registry",
+    "RUN_LABELS",
+    "ttft_seconds",
+    "generation_seconds",
+    "tokens_per_second",
+    "queue_wait_seconds",
+    "runs_total",
+    "run_errors_total",
+    "tokens_total",
+    "cost_usd_total",
+    "hedged_runs_total",
+    "agent_switches_total",
+    "active_sessions",
+    "DATABASE_BUCKETS",
+    "db_pool_wait_seconds",
+    "db_query_seconds",
+    "mount_metrics",
+]
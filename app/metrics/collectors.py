@@ -0,0 +1,47 @@
+"""Export of component statistics on every scrape.
+
+Components keep their own counters for their ``stats()`` methods; this
+module registers them with the metrics registry so they are read only
+when Prometheus scrapes.
+"""
+
+from .registry import MetricsRegistry
+
+
+__all__ = ["register_component_collectors"]
+
+
+def register_component_collectors(registry: MetricsRegistry) -> None:
+    """
+    Export the statistics of the application's long-lived components.
+
+    Components are imported here rather than at module level, since most
+    of them publish events or record metrics themselves.
+
+    Args:
+        registry: The registry to add the collectors to
+    """
+    from app.agents import agent_workflow
+    from app.cache import response_cache, single_flight
+    from app.data import pool_stats, thread_list_cache, write_behind_buffer
+    from app.events import event_bus
+    from app.llm import request_scheduler, shared_http_client, usage_ledger
+
+    registry.add_collector("response_cache", response_cache.stats)
+    registry.add_collector("single_flight", single_flight.stats)
+    registry.add_collector("http_client", shared_http_client.stats)
+    registry.add_collector("scheduler", request_scheduler.stats)
+    registry.add_collector("usage_ledger", usage_ledger.stats)
+    registry.add_collector("write_behind", write_behind_buffer.stats)
+    registry.add_collector("database_pool", pool_stats)
+    registry.add_collector("thread_list_cache", thread_list_cache.stats)
+    registry.add_collector(
+        "model_router",
+        lambda: {"model": agent_workflow.model_router.stats()},
+        label="model",
+    )
+    registry.add_collector("hedger", agent_workflow.hedger.stats)
+    registry.add_collector("resilience", agent_workflow.resilience.stats, label="model")
+    registry.add_collector(
+        "event_bus", lambda: {"dropped": event_bus.dropped_events()}, label="sink"
+    )
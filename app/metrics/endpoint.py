@@ -0,0 +1,37 @@
+"""Prometheus scrape endpoint on the Chainlit FastAPI app."""
+
+import logging
+
+from .collectors import register_component_collectors
+from .registry import MetricsRegistry, metrics_registry
+
+
+__all__ = ["CONTENT_TYPE", "mount_metrics"]
+
+
+logger = logging.getLogger(__name__)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def mount_metrics(app, path: str, registry: MetricsRegistry = metrics_registry) -> None:
+    """
+    Serve the registry's metrics from a route of a FastAPI app.
+
+    Args:
+        app: The FastAPI app, usually ``chainlit.server.app``
+        path: Path of the endpoint
+        registry: Registry to render
+    """
+    from starlette.responses import Response
+
+    register_component_collectors(registry)
+
+    async def metrics() -> Response:
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    app.add_api_route(path, metrics, methods=["GET"], include_in_schema=False)
+    # Chainlit serves its frontend from a catch-all route, which must stay last
+    app.router.routes.insert(0, app.router.routes.pop())
+    logger.info(f"Serving Prometheus metrics at {path}")
@@ -0,0 +1,92 @@
+"""Application metrics recorded as agent runs and sessions happen.
+
+This module defines the metrics of agent runs, fed by the event bus's
+metrics sink off the streaming path, the session gauge maintained by
+the Chainlit handlers, and the timings of database access.
+"""
+
+from .registry import metrics_registry
+
+
+__all__ = [
+    "RUN_LABELS",
+    "ttft_seconds",
+    "generation_seconds",
+    "tokens_per_second",
+    "queue_wait_seconds",
+    "runs_total",
+    "run_errors_total",
+    "tokens_total",
+    "cost_usd_total",
+    "hedged_runs_total",
+    "agent_switches_total",
+    "active_sessions",
+    "DATABASE_BUCKETS",
+    "db_pool_wait_seconds",
+    "db_query_seconds",
+]
+
+
+RUN_LABELS = ("agent", "model")
+
+# Database calls take milliseconds, well below the run latency buckets
+DATABASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+ttft_seconds = metrics_registry.histogram(
+    "ttft_seconds", "Time from the start of a run to its first token.", RUN_LABELS
+)
+generation_seconds = metrics_registry.histogram(
+    "generation_seconds", "Total duration of successful agent runs.", RUN_LABELS
+)
+tokens_per_second = metrics_registry.histogram(
+    "tokens_per_second",
+    "Completion tokens per second after the first token.",
+    RUN_LABELS,
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300),
+)
+queue_wait_seconds = metrics_registry.histogram(
+    "queue_wait_seconds",
+    "Time runs waited for the rate limiter.",
+    RUN_LABELS,
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+runs_total = metrics_registry.counter(
+    "runs_total",
+    "Successful agent runs, by how the response was produced.",
+    (*RUN_LABELS, "source"),
+)
+run_errors_total = metrics_registry.counter(
+    "run_errors_total", "Failed agent runs.", (*RUN_LABELS, "error_type")
+)
+tokens_total = metrics_registry.counter(
+    "tokens_total",
+    "Tokens reported by providers, estimated for cancelled hedge requests.",
+    (*RUN_LABELS, "kind"),
+)
+cost_usd_total = metrics_registry.counter(
+    "cost_usd_total", "Estimated provider cost of agent runs in USD.", RUN_LABELS
+)
+hedged_runs_total = metrics_registry.counter(
+    "hedged_runs_total",
+    "Successful agent runs that sent a hedge request, whose loser is billed too.",
+    RUN_LABELS,
+)
+agent_switches_total = metrics_registry.counter(
+    "agent_switches_total",
+    "Switches of the active agent, by @ mention or intent routing.",
+    ("from_agent", "to_agent"),
+)
+active_sessions = metrics_registry.gauge(
+    "active_sessions", "Chat sessions currently connected."
+)
+db_pool_wait_seconds = metrics_registry.histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    buckets=DATABASE_BUCKETS,
+)
+db_query_seconds = metrics_registry.histogram(
+    "db_query_seconds",
+    "Duration of database queries, by query.",
+    ("query",),
+    buckets=DATABASE_BUCKETS,
+)
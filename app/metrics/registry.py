@@ -0,0 +1,307 @@
+"""Prometheus metric types and their registry.
+
+This module implements counters, gauges and histograms rendered in the
+Prometheus text exposition format. Metrics are recorded and scraped on
+the event loop thread, so recording is a dictionary lookup and an
+integer increment, without locks. Histograms keep per-bucket counts and
+only make them cumulative when scraped.
+"""
+
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "LATENCY_BUCKETS",
+    "metrics_registry",
+]
+
+
+# Seconds, from cache replays to long generations
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class of metrics with a fixed set of label names."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text of the metric
+            labels: Names of the metric's labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def header(self) -> List[str]:
+        """HELP and TYPE lines of the metric."""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def render(self) -> List[str]:
+        """Render the metric's samples."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Increase the count of a label set.
+
+        Args:
+            *label_values: Values of the metric's labels, in order
+            amount: Amount to add
+        """
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, values)} "
+            f"{_format_value(value)}"
+            for values, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    type_name = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Decrease the value of a label set.
+
+        Args:
+            *label_values: Values of the metric's labels, in order
+            amount: Amount to subtract
+        """
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str) -> None:
+        """
+        Set the value of a label set.
+
+        Args:
+            value: The new value
+            *label_values: Values of the metric's labels, in order
+        """
+        self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations per label set."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text of the metric
+            labels: Names of the metric's labels
+            buckets: Upper bounds of the buckets, ascending, without +Inf
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count per bucket (the last one is +Inf) and the sum
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value
+            *label_values: Values of the metric's labels, in order
+        """
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), series):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.label_names, "le"), (*values, _format_value(float(bound)))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _flatten(
+    name: str,
+    value,
+    label: str,
+    labels: Tuple[Tuple[str, str], ...],
+    samples: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]],
+) -> None:
+    """Flatten a stats value into samples, turning mapping keys into labels."""
+    if value is None:
+        return
+    if isinstance(value, (bool, int, float)):
+        samples.setdefault(name, []).append((labels, float(value)))
+    elif isinstance(value, str):
+        # Enumerations such as circuit states are exported as a state label
+        samples.setdefault(name, []).append((labels + (("state", value),), 1.0))
+    elif isinstance(value, Mapping):
+        for key, item in value.items():
+            if isinstance(item, Mapping) and not labels:
+                # Per-entity stats, such as per-model statistics
+                for entity, entity_stats in item.items():
+                    _flatten(
+                        f"{name}_{key}",
+                        entity_stats,
+                        label,
+                        ((label, entity),),
+                        samples,
+                    )
+            else:
+                _flatten(f"{name}_{key}", item, label, labels, samples)
+
+
+class MetricsRegistry:
+    """
+    Collection of the application's metrics.
+
+    Besides metrics recorded as events happen, the registry collects the
+    ``stats()`` of long-lived components when scraped and exports their
+    numeric values as gauges.
+    """
+
+    def __init__(self, prefix: str = "universal_agent"):
+        """
+        Initialize the MetricsRegistry.
+
+        Args:
+            prefix: Prefix of every metric name
+        """
+        self.prefix = prefix
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Tuple[str, Callable[[], Mapping], str]] = []
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        """Create and register a counter."""
+        return self._register(Counter(f"{self.prefix}_{name}", documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        """Create and register a gauge."""
+        return self._register(Gauge(f"{self.prefix}_{name}", documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        """Create and register a histogram."""
+        return self._register(
+            Histogram(f"{self.prefix}_{name}", documentation, labels, buckets)
+        )
+
+    def _register(self, metric: _Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(
+        self, component: str, stats: Callable[[], Mapping], label: str = "name"
+    ) -> None:
+        """
+        Export a component's statistics on every scrape.
+
+        Nested mappings of per-entity statistics, such as the router's
+        per-model statistics, become samples labeled with the entity.
+
+        Args:
+            component: Name of the component, used in the metric names
+            stats: Callable returning the component's current statistics
+            label: Name of the label holding nested mapping keys
+        """
+        self._collectors.append((component, stats, label))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition, ending with a newline
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+
+        for component, stats, label in self._collectors:
+            samples: Dict[str, List] = {}
+            try:
+                _flatten(f"{self.prefix}_{component}", stats(), label, (), samples)
+            except Exception as e:
+                lines.append(f"# {component} stats unavailable: {_escape(str(e))}")
+                continue
+            for name, series in samples.items():
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in series:
+                    names = [label_name for label_name, _ in labels]
+                    values = [label_value for _, label_value in labels]
+                    lines.append(
+                        f"{name}{_format_labels(names, values)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+# Global registry of the application's metrics
+metrics_registry = MetricsRegistry()
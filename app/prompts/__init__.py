@@ -1,8 +1,10 @@
 from .idea_analysis_agent_prompt import idea_analysis_agent_prompt
 from .ideation_agent_prompt import ideation_agent_prompt
+from .history_summary_prompt import history_summary_prompt
 
 
 __all__ = [
     "idea_analysis_agent_prompt",
     "ideation_agent_prompt",
+    "history_summary_prompt",
 ]
@@ -0,0 +1,19 @@
+"""Starters module for the universal agent application.
+
+This module provides the starter suggestions shown on the welcome screen
+and keeps their answers warm in the response cache.
+"""
+
+from app.agents import agent_workflow
+from .definitions import StarterPrompt, STARTER_PROMPTS
+from .service import StarterAnswerService
+
+# Global starter answer service instance
+starter_service = StarterAnswerService(agent_workflow, STARTER_PROMPTS)
+
+__all__ = [
+    "StarterPrompt",
+    "STARTER_PROMPTS",
+    "StarterAnswerService",
+    "starter_service",
+]
@@ -0,0 +1,55 @@
+"""Starter prompt definitions.
+
+This module contains the starter suggestions shown to users when they
+open a new conversation.
+"""
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+__all__ = ["StarterPrompt", "STARTER_PROMPTS"]
+
+
+class StarterPrompt(BaseModel):
+    """A starter suggestion shown on the welcome screen."""
+
+    label: str = Field(..., description="Label displayed on the starter button")
+    message: str = Field(..., description="Message sent when the starter is clicked")
+
+
+STARTER_PROMPTS: List[StarterPrompt] = [
+    StarterPrompt(
+        label="💡 Generate Startup Ideas",
+        message="@ideation Give me 5 innovative startup ideas for sustainable technology that could solve real-world problems",
+    ),
+    StarterPrompt(
+        label="📊 Analyze Business Idea",
+        message="@analysis I have an idea for a meal planning app that uses AI to suggest recipes based on dietary restrictions and available ingredients. Can you evaluate its market potential?",
+    ),
+    StarterPrompt(
+        label="🏗️ Plan Technical Architecture",
+        message="@cto I need to build a mobile app that handles real-time chat, user profiles, and file sharing. What technology stack would you recommend for scalability?",
+    ),
+    StarterPrompt(
+        label="📋 Create Product Roadmap",
+        message="@product Help me create a 6-month product roadmap for a fitness tracking app with social features. What should be the priority features?",
+    ),
+    StarterPrompt(
+        label="🎯 Develop Marketing Strategy",
+        message="@advertising I'm launching a B2B SaaS tool for project management. Create a comprehensive marketing strategy to reach small to medium businesses",
+    ),
+    StarterPrompt(
+        label="🎨 Design Landing Page",
+        message="@landing I need a high-converting landing page for an AI writing assistant. What elements should I include and how should I structure it?",
+    ),
+    StarterPrompt(
+        label="📈 Strategic Business Planning",
+        message="@strategic I want to enter the e-commerce market with handmade crafts. Help me develop a competitive strategy and positioning plan",
+    ),
+    StarterPrompt(
+        label="🔄 Coordinate Complex Project",
+        message="@manager I'm building a fintech startup with mobile app, web dashboard, and API. Help me create a comprehensive project plan and coordinate the development phases",
+    ),
+]
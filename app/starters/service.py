@@ -0,0 +1,143 @@
+"""Pre-warmed answers for starter prompts.
+
+This module runs every starter prompt through the workflow in the
+background so its answer is in the response cache before users click
+it. Clicks on a warm starter are served by the cache; concurrent clicks
+on a cold one share a single provider call through single-flight.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import List, Optional
+
+from app.core import CONFIG
+from app.memory import ConversationMemory
+from .definitions import StarterPrompt
+
+
+__all__ = ["StarterAnswerService"]
+
+
+logger = logging.getLogger(__name__)
+
+
+# How often the profile/model fingerprint is checked between full refreshes
+FINGERPRINT_POLL_SECONDS = 60
+
+
+class StarterAnswerService:
+    """
+    Keeps starter answers warm in the response cache.
+
+    Missing answers are generated on startup and as soon as the model or
+    any agent profile changes, which changes their cache keys. Answers
+    are regenerated, replacing the cached ones, only once they are within
+    a refresh interval of the cache TTL, so they never expire but are not
+    generated more often than the cache needs.
+    """
+
+    def __init__(self, workflow, prompts: List[StarterPrompt]):
+        """
+        Initialize the StarterAnswerService.
+
+        Args:
+            workflow: The AgentWorkflow used to generate answers
+            prompts: Starter prompts to keep warm
+        """
+        self.workflow = workflow
+        self.prompts = prompts
+        self._task: Optional[asyncio.Task] = None
+        self._warmed_fingerprint: Optional[str] = None
+        self._generated_at = 0.0
+
+    def fingerprint(self) -> str:
+        """Hash of everything that determines the starter answers."""
+        digest = hashlib.sha256(CONFIG.model_name.encode())
+        for prompt in self.prompts:
+            agent_name, _ = self.workflow.parse_agent_switch(prompt.message)
+            profile = self.workflow.get_profile(
+                agent_name or self.workflow.default_agent
+            )
+            digest.update(prompt.message.encode())
+            digest.update(profile.backstory.encode())
+        return digest.hexdigest()
+
+    async def warm(self, refresh: bool = False) -> int:
+        """
+        Run every cacheable starter prompt once, sequentially.
+
+        Args:
+            refresh: Regenerate answers that are already cached instead of
+                serving them from the cache
+
+        Returns:
+            Number of starter prompts that ran successfully
+        """
+        fingerprint = self.fingerprint()
+        started = time.perf_counter()
+        warmed = 0
+
+        for prompt in self.prompts:
+            agent_name, _ = self.workflow.parse_agent_switch(prompt.message)
+            if (
+                agent_name or self.workflow.default_agent
+            ) in self.workflow.uncached_agents:
+                continue
+            try:
+                await self.workflow.run_streaming(
+                    prompt.message,
+                    self.workflow.default_agent,
+                    memory=ConversationMemory(),
+                    refresh=refresh,
+                )
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm starter '{prompt.label}': {e}")
+
+        self._warmed_fingerprint = fingerprint
+        self._generated_at = time.monotonic()
+        logger.info(
+            f"Warmed {warmed} of {len(self.prompts)} starter answers in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+        return warmed
+
+    def start(self) -> None:
+        """Start warming and refreshing starter answers in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def near_expiry(self) -> bool:
+        """Whether the generated answers expire from the cache within a refresh interval."""
+        if not self._generated_at:
+            return False
+        interval = CONFIG.starter_refresh_interval_seconds
+        # Never more often than once per interval, even with a short TTL
+        refresh_after = max(CONFIG.response_cache_ttl_seconds - interval, interval)
+        return time.monotonic() - self._generated_at >= refresh_after
+
+    async def _run(self) -> None:
+        while True:
+            changed = self.fingerprint() != self._warmed_fingerprint
+            near_expiry = self.near_expiry()
+            if changed or near_expiry:
+                if changed and self._warmed_fingerprint is not None:
+                    logger.info(
+                        "Model or agent profiles changed, regenerating starters"
+                    )
+                # Changed answers have new cache keys, so only missing ones
+                # are generated; answers cached before a restart are reused
+                await self.warm(refresh=near_expiry)
+            await asyncio.sleep(FINGERPRINT_POLL_SECONDS)
@@ -0,0 +1,10 @@
+"""Streaming module for the universal agent application.
+
+This module provides utilities for pushing streamed model output
+to the user interface as it is generated.
+"""
+
+from .coalescer import TokenStreamer
+from .replay import replay_text
+
+__all__ = ["TokenStreamer", "replay_text"]
@@ -0,0 +1,124 @@
+"""Token coalescing for streamed agent responses.
+
+This module buffers the text deltas produced by an agent run and flushes
+them to a UI sink (such as ``cl.Message.stream_token``) in small batches,
+so the model stream never waits on a slow websocket client.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from app.core import CONFIG
+
+
+__all__ = ["TokenStreamer"]
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStreamer:
+    """
+    Coalesce streamed text deltas and forward them to an async sink.
+
+    Deltas are accepted synchronously through ``push`` and flushed by a
+    background task whenever the flush interval elapses or enough characters
+    have accumulated. While the sink is busy, new deltas keep accumulating
+    and are sent as a single larger chunk on the next flush, which gives
+    natural backpressure without ever blocking the producer.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[str], Awaitable[None]],
+        flush_interval_ms: Optional[int] = None,
+        flush_chars: Optional[int] = None,
+    ):
+        """
+        Initialize the TokenStreamer.
+
+        Args:
+            sink: Async callable receiving each coalesced chunk of text
+            flush_interval_ms: Maximum buffering time. Defaults to configuration
+            flush_chars: Buffered size that forces a flush. Defaults to configuration
+        """
+        self._sink = sink
+        self._flush_interval = (
+            flush_interval_ms
+            if flush_interval_ms is not None
+            else CONFIG.stream_flush_interval_ms
+        ) / 1000
+        self._flush_chars = (
+            flush_chars if flush_chars is not None else CONFIG.stream_flush_chars
+        )
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._has_flushed = False
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "TokenStreamer":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def push(self, delta: str) -> None:
+        """
+        Queue a text delta for delivery to the sink.
+
+        This never awaits, so it is safe to call from the model stream loop.
+
+        Args:
+            delta: The newly generated text
+        """
+        if not delta or self._closed:
+            return
+
+        self._buffer.append(delta)
+        self._buffered_chars += len(delta)
+
+        # The first token is flushed immediately to minimize time-to-first-token
+        if not self._has_flushed or self._buffered_chars >= self._flush_chars:
+            self._wakeup.set()
+
+    async def aclose(self) -> None:
+        """Flush any remaining text and stop the background task."""
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def _drain(self) -> str:
+        chunk = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        return chunk
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if self._buffer:
+                self._has_flushed = True
+                try:
+                    await self._sink(self._drain())
+                except Exception as e:
+                    # A broken client connection must not abort the model run
+                    logger.warning(f"Failed to stream tokens to sink: {e}")
+
+            if self._closed and not self._buffer:
+                return
@@ -0,0 +1,35 @@
+"""Replay of precomputed responses as a token stream.
+
+This module feeds a complete response through the same delta callback a
+live model run uses, so cached answers stream to the UI exactly like
+generated ones.
+"""
+
+import asyncio
+import re
+from typing import Callable
+
+
+__all__ = ["replay_text"]
+
+
+# Split after whitespace so chunks resemble model tokens
+_CHUNK_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+async def replay_text(
+    text: str, on_delta: Callable[[str], None], chunk_words: int = 4
+) -> None:
+    """
+    Stream a complete text through a delta callback.
+
+    Args:
+        text: The text to replay
+        on_delta: Callback receiving each chunk
+        chunk_words: Number of words per chunk
+    """
+    words = _CHUNK_PATTERN.findall(text)
+    for i in range(0, len(words), chunk_words):
+        on_delta("".join(words[i : i + chunk_words]))
+        # Yield so the UI streamer can flush between chunks
+        await asyncio.sleep(0)
@@ -0,0 +1,371 @@
+"""Offline end-to-end benchmark of the agent workflow.
+
+This script replaces the OpenRouter models with a local simulated model
+of configurable time-to-first-token, streaming rate, output length and
+error rate, and runs 1..N concurrent chat sessions through the real
+workflow: routing, history budgeting, scheduling, resilience, the event
+bus and the token coalescer that feeds the UI. For every concurrency
+level it reports end-to-end latency, time to the first UI chunk, the
+workflow's overhead over the simulated model, throughput, error rate and
+peak memory, writes the results as JSON and compares them against a
+saved baseline.
+
+Usage:
+    python benchmarks/e2e.py [--concurrency 1,4,16] [--turns 3]
+        [--ttft-ms 300] [--tokens-per-second 80] [--output-tokens 120]
+        [--error-rate 0.0] [--seed 0] [--cache]
+        [--output .data/e2e.json] [--baseline baseline.json]
+        [--max-regression 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The simulated model never calls a provider, but the settings require keys
+for name in ("OPENAI_API_KEY", "OPENROUTER_API_KEY", "OPENROUTER_BASE_URL"):
+    os.environ.setdefault(name, "benchmark")
+
+from app.agents import agent_workflow  # noqa: E402
+from app.core import CONFIG, AgentRunError  # noqa: E402
+from app.events import event_bus, ui_sink  # noqa: E402
+from app.memory import ConversationMemory  # noqa: E402
+from app.starters import STARTER_PROMPTS  # noqa: E402
+from app.streaming import TokenStreamer  # noqa: E402
+from simulated_model import SimulatedModel, install_model  # noqa: E402
+
+
+# Metrics compared against the baseline, and whether lower values are better
+COMPARED_METRICS = {
+    ("latency_ms", "p50"): True,
+    ("latency_ms", "p99"): True,
+    ("ttft_ms", "p50"): True,
+    ("ttft_ms", "p99"): True,
+    ("overhead_ms", "p50"): True,
+    ("throughput_tokens_per_s",): False,
+    ("error_rate",): True,
+}
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Summarize a sample as mean, p50, p90 and p99."""
+    if not values:
+        return {"mean": None, "p50": None, "p90": None, "p99": None}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return round(ordered[int(fraction * (len(ordered) - 1))], 2)
+
+    return {
+        "mean": round(statistics.fmean(ordered), 2),
+        "p50": at(0.5),
+        "p90": at(0.9),
+        "p99": at(0.99),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Get the peak resident set size of the process."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def new_samples() -> Dict[str, List[float]]:
+    """Empty per-request samples of a concurrency level."""
+    return {"latency_ms": [], "ttft_ms": [], "tokens_per_s": [], "tokens": []}
+
+
+async def run_session(
+    session: int, turns: int, level: int, samples: Dict[str, List[float]]
+) -> int:
+    """
+    Run one chat session the way ``process_message`` does.
+
+    Args:
+        session: Index of the session within its concurrency level
+        turns: Messages sent by the session, one after the other
+        level: Concurrency level, used to keep user ids unique
+        samples: Per-request samples the session appends to
+
+    Returns:
+        Number of failed turns
+    """
+    memory = ConversationMemory()
+    current_agent = "manager"
+    errors = 0
+
+    for turn in range(turns):
+        message = STARTER_PROMPTS[(session + turn) % len(STARTER_PROMPTS)].message
+        started = time.perf_counter()
+        first_chunk_at: List[float] = []
+        tokens = 0
+
+        async def sink(chunk: str) -> None:
+            if not first_chunk_at:
+                first_chunk_at.append(time.perf_counter())
+
+        def count(delta: str) -> None:
+            nonlocal tokens
+            tokens += 1
+            streamer.push(delta)
+
+        stream_id = f"benchmark-{level}-{session}-{turn}"
+        try:
+            async with TokenStreamer(sink) as streamer:
+                ui_sink.open_stream(stream_id, count)
+                try:
+                    _, current_agent = await agent_workflow.run_streaming(
+                        message,
+                        current_agent,
+                        memory=memory,
+                        user_id=f"benchmark-{level}-{session}",
+                        stream_id=stream_id,
+                    )
+                finally:
+                    await ui_sink.close_stream(stream_id)
+        except AgentRunError as e:
+            errors += 1
+            # An @ mention switches agents even if its run failed
+            current_agent = (
+                agent_workflow.parse_agent_switch(message)[0] or current_agent
+            )
+            continue
+
+        finished = time.perf_counter()
+        latency_ms = (finished - started) * 1000
+        samples["latency_ms"].append(latency_ms)
+        samples["tokens"].append(tokens)
+        if first_chunk_at:
+            ttft_ms = (first_chunk_at[0] - started) * 1000
+            samples["ttft_ms"].append(ttft_ms)
+            if tokens > 1 and finished > first_chunk_at[0]:
+                samples["tokens_per_s"].append(
+                    (tokens - 1) / (finished - first_chunk_at[0])
+                )
+    return errors
+
+
+async def run_level(level: int, turns: int, simulated: SimulatedModel) -> dict:
+    """
+    Run ``level`` concurrent sessions and summarize their requests.
+
+    Args:
+        level: Number of concurrent sessions
+        turns: Messages sent by each session
+        simulated: The simulated model serving the sessions
+
+    Returns:
+        The level's results
+    """
+    samples = new_samples()
+    requests_before, failures_before = simulated.requests, simulated.failures
+
+    started = time.perf_counter()
+    errors = await asyncio.gather(
+        *(run_session(session, turns, level, samples) for session in range(level))
+    )
+    wall_s = time.perf_counter() - started
+
+    total = level * turns
+    return {
+        "concurrency": level,
+        "requests": total,
+        "errors": sum(errors),
+        "error_rate": round(sum(errors) / total, 4),
+        "model_requests": simulated.requests - requests_before,
+        "injected_failures": simulated.failures - failures_before,
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(total / wall_s, 2),
+        "throughput_tokens_per_s": round(sum(samples["tokens"]) / wall_s, 1),
+        "latency_ms": percentiles(samples["latency_ms"]),
+        "ttft_ms": percentiles(samples["ttft_ms"]),
+        "overhead_ms": percentiles(
+            [latency - simulated.ideal_ms for latency in samples["latency_ms"]]
+        ),
+        "tokens_per_s": percentiles(samples["tokens_per_s"]),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def current_commit() -> Optional[str]:
+    """Get the short hash of the checked out commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, max_regression: Optional[float]) -> int:
+    """
+    Print the change of every compared metric against a baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Results of a previous run
+        max_regression: Fraction by which a metric may get worse, if checked
+
+    Returns:
+        1 if a metric regressed by more than ``max_regression``, else 0
+    """
+    if baseline.get("model") != results["model"]:
+        print("warning: the baseline used a different simulated model")
+
+    previous_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    status = 0
+    print(f"\ncompared with {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for level in results["levels"]:
+        previous = previous_levels.get(level["concurrency"])
+        if previous is None:
+            continue
+        for path, lower_is_better in COMPARED_METRICS.items():
+            current, before = level, previous
+            for key in path:
+                current, before = current.get(key), before.get(key)
+            if current is None or before is None:
+                continue
+
+            name = ".".join(path)
+            if before == 0:
+                print(f"  c={level['concurrency']:<4}{name:<26}{before} -> {current}")
+                worse = current > 0 if lower_is_better else False
+                change = None
+            else:
+                change = (current - before) / abs(before)
+                print(
+                    f"  c={level['concurrency']:<4}{name:<26}{before} -> {current} "
+                    f"({change:+.1%})"
+                )
+                worse = change > 0 if lower_is_better else change < 0
+            if worse and max_regression is not None:
+                if change is None or abs(change) > max_regression:
+                    print(f"    regressed by more than {max_regression:.0%}")
+                    status = 1
+    return status
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run every concurrency level and collect the results."""
+    simulated = SimulatedModel(
+        args.ttft_ms,
+        args.tokens_per_second,
+        args.output_tokens,
+        args.error_rate,
+        args.seed,
+    )
+    install_model(simulated)
+    CONFIG.response_cache_enabled = args.cache
+
+    levels = []
+    try:
+        # A single warm-up turn builds the agents and the intent classifier
+        await run_session(0, 1, 0, new_samples())
+        for level in args.concurrency:
+            result = await run_level(level, args.turns, simulated)
+            levels.append(result)
+            print(
+                f"c={level:<4} latency p50={result['latency_ms']['p50']}ms "
+                f"p99={result['latency_ms']['p99']}ms  "
+                f"ttft p50={result['ttft_ms']['p50']}ms  "
+                f"overhead p50={result['overhead_ms']['p50']}ms  "
+                f"{result['throughput_tokens_per_s']} tok/s  "
+                f"errors={result['error_rate']:.1%}  rss={result['peak_rss_mb']}MB"
+            )
+    finally:
+        await event_bus.aclose()
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": current_commit(),
+        "python": sys.version.split()[0],
+        "model": {
+            "ttft_ms": args.ttft_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "output_tokens": args.output_tokens,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+        },
+        "turns": args.turns,
+        "response_cache": args.cache,
+        "levels": levels,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 4, 16],
+        help="Comma-separated numbers of concurrent sessions",
+    )
+    parser.add_argument("--turns", type=int, default=3, help="Messages per session")
+    parser.add_argument("--ttft-ms", type=float, default=300, help="Simulated TTFT")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=80, help="Simulated streaming rate"
+    )
+    parser.add_argument(
+        "--output-tokens", type=int, default=120, help="Tokens per simulated response"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Simulated failure probability"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Failure injection seed")
+    parser.add_argument(
+        "--cache", action="store_true", help="Keep the response cache enabled"
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(ROOT, ".data", "e2e.json"),
+        help="JSON file the results are written to",
+    )
+    parser.add_argument("--baseline", help="JSON results of a previous run")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=None,
+        help="Fail when a metric gets worse than the baseline by more than this fraction",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show workflow logs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    results = asyncio.run(run(args))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            return compare(results, json.load(baseline), args.max_regression)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Import-time benchmark for the application entry point.
+
+This script imports a module in fresh interpreters under
+``python -X importtime``, reports the median total import time and the
+most expensive top-level packages, and appends the result to a JSONL
+history file so import cost can be tracked across commits.
+
+Usage:
+    python benchmarks/import_time.py [--module main] [--runs 5] [--top 15]
+        [--history .data/import_time.jsonl] [--max-regression 0.2]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Aggregate ``-X importtime`` output by top-level package.
+
+    Self times are summed, so a package is charged for its own modules
+    regardless of which module imported it, and the totals add up to the
+    whole import time.
+
+    Args:
+        stderr: Standard error of an interpreter run with ``-X importtime``
+
+    Returns:
+        Import time in microseconds keyed by top-level package
+    """
+    packages: Dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:") :].split("|", 2)
+        if not self_time.strip().isdigit():
+            continue  # Header line
+        packages[name.strip().split(".")[0]] += int(self_time)
+    return dict(packages)
+
+
+def measure(module: str) -> Dict[str, int]:
+    """
+    Import a module once in a fresh interpreter.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Import time in microseconds keyed by top-level package
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.splitlines()[-20:])
+        raise RuntimeError(f"Importing {module} failed:\n{tail}")
+    return parse_importtime(result.stderr)
+
+
+def current_commit() -> Optional[str]:
+    """Get the short hash of the checked out commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def last_record(history_path: str, module: str) -> Optional[dict]:
+    """Get the most recent history record of a module."""
+    if not os.path.exists(history_path):
+        return None
+    previous = None
+    with open(history_path) as history:
+        for line in history:
+            record = json.loads(line)
+            if record.get("module") == module:
+                previous = record
+    return previous
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreter runs")
+    parser.add_argument("--top", type=int, default=15, help="Packages to report")
+    parser.add_argument(
+        "--history",
+        default=os.path.join(ROOT, ".data", "import_time.jsonl"),
+        help="JSONL file the result is appended to",
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=None,
+        help="Fail when the total grows by more than this fraction of the last run",
+    )
+    args = parser.parse_args(argv)
+
+    # The first run warms the bytecode cache and is not counted
+    measure(args.module)
+    runs = [measure(args.module) for _ in range(args.runs)]
+
+    packages = {
+        name: statistics.median(run.get(name, 0) for run in runs)
+        for name in set().union(*runs)
+    }
+    total_ms = statistics.median(sum(run.values()) for run in runs) / 1000
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]
+
+    print(f"import {args.module}: {total_ms:.1f} ms (median of {args.runs} runs)")
+    for name, micros in top:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": current_commit(),
+        "python": sys.version.split()[0],
+        "module": args.module,
+        "runs": args.runs,
+        "total_ms": round(total_ms, 2),
+        "packages_ms": {name: round(micros / 1000, 2) for name, micros in top},
+    }
+
+    status = 0
+    previous = last_record(args.history, args.module)
+    if previous is not None:
+        change = (total_ms - previous["total_ms"]) / previous["total_ms"]
+        print(
+            f"previous: {previous['total_ms']:.1f} ms at {previous.get('commit')} "
+            f"({change:+.1%})"
+        )
+        if args.max_regression is not None and change > args.max_regression:
+            print(f"import time regressed by more than {args.max_regression:.0%}")
+            status = 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, "a") as history:
+        history.write(json.dumps(record) + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
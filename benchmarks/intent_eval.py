@@ -0,0 +1,138 @@
+"""Offline evaluation of the local intent classifier.
+
+This script classifies labeled messages the way the workflow does for
+messages without an @ mention and reports how often a message is routed,
+how often a routed message reaches the right agent, per-agent precision
+and recall, and the classification latency. Labeled messages come from a
+JSONL file of ``{"text", "agent"}`` records and/or a JSON export of
+Chainlit threads, where every user message starting with an @ mention is
+labeled with the mentioned agent.
+
+Usage:
+    python benchmarks/intent_eval.py [--examples labeled.jsonl]
+        [--threads threads.json] [--threshold 0.15] [--margin 0.05]
+        [--errors 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.agents import agent_workflow  # noqa: E402
+from app.agents.intent import examples_from_threads, load_examples  # noqa: E402
+
+
+def load_labeled(
+    examples_path: Optional[str], threads_path: Optional[str]
+) -> List[Tuple[str, str]]:
+    """
+    Load the labeled messages to evaluate on.
+
+    Args:
+        examples_path: JSONL file of ``{"text", "agent"}`` records
+        threads_path: JSON file holding a list of Chainlit thread dicts
+
+    Returns:
+        (text, agent name) pairs
+    """
+    labeled = [
+        (text, agent_name)
+        for agent_name, texts in load_examples(examples_path).items()
+        for text in texts
+    ]
+    if threads_path:
+        with open(threads_path) as threads:
+            labeled += examples_from_threads(
+                json.load(threads), agent_workflow.parse_agent_switch
+            )
+    return labeled
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--examples", help="JSONL file of labeled messages")
+    parser.add_argument("--threads", help="JSON export of Chainlit threads")
+    parser.add_argument("--threshold", type=float, help="Override the threshold")
+    parser.add_argument("--margin", type=float, help="Override the minimum margin")
+    parser.add_argument("--errors", type=int, default=10, help="Misroutes to show")
+    args = parser.parse_args(argv)
+
+    labeled = load_labeled(args.examples, args.threads)
+    if not labeled:
+        print("no labeled messages; pass --examples and/or --threads")
+        return 1
+
+    classifier = agent_workflow.get_intent_classifier()
+    if args.threshold is not None:
+        classifier.threshold = args.threshold
+    if args.margin is not None:
+        classifier.min_margin = args.margin
+    default_agent = agent_workflow.default_agent
+
+    latencies_us: List[float] = []
+    predicted: Counter = Counter()
+    expected: Counter = Counter()
+    correct: Counter = Counter()
+    errors: List[Tuple[str, str, str, float]] = []
+    routed = 0
+
+    for text, agent_name in labeled:
+        started = time.perf_counter()
+        prediction = classifier.classify(text)
+        latencies_us.append((time.perf_counter() - started) * 1_000_000)
+
+        # Unconfident messages stay with the default agent
+        chosen = prediction.agent_name if prediction.confident else default_agent
+        routed += chosen != default_agent
+        expected[agent_name] += 1
+        predicted[chosen] += 1
+        if chosen == agent_name:
+            correct[agent_name] += 1
+        elif chosen != default_agent:
+            errors.append((text, agent_name, chosen, prediction.score))
+
+    total = len(labeled)
+    routed_correct = sum(
+        count for name, count in correct.items() if name != default_agent
+    )
+    latencies_us.sort()
+    print(
+        f"{total} messages, threshold={classifier.threshold}, "
+        f"margin={classifier.min_margin}"
+    )
+    print(f"  accuracy:          {sum(correct.values()) / total:.1%}")
+    print(f"  routed:            {routed / total:.1%}")
+    print(
+        f"  routed precision:  {routed_correct / routed:.1%}"
+        if routed
+        else "  routed precision:  n/a"
+    )
+    print(
+        f"  latency:           p50={statistics.median(latencies_us):.0f}us "
+        f"p99={latencies_us[int(0.99 * (total - 1))]:.0f}us"
+    )
+
+    print(f"\n  {'agent':<24}{'precision':>10}{'recall':>10}{'support':>10}")
+    for name in agent_workflow.agent_names:
+        precision = correct[name] / predicted[name] if predicted[name] else 0.0
+        recall = correct[name] / expected[name] if expected[name] else 0.0
+        print(f"  {name:<24}{precision:>10.1%}{recall:>10.1%}{expected[name]:>10}")
+
+    if errors and args.errors:
+        print("\nmisrouted:")
+        for text, agent_name, chosen, score in errors[: args.errors]:
+            print(f"  {agent_name} -> {chosen} ({score:.2f}): {text[:80]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,697 @@
+"""Websocket load test of the Chainlit app.
+
+This script starts the app on a simulated model (see ``simulated_app``),
+connects many concurrent Chainlit socket sessions to it and replays
+conversation scripts through them the way the browser client does:
+connecting starts a chat, messages (including starters and ``@agent``
+switches) are streamed back, and resume steps reconnect to the thread.
+It reports latency percentiles per phase and samples the server's CPU
+and memory, and writes the results as JSON. Scripts can be exported
+from the ``Step`` table of the Chainlit database.
+
+Linux only, since server usage is read from ``/proc``.
+
+Usage:
+    python benchmarks/loadtest.py [--users 50] [--ramp-up 10]
+        [--scripts scripts.jsonl] [--resume] [--think-ms 500]
+        [--ttft-ms 300] [--tokens-per-second 80] [--output-tokens 120]
+        [--url http://127.0.0.1:8000 --server-pid PID]
+        [--output .data/loadtest.json]
+    python benchmarks/loadtest.py --export-scripts scripts.jsonl
+        [--database-url postgresql://...] [--limit 200]
+
+Scripts are JSONL records of ``{"name": ..., "steps": [...]}`` where a
+step is a message string, ``{"resume": true}`` or ``{"sleep_s": 1.5}``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app is served on a simulated model, but its settings require keys
+for name in ("OPENAI_API_KEY", "OPENROUTER_API_KEY", "OPENROUTER_BASE_URL"):
+    os.environ.setdefault(name, "loadtest")
+
+SOCKET_PATH = "/ws/socket.io"
+
+# Follow-ups sent after each starter: a plain turn, then an @ switch
+DEFAULT_FOLLOW_UPS = [
+    "Can you go deeper on the most promising point?",
+    "@manager Turn this into a plan with milestones for the next 3 months",
+]
+
+EXPORT_QUERY = """
+SELECT s."threadId", s.output
+FROM "Step" s
+JOIN (
+    SELECT id FROM "Thread"
+    WHERE "deletedAt" IS NULL
+    ORDER BY "createdAt" DESC
+    LIMIT $1
+) t ON t.id = s."threadId"
+WHERE s.type = 'user_message' AND s.output IS NOT NULL AND s.output <> ''
+ORDER BY s."threadId", s."createdAt"
+"""
+
+
+class PhaseRecorder:
+    """Latency samples and error counts keyed by phase."""
+
+    def __init__(self):
+        """Initialize the PhaseRecorder."""
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, phase: str, started: float, finished: float) -> None:
+        """Record one successful phase."""
+        self.samples[phase].append((finished - started) * 1000)
+
+    def fail(self, phase: str) -> None:
+        """Record one failed phase."""
+        self.errors[phase] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        """Percentiles and error counts of every phase."""
+        return {
+            phase: {
+                "count": len(self.samples[phase]),
+                "errors": self.errors[phase],
+                **percentiles(self.samples[phase]),
+            }
+            for phase in sorted(set(self.samples) | set(self.errors))
+        }
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Summarize a sample as mean, p50, p90, p99 and max."""
+    if not values:
+        return {"mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return round(ordered[int(fraction * (len(ordered) - 1))], 2)
+
+    return {
+        "mean": round(statistics.fmean(ordered), 2),
+        "p50": at(0.5),
+        "p90": at(0.9),
+        "p99": at(0.99),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class VirtualUser:
+    """
+    One browser tab talking to the Chainlit socket.
+
+    Server events are queued as they arrive, and every phase waits for
+    the event that ends it: ``task_end`` for a chat start or a message,
+    ``resume_thread`` for a resume.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        identifier: str,
+        token: Optional[str],
+        recorder: PhaseRecorder,
+        timeout: float,
+    ):
+        """
+        Initialize the VirtualUser.
+
+        Args:
+            base_url: URL of the Chainlit app
+            identifier: Identifier of the user the token was minted for
+            token: Chainlit access token, if the app requires login
+            recorder: Recorder of the phase latencies
+            timeout: Maximum duration of a phase in seconds
+        """
+        self.base_url = base_url
+        self.identifier = identifier
+        self.token = token
+        self.recorder = recorder
+        self.timeout = timeout
+        self.thread_id: Optional[str] = None
+        self._sio = None
+        self._events: asyncio.Queue = asyncio.Queue()
+
+    def _on(self, event: str):
+        async def handler(data=None, *args):
+            if event == "first_interaction" and isinstance(data, dict):
+                self.thread_id = data.get("thread_id") or self.thread_id
+            self._events.put_nowait((event, data, time.perf_counter()))
+
+        return handler
+
+    async def _wait_for(self, *events: str) -> tuple:
+        deadline = time.perf_counter() + self.timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            event, data, at = await asyncio.wait_for(self._events.get(), remaining)
+            if event in events:
+                return event, data, at
+
+    def _drain(self) -> None:
+        while not self._events.empty():
+            self._events.get_nowait()
+
+    async def connect(self, phase: str = "connect") -> None:
+        """
+        Open a chat session, resuming the user's thread for a resume phase.
+
+        Args:
+            phase: ``connect`` to start a new chat, ``resume`` to resume
+        """
+        import socketio
+
+        self._sio = socketio.AsyncClient(reconnection=False)
+        for event in (
+            "task_end",
+            "stream_start",
+            "stream_token",
+            "new_message",
+            "first_interaction",
+            "resume_thread",
+            "resume_thread_error",
+        ):
+            self._sio.on(event, self._on(event))
+
+        resuming = phase == "resume"
+        auth = {
+            "clientType": "webapp",
+            "sessionId": str(uuid.uuid4()),
+            "threadId": self.thread_id if resuming else None,
+            "userEnv": "{}",
+            "chatProfile": None,
+        }
+        headers = {"Cookie": f"access_token={self.token}"} if self.token else {}
+
+        started = time.perf_counter()
+        try:
+            await self._sio.connect(
+                self.base_url,
+                socketio_path=SOCKET_PATH,
+                transports=["websocket"],
+                auth=auth,
+                headers=headers,
+                wait_timeout=self.timeout,
+            )
+            await self._sio.emit("connection_successful")
+            if resuming:
+                event, _, finished = await self._wait_for(
+                    "resume_thread", "resume_thread_error"
+                )
+                if event == "resume_thread_error":
+                    raise RuntimeError("thread could not be resumed")
+            else:
+                _, _, finished = await self._wait_for("task_end")
+        except Exception:
+            self.recorder.fail(phase)
+            raise
+        self.recorder.record(phase, started, finished)
+
+    async def send(self, text: str) -> None:
+        """
+        Send a message and wait until its reply has been streamed.
+
+        Args:
+            text: The message, as typed in the composer
+        """
+        self._drain()
+        payload = {
+            "message": {
+                "id": str(uuid.uuid4()),
+                "threadId": self.thread_id or "",
+                "name": self.identifier,
+                "type": "user_message",
+                "output": text,
+                "createdAt": datetime.now(timezone.utc).isoformat(),
+            },
+            "fileReferences": None,
+        }
+
+        started = time.perf_counter()
+        first_token_at: Optional[float] = None
+        failed = False
+        try:
+            await self._sio.emit("client_message", payload)
+            while True:
+                event, data, at = await self._wait_for(
+                    "stream_start", "stream_token", "new_message", "task_end"
+                )
+                # Chainlit sends the first chunk of a reply with stream_start
+                if event in ("stream_start", "stream_token") and first_token_at is None:
+                    first_token_at = at
+                elif event == "new_message" and (data or {}).get("isError"):
+                    failed = True
+                elif event == "task_end":
+                    break
+        except Exception:
+            self.recorder.fail("message")
+            raise
+
+        if failed:
+            self.recorder.fail("message")
+            return
+        if first_token_at is not None:
+            self.recorder.record("first_token", started, first_token_at)
+        self.recorder.record("message", started, at)
+
+    async def close(self) -> None:
+        """Disconnect from the socket."""
+        if self._sio is not None:
+            await self._sio.disconnect()
+            self._sio = None
+
+
+async def run_user(
+    user: VirtualUser, script: dict, start_delay: float, think_s: float
+) -> None:
+    """
+    Replay one conversation script as one user.
+
+    A step failure ends the script, like a user giving up on the tab.
+
+    Args:
+        user: The virtual user
+        script: Conversation script to replay
+        start_delay: Delay before connecting, spreading the ramp-up
+        think_s: Pause between steps
+    """
+    await asyncio.sleep(start_delay)
+    try:
+        await user.connect()
+        for step in script["steps"]:
+            if isinstance(step, str):
+                step = {"message": step}
+            if "sleep_s" in step:
+                await asyncio.sleep(step["sleep_s"])
+                continue
+            if step.get("resume"):
+                await user.close()
+                await user.connect("resume")
+            else:
+                await user.send(step["message"])
+            await asyncio.sleep(think_s)
+    except Exception:
+        pass
+    finally:
+        try:
+            await user.close()
+        except Exception:
+            pass
+
+
+class ServerMonitor:
+    """Periodic CPU and memory samples of a server process from ``/proc``."""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        """
+        Initialize the ServerMonitor.
+
+        Args:
+            pid: Process to sample
+            interval: Seconds between samples
+        """
+        self.pid = pid
+        self.interval = interval
+        self.cpu_percent: List[float] = []
+        self.rss_mb: List[float] = []
+        self._ticks_per_second = os.sysconf("SC_CLK_TCK")
+        self._task: Optional[asyncio.Task] = None
+
+    def _cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as stat:
+            # The command name may contain spaces, so split after it
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self._ticks_per_second
+
+    def _rss_mb(self) -> float:
+        with open(f"/proc/{self.pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def _run(self) -> None:
+        previous_cpu, previous_at = self._cpu_seconds(), time.perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            cpu, at = self._cpu_seconds(), time.perf_counter()
+            self.cpu_percent.append((cpu - previous_cpu) / (at - previous_at) * 100)
+            self.rss_mb.append(self._rss_mb())
+            previous_cpu, previous_at = cpu, at
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, OSError):
+                pass
+            self._task = None
+
+    def summary(self) -> dict:
+        """Mean and peak usage over the samples."""
+        return {
+            "pid": self.pid,
+            "samples": len(self.cpu_percent),
+            "cpu_percent": percentiles(self.cpu_percent),
+            "rss_mb": percentiles(self.rss_mb),
+        }
+
+
+def resolve_auth_secret(explicit: Optional[str]) -> str:
+    """
+    Get the secret the server signs Chainlit access tokens with.
+
+    Args:
+        explicit: Secret given on the command line
+
+    Returns:
+        The given secret, else the one of the environment or ``.env``,
+        else a new one that is passed to the started server
+    """
+    if explicit:
+        return explicit
+    from dotenv import dotenv_values
+
+    return (
+        dotenv_values(os.path.join(ROOT, ".env")).get("CHAINLIT_AUTH_SECRET")
+        or os.environ.get("CHAINLIT_AUTH_SECRET")
+        or secrets.token_urlsafe(32)
+    )
+
+
+def mint_token(identifier: str, secret: str) -> str:
+    """
+    Create the access token Chainlit issues to a logged in user.
+
+    Args:
+        identifier: Identifier of the user
+        secret: Chainlit auth secret
+
+    Returns:
+        A signed JWT, accepted by apps that require login
+    """
+    import jwt
+
+    payload = {
+        "identifier": identifier,
+        "display_name": identifier,
+        "metadata": {"provider": "loadtest"},
+        "exp": datetime.now(timezone.utc) + timedelta(hours=12),
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def start_server(port: int, args: argparse.Namespace, secret: str) -> subprocess.Popen:
+    """
+    Start the app on the simulated model and wait until it serves requests.
+
+    Args:
+        port: Port to listen on
+        args: Command line arguments holding the simulated model settings
+        secret: Chainlit auth secret
+
+    Returns:
+        The server process
+    """
+    env = {
+        **os.environ,
+        "CHAINLIT_AUTH_SECRET": secret,
+        "SIMULATED_TTFT_MS": str(args.ttft_ms),
+        "SIMULATED_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "SIMULATED_OUTPUT_TOKENS": str(args.output_tokens),
+        "SIMULATED_ERROR_RATE": str(args.error_rate),
+    }
+
+    os.makedirs(os.path.join(ROOT, ".data"), exist_ok=True)
+    log = open(os.path.join(ROOT, ".data", "loadtest_server.log"), "w")
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "chainlit",
+            "run",
+            os.path.join("benchmarks", "simulated_app.py"),
+            "--headless",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(
+                "The server exited during startup, see .data/loadtest_server.log"
+            )
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("The server did not start within 60 seconds")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    """Stop a started server, letting its shutdown handlers run."""
+    server.terminate()
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def load_scripts(path: str) -> List[dict]:
+    """Load conversation scripts from a JSONL file."""
+    with open(path) as lines:
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+def default_scripts(resume: bool) -> List[dict]:
+    """
+    Build one script per starter prompt.
+
+    Each script sends the starter, a plain follow-up and an ``@manager``
+    switch, optionally followed by a resume of the thread and one more
+    message.
+
+    Args:
+        resume: Whether to resume the thread at the end of each script
+
+    Returns:
+        The conversation scripts
+    """
+    from app.starters.definitions import STARTER_PROMPTS
+
+    scripts = []
+    for starter in STARTER_PROMPTS:
+        steps: List = [starter.message, *DEFAULT_FOLLOW_UPS]
+        if resume:
+            steps += [{"resume": True}, "What should I do first?"]
+        scripts.append({"name": starter.label, "steps": steps})
+    return scripts
+
+
+async def export_scripts(database_url: str, path: str, limit: int) -> int:
+    """
+    Export the user messages of recent threads as conversation scripts.
+
+    Args:
+        database_url: PostgreSQL URL of the Chainlit database
+        path: JSONL file to write the scripts to
+        limit: Number of most recent threads to export
+
+    Returns:
+        Number of exported scripts
+    """
+    import asyncpg
+
+    connection = await asyncpg.connect(database_url)
+    try:
+        rows = await connection.fetch(EXPORT_QUERY, limit)
+    finally:
+        await connection.close()
+
+    threads: Dict[str, List[str]] = defaultdict(list)
+    for row in rows:
+        threads[row["threadId"]].append(row["output"])
+    with open(path, "w") as scripts:
+        for thread_id, messages in threads.items():
+            scripts.write(json.dumps({"name": thread_id, "steps": messages}) + "\n")
+    return len(threads)
+
+
+async def run(
+    args: argparse.Namespace, base_url: str, pid: Optional[int], secret: str
+) -> dict:
+    """Replay the scripts against a running server and collect the results."""
+    scripts = (
+        load_scripts(args.scripts) if args.scripts else default_scripts(args.resume)
+    )
+    if not scripts:
+        raise ValueError("No conversation scripts to replay")
+    recorder = PhaseRecorder()
+    monitor = ServerMonitor(pid) if pid else None
+    if monitor is not None:
+        monitor.start()
+
+    users = [
+        VirtualUser(
+            base_url,
+            f"loadtest-{index}",
+            mint_token(f"loadtest-{index}", secret),
+            recorder,
+            args.timeout,
+        )
+        for index in range(args.users)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_user(
+                user,
+                scripts[index % len(scripts)],
+                index * args.ramp_up / args.users,
+                args.think_ms / 1000,
+            )
+            for index, user in enumerate(users)
+        )
+    )
+    wall_s = time.perf_counter() - started
+    if monitor is not None:
+        await monitor.stop()
+
+    phases = recorder.summary()
+    messages = phases.get("message", {}).get("count", 0)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": base_url,
+        "users": args.users,
+        "ramp_up_s": args.ramp_up,
+        "scripts": len(scripts),
+        "wall_s": round(wall_s, 3),
+        "messages_per_s": round(messages / wall_s, 2),
+        "phases": phases,
+        "server": monitor.summary() if monitor is not None else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="Concurrent sessions")
+    parser.add_argument(
+        "--ramp-up", type=float, default=10, help="Seconds over which users connect"
+    )
+    parser.add_argument("--scripts", help="JSONL file of conversation scripts")
+    parser.add_argument(
+        "--resume", action="store_true", help="Resume threads in the default scripts"
+    )
+    parser.add_argument("--think-ms", type=float, default=500, help="Pause per step")
+    parser.add_argument("--timeout", type=float, default=120, help="Phase timeout")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server")
+    parser.add_argument("--url", help="Load an already running app instead")
+    parser.add_argument("--server-pid", type=int, help="Process of the running app")
+    parser.add_argument("--auth-secret", help="CHAINLIT_AUTH_SECRET of the app")
+    parser.add_argument("--ttft-ms", type=float, default=300, help="Simulated TTFT")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=80, help="Simulated streaming rate"
+    )
+    parser.add_argument(
+        "--output-tokens", type=int, default=120, help="Tokens per simulated response"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Simulated failure probability"
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(ROOT, ".data", "loadtest.json"),
+        help="JSON file the results are written to",
+    )
+    parser.add_argument("--export-scripts", help="Write scripts from the database")
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Chainlit database to export scripts from",
+    )
+    parser.add_argument("--limit", type=int, default=200, help="Threads to export")
+    args = parser.parse_args(argv)
+
+    if args.export_scripts:
+        if not args.database_url:
+            print("--database-url or DATABASE_URL is required to export scripts")
+            return 1
+        count = asyncio.run(
+            export_scripts(args.database_url, args.export_scripts, args.limit)
+        )
+        print(f"exported {count} scripts to {args.export_scripts}")
+        return 0
+
+    secret = resolve_auth_secret(args.auth_secret)
+    server = None
+    if args.url:
+        base_url, pid = args.url.rstrip("/"), args.server_pid
+    else:
+        server = start_server(args.port, args, secret)
+        base_url, pid = f"http://127.0.0.1:{args.port}", server.pid
+
+    try:
+        results = asyncio.run(run(args, base_url, pid, secret))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    for phase, summary in results["phases"].items():
+        print(
+            f"{phase:<12} n={summary['count']:<6} errors={summary['errors']:<4} "
+            f"p50={summary['p50']}ms p90={summary['p90']}ms p99={summary['p99']}ms"
+        )
+    print(f"{results['messages_per_s']} messages/s over {results['wall_s']}s")
+    if results["server"] is not None:
+        server_usage = results["server"]
+        print(
+            f"server cpu mean={server_usage['cpu_percent']['mean']}% "
+            f"max={server_usage['cpu_percent']['max']}%  "
+            f"rss max={server_usage['rss_mb']['max']}MB"
+        )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""Chainlit entry point serving the application with a simulated model.
+
+This module installs the simulated model of ``simulated_model`` (tuned
+with ``SIMULATED_*`` environment variables) and registers the handlers of
+``main``, so the full Chainlit app can be load tested without provider
+access:
+
+    chainlit run benchmarks/simulated_app.py --headless
+"""
+
+import os
+import sys
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from simulated_model import SimulatedModel, install_model  # noqa: E402
+
+install_model(SimulatedModel.from_env())
+
+import main  # noqa: E402, F401
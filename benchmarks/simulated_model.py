@@ -0,0 +1,98 @@
+"""Simulated streaming model shared by the offline benchmarks.
+
+The model is a PydanticAI ``FunctionModel`` with a fixed latency profile
+that replaces every OpenRouter model of the application, so benchmarks
+exercise the real workflow without network access or provider cost.
+"""
+
+import asyncio
+import os
+import random
+import sys
+from typing import AsyncIterator, List
+
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+
+class SimulatedProviderError(Exception):
+    """Injected provider failure, retried like an HTTP 503."""
+
+    status_code = 503
+
+
+class SimulatedModel:
+    """
+    Streaming model with a fixed latency profile.
+
+    Every request waits ``ttft_ms`` before its first token, then streams
+    ``output_tokens`` one-word tokens at ``tokens_per_second``. A request
+    fails before streaming with probability ``error_rate``.
+    """
+
+    def __init__(
+        self,
+        ttft_ms: float,
+        tokens_per_second: float,
+        output_tokens: int,
+        error_rate: float,
+        seed: int,
+    ):
+        """
+        Initialize the SimulatedModel.
+
+        Args:
+            ttft_ms: Delay before the first token
+            tokens_per_second: Streaming rate after the first token
+            output_tokens: Tokens in every response
+            error_rate: Probability of a request failing before it streams
+            seed: Seed of the failure injection
+        """
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self.model = FunctionModel(stream_function=self._stream)
+
+    @classmethod
+    def from_env(cls) -> "SimulatedModel":
+        """Create a model configured by ``SIMULATED_*`` environment variables."""
+        return cls(
+            ttft_ms=float(os.environ.get("SIMULATED_TTFT_MS", 300)),
+            tokens_per_second=float(os.environ.get("SIMULATED_TOKENS_PER_SECOND", 80)),
+            output_tokens=int(os.environ.get("SIMULATED_OUTPUT_TOKENS", 120)),
+            error_rate=float(os.environ.get("SIMULATED_ERROR_RATE", 0)),
+            seed=int(os.environ.get("SIMULATED_SEED", 0)),
+        )
+
+    @property
+    def ideal_ms(self) -> float:
+        """Duration of one successful request with zero workflow overhead."""
+        return self.ttft_ms + (self.output_tokens - 1) / self.tokens_per_second * 1000
+
+    async def _stream(
+        self, messages: List[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[str]:
+        self.requests += 1
+        await asyncio.sleep(self.ttft_ms / 1000)
+        if self._random.random() < self.error_rate:
+            self.failures += 1
+            raise SimulatedProviderError("simulated provider failure")
+
+        interval = 1 / self.tokens_per_second
+        for index in range(self.output_tokens):
+            if index:
+                await asyncio.sleep(interval)
+            yield f"token{index} "
+
+
+def install_model(simulated: SimulatedModel) -> None:
+    """Serve every model name of the application with the simulated model."""
+    import app.llm.llm  # noqa: F401
+
+    llm_module = sys.modules["app.llm.llm"]
+    llm_module._models.clear()
+    llm_module.get_model = lambda model_name=None: simulated.model
@@ -9,8 +9,22 @@ from chainlit.types import ThreadDict
 from dotenv import load_dotenv
 from typing import Dict, Optional, List
 import logging
-from app.agents import agent_workflow
-from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart
+from app.agents import agent_catalog, agent_workflow
+from app.agents.manager_agent import plan_store
+from app.cache import response_cache
+from app.core import CONFIG, AgentRunError
+from app.data import (
+    close_data_layer,
+    close_pool,
+    create_data_layer,
+    thread_history_loader,
+)
+from app.memory import ConversationMemory
+from app.events import event_bus, ui_sink
+from app.llm import shared_http_client, token_counter, usage_metadata
+from app.metrics import active_sessions, mount_metrics
+from app.starters import STARTER_PROMPTS, starter_service
+from app.streaming import TokenStreamer
 
 # Configure logging
 logging.basicConfig(
@@ -26,41 +40,47 @@ load_dotenv()
 async def set_starters():
     """Set starter suggestions for users to quickly begin conversations."""
     return [
-        cl.Starter(
-            label="💡 Generate Startup Ideas",
-            message="@ideation Give me 5 innovative startup ideas for sustainable technology that could solve real-world problems",
-        ),
-        cl.Starter(
-            label="📊 Analyze Business Idea",
-            message="@analysis I have an idea for a meal planning app that uses AI to suggest recipes based on dietary restrictions and available ingredients. Can you evaluate its market potential?",
-        ),
-        cl.Starter(
-            label="🏗️ Plan Technical Architecture",
-            message="@cto I need to build a mobile app that handles real-time chat, user profiles, and file sharing. What technology stack would you recommend for scalability?",
-        ),
-        cl.Starter(
-            label="📋 Create Product Roadmap",
-            message="@product Help me create a 6-month product roadmap for a fitness tracking app with social features. What should be the priority features?",
-        ),
-        cl.Starter(
-            label="🎯 Develop Marketing Strategy",
-            message="@advertising I'm launching a B2B SaaS tool for project management. Create a comprehensive marketing strategy to reach small to medium businesses",
-        ),
-        cl.Starter(
-            label="🎨 Design Landing Page",
-            message="@landing I need a high-converting landing page for an AI writing assistant. What elements should I include and how should I structure it?",
-        ),
-        cl.Starter(
-            label="📈 Strategic Business Planning",
-            message="@strategic I want to enter the e-commerce market with handmade crafts. Help me develop a competitive strategy and positioning plan",
-        ),
-        cl.Starter(
-            label="🔄 Coordinate Complex Project",
-            message="@manager I'm building a fintech startup with mobile app, web dashboard, and API. Help me create a comprehensive project plan and coordinate the development phases",
-        ),
+        cl.Starter(label=starter.label, message=starter.message)
+        for starter in STARTER_PROMPTS
     ]
 
 
+@cl.data_layer
+def get_data_layer():
+    """Persist threads through the application's data layer."""
+    return create_data_layer()
+
+
+@cl.on_app_startup
+async def on_app_startup():
+    """Start background services once the server is up."""
+    if CONFIG.metrics_enabled:
+        from chainlit.server import app
+
+        mount_metrics(app, CONFIG.metrics_path)
+    await token_counter.load()
+    agent_catalog.build()
+    if CONFIG.intent_routing_enabled:
+        agent_workflow.get_intent_classifier()
+    if CONFIG.agent_catalog_watch:
+        agent_catalog.start_watching()
+    if CONFIG.starter_prewarm_enabled:
+        starter_service.start()
+
+
+@cl.on_app_shutdown
+async def on_app_shutdown():
+    """Drain pending stream events and release connections before exit."""
+    await starter_service.stop()
+    await agent_catalog.stop_watching()
+    await event_bus.aclose()
+    await close_data_layer()
+    await close_pool()
+    await shared_http_client.aclose()
+    response_cache.close()
+    plan_store.close()
+
+
 @cl.oauth_callback
 def oauth_callback(
     provider_id: str,
@@ -87,10 +107,16 @@ def oauth_callback(
 async def on_chat_start():
     """Initialize the chat session."""
     logger.info("Starting new chat session")
-    # Initialize empty message history for PydanticAI
-    message_history: List[ModelMessage] = []
-    cl.user_session.set("message_history", message_history)
+    # Initialize empty conversation memory for PydanticAI
+    cl.user_session.set("memory", ConversationMemory())
     cl.user_session.set("current_agent", "manager")  # Default to manager
+    active_sessions.inc()
+
+
+@cl.on_chat_end
+async def on_chat_end():
+    """Handle the end of a chat session."""
+    active_sessions.dec()
 
 
 @cl.on_message
@@ -104,59 +130,170 @@ async def on_chat_resume(thread: ThreadDict):
     """Handle resuming a chat session."""
     logger.info(f"Resuming chat session for thread")
 
-    # Initialize message history for PydanticAI
-    message_history: List[ModelMessage] = []
-    root_messages = [m for m in thread["steps"] if m["parentId"] == None]
-
-    for message in root_messages:
-        if message["type"] == "user_message":
-            # Add user message to history
-            message_history.append(ModelRequest.user_text_prompt(message["output"]))
-        else:
-            # Add assistant message to history
-            message_history.append(
-                ModelResponse(parts=[TextPart(content=message["output"])])
-            )
+    # Rebuild only the most recent history that fits the budget, from the
+    # steps Chainlit has already loaded to display the thread
+    message_history = thread_history_loader.history_from_steps(thread["steps"])
 
-    cl.user_session.set("message_history", message_history)
+    cl.user_session.set("memory", ConversationMemory(message_history))
     cl.user_session.set("current_agent", "manager")  # Reset to manager on resume
+    active_sessions.inc()
+
+
+def get_user_id() -> str:
+    """Get the identifier runs of the current session are scheduled under."""
+    user = cl.user_session.get("user")
+    if user is not None:
+        return user.identifier
+    return cl.context.session.id
 
 
 async def process_message(message: cl.Message):
     """Process incoming messages and generate responses."""
+    agent_names, user_input = agent_workflow.parse_agent_mentions(message.content)
+    if len(agent_names) > 1:
+        await process_fan_out(agent_names, user_input)
+        return
+
     try:
         logger.info(f"Processing message: {message.content[:100]}...")
 
-        # Create a message to show processing has started
-        processing_msg = cl.Message(content="🤖 Processing your request...")
-        await processing_msg.send()
+        # Response message is created empty and filled as tokens arrive
+        response_msg = cl.Message(content="")
 
-        # Get message history and current agent from session
-        message_history = cl.user_session.get("message_history", [])
+        # Get conversation memory and current agent from session
+        memory = cl.user_session.get("memory") or ConversationMemory()
         current_agent = cl.user_session.get("current_agent", "manager")
 
-        # Add current user message to history
-        message_history.append(ModelRequest.user_text_prompt(message.content))
-
-        # Use the unified workflow to process the message
-        response, new_agent = await agent_workflow.run_streaming(
-            message.content, current_agent, message_history
-        )
+        # Use the unified workflow to process the message; the UI sink streams its
+        # tokens into the response message. The workflow records the completed
+        # turn in memory.
+        run_stats = []
+        async with TokenStreamer(response_msg.stream_token) as streamer:
+            ui_sink.open_stream(response_msg.id, streamer.push)
+            try:
+                response, new_agent = await agent_workflow.run_streaming(
+                    message.content,
+                    current_agent,
+                    memory=memory,
+                    user_id=get_user_id(),
+                    thread_id=cl.context.session.thread_id,
+                    on_stats=run_stats.append,
+                    stream_id=response_msg.id,
+                )
+            finally:
+                await ui_sink.close_stream(response_msg.id)
 
         # Update the current agent in session if it changed
         cl.user_session.set("current_agent", new_agent)
+        cl.user_session.set("memory", memory)
 
-        # Add response to message history
-        message_history.append(ModelResponse(parts=[TextPart(content=response)]))
-        cl.user_session.set("message_history", message_history)
-
-        # Update the processing message with the final response
-        processing_msg.content = response
-        await processing_msg.update()
+        # Finalize the streamed message with the complete response and its usage
+        response_msg.content = response
+        if run_stats:
+            response_msg.metadata = usage_metadata(run_stats[-1])
+        await response_msg.send()
 
         logger.info("Message processed successfully")
 
+    except AgentRunError as e:
+        # The failed turn is not part of the conversation: drop any partial
+        # answer and show the error instead
+        logger.warning(f"Agent run failed: {e}")
+        # An @ mention switches agents even if its run failed
+        if agent_names:
+            cl.user_session.set("current_agent", agent_names[0])
+        if response_msg.content:
+            await response_msg.remove()
+        await cl.ErrorMessage(
+            content=f"{e.display_name} could not complete a reply: {e.cause}"
+        ).send()
+
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         error_message = "I apologize, but I encountered an error while processing your request. Please try again."
         await cl.Message(content=error_message).send()
+
+
+async def process_fan_out(agent_names: List[str], user_input: str):
+    """Ask several mentioned agents concurrently, each in its own message."""
+    try:
+        logger.info(f"Fanning out to {agent_names}: {user_input[:100]}...")
+        memory = cl.user_session.get("memory") or ConversationMemory()
+
+        # Messages are sent up front so they keep the order of the mentions
+        messages = {
+            name: cl.Message(
+                content="", author=agent_workflow.get_agent_profile_name(name)
+            )
+            for name in agent_names
+        }
+        synthesis_msg = cl.Message(content="", author="Synthesis")
+        for response_msg in messages.values():
+            await response_msg.send()
+
+        streamers = {
+            name: TokenStreamer(response_msg.stream_token)
+            for name, response_msg in messages.items()
+        }
+        synthesis_streamer = TokenStreamer(synthesis_msg.stream_token)
+        streams = {messages[name].id: streamer for name, streamer in streamers.items()}
+        streams[synthesis_msg.id] = synthesis_streamer
+        for stream_id, streamer in streams.items():
+            streamer.start()
+            ui_sink.open_stream(stream_id, streamer.push)
+
+        try:
+            result = await agent_workflow.run_fan_out(
+                agent_names,
+                user_input,
+                memory=memory,
+                user_id=get_user_id(),
+                thread_id=cl.context.session.thread_id,
+                stream_ids={name: messages[name].id for name in agent_names},
+                synthesis_stream_id=synthesis_msg.id,
+            )
+        finally:
+            for stream_id, streamer in streams.items():
+                await ui_sink.close_stream(stream_id)
+                await streamer.aclose()
+
+        cl.user_session.set("memory", memory)
+
+        for name, response_msg in messages.items():
+            if name in result.replies:
+                response_msg.content = result.replies[name]
+                response_msg.metadata = usage_metadata(result.stats[name])
+                await response_msg.update()
+            else:
+                await response_msg.remove()
+                await cl.ErrorMessage(
+                    content=f"{response_msg.author} could not complete a reply: "
+                    f"{result.errors[name]}"
+                ).send()
+
+        if result.synthesis is not None:
+            synthesis_msg.content = result.synthesis
+            synthesis_msg.metadata = usage_metadata(result.synthesis_stats)
+            await synthesis_msg.send()
+        elif result.synthesis_error is not None:
+            if synthesis_msg.content:
+                await synthesis_msg.remove()
+            await cl.ErrorMessage(
+                content=f"The answers could not be synthesized: {result.synthesis_error}"
+            ).send()
+
+        logger.info("Fan-out processed successfully")
+
+    except AgentRunError as e:
+        # Every agent failed, so the turn is not part of the conversation
+        logger.warning(f"Fan-out failed: {e}")
+        for response_msg in messages.values():
+            await response_msg.remove()
+        await cl.ErrorMessage(
+            content=f"None of the mentioned agents could complete a reply: {e.cause}"
+        ).send()
+
+    except Exception as e:
+        logger.error(f"Error processing fan-out: {e}")
+        error_message = "I apologize, but I encountered an error while processing your request. Please try again."
+        await cl.Message(content=error_message).send()
@@ -0,0 +1,8 @@
+-- Thread listing: a user's threads, newest first.
+-- Matches the keyset order ("createdAt" DESC, "id" DESC) of the sidebar,
+-- so every page is an index range scan whatever the number of threads.
+-- CreateIndex
+CREATE INDEX "Thread_userId_createdAt_id_idx" ON "Thread"("userId", "createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "Thread_tags_idx" ON "Thread" USING GIN ("tags");
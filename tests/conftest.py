@@ -0,0 +1,10 @@
+"""Shared test setup.
+
+The settings require provider credentials at import time; tests never
+call a provider, so placeholders are enough.
+"""
+
+import os
+
+for name in ("OPENAI_API_KEY", "OPENROUTER_API_KEY", "OPENROUTER_BASE_URL"):
+    os.environ.setdefault(name, "test")
@@ -0,0 +1,57 @@
+"""Tests of background history summarization."""
+
+import asyncio
+
+from pydantic_ai.models.test import TestModel
+
+from app.agents import workflow as workflow_module
+from app.llm import usage_ledger
+from app.memory import ConversationMemory, HistoryBudget, HistoryCompactor
+
+
+def long_conversation(turns):
+    memory = ConversationMemory()
+    for index in range(turns):
+        memory.append_turn(f"question {index} " * 50, f"answer {index} " * 50)
+    return memory
+
+
+def test_summaries_are_made_for_the_user_and_thread():
+    calls = []
+
+    async def summarize(prompt, user_id, thread_id):
+        calls.append((user_id, thread_id))
+        return "the summary"
+
+    async def scenario():
+        compactor = HistoryCompactor(
+            summarize, {"agent": HistoryBudget(max_tokens=100, keep_turns=2)}
+        )
+        memory = long_conversation(6)
+        compactor.schedule(memory, "agent", "alice", "thread-1")
+        await memory._summary_task
+        return memory, compactor.prepare(memory, "agent")
+
+    memory, history = asyncio.run(scenario())
+
+    assert calls == [("alice", "thread-1")]
+    assert memory.summary == "the summary"
+    assert memory.summarized_count == 8
+    assert "the summary" in history[0].parts[0].content
+
+
+def test_summarizer_runs_are_accounted(monkeypatch):
+    monkeypatch.setattr(
+        workflow_module,
+        "get_shared_model",
+        lambda name: TestModel(custom_output_text="the summary"),
+    )
+    workflow = workflow_module.AgentWorkflow()
+
+    summary = asyncio.run(
+        workflow.summarize_history("fold this in", "summary-user", "summary-thread")
+    )
+
+    assert summary == "the summary"
+    assert usage_ledger.for_thread("summary-thread").total_tokens > 0
+    assert usage_ledger.for_user("summary-user").total_tokens > 0
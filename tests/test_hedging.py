@@ -0,0 +1,82 @@
+"""Tests of hedged requests and of the accounting of their losers."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.agents.workflow import AgentWorkflow
+from app.core import CONFIG, RunStats
+from app.llm import UsageTotals, estimate_cost
+from app.llm.hedging import Hedger
+
+
+def request(first_token_after, text):
+    async def start(model_name, on_delta):
+        await asyncio.sleep(first_token_after)
+        on_delta(text)
+        await asyncio.sleep(0.01)
+        on_delta(" more")
+        return f"{model_name}: {text} more"
+
+    return start
+
+
+def hedged(monkeypatch, primary_delay, hedge_delay):
+    monkeypatch.setattr(CONFIG, "hedge_delay_ms", 20)
+    monkeypatch.setattr(CONFIG, "hedge_max_rate", 1.0)
+    delays = {"primary": primary_delay, "hedge": hedge_delay}
+    deltas, cancelled = [], []
+
+    async def start(model_name, on_delta):
+        return await request(delays[model_name], model_name)(model_name, on_delta)
+
+    result = asyncio.run(
+        Hedger().run(
+            "primary",
+            "hedge",
+            start,
+            deltas.append,
+            lambda model, text: cancelled.append((model, text)),
+        )
+    )
+    return result, deltas, cancelled
+
+
+def test_slow_primary_loses_to_the_hedge_and_is_reported(monkeypatch):
+    (response, model, was_hedged), deltas, cancelled = hedged(monkeypatch, 1.0, 0)
+
+    assert (model, was_hedged) == ("hedge", True)
+    assert response == "hedge: hedge more"
+    assert deltas == ["hedge", " more"]
+    assert cancelled == [("primary", "")]
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    (response, model, was_hedged), deltas, cancelled = hedged(monkeypatch, 0, 0)
+
+    assert (model, was_hedged) == ("primary", False)
+    assert cancelled == []
+
+
+def test_cancelled_hedge_requests_are_part_of_the_run_cost():
+    stats = RunStats(
+        run_id="run",
+        agent_name="cto",
+        model_name="openai/gpt-4.1",
+        hedged=True,
+        hedge_prompt_tokens=1000,
+        hedge_completion_tokens=10,
+        hedge_cost_usd=estimate_cost("openai/gpt-4.1", 1000, 10),
+    )
+
+    usage = SimpleNamespace(
+        request_tokens=1000, response_tokens=200, total_tokens=1200, details={}
+    )
+    AgentWorkflow._record_usage(stats, usage)
+    totals = UsageTotals()
+    totals.add(stats)
+
+    assert stats.cost_usd == estimate_cost("openai/gpt-4.1", 1000, 200) + estimate_cost(
+        "openai/gpt-4.1", 1000, 10
+    )
+    assert totals.prompt_tokens == 2000
+    assert totals.completion_tokens == 210
@@ -0,0 +1,57 @@
+"""Tests of rebuilding a resumed thread's history from its steps."""
+
+from pydantic_ai.messages import ModelRequest, ModelResponse
+
+from app.data import ThreadHistoryLoader
+
+
+def step(step_type, output, parent_id=None, is_error=False):
+    return {
+        "type": step_type,
+        "output": output,
+        "parentId": parent_id,
+        "isError": is_error,
+    }
+
+
+def conversation(turns):
+    steps = []
+    for index in range(turns):
+        steps.append(step("user_message", f"question {index}"))
+        steps.append(step("run", "tool call", parent_id="parent"))
+        steps.append(step("assistant_message", f"answer {index}"))
+    return steps
+
+
+def texts(history):
+    return [message.parts[0].content for message in history]
+
+
+def test_keeps_the_newest_messages_oldest_first():
+    loader = ThreadHistoryLoader(max_messages=4)
+
+    history = loader.history_from_steps(conversation(5))
+
+    assert texts(history) == ["question 3", "answer 3", "question 4", "answer 4"]
+    assert isinstance(history[0], ModelRequest)
+
+
+def test_starts_on_a_user_turn():
+    loader = ThreadHistoryLoader(max_messages=3)
+
+    history = loader.history_from_steps(conversation(5))
+
+    assert texts(history) == ["question 4", "answer 4"]
+    assert not isinstance(history[0], ModelResponse)
+
+
+def test_stops_at_the_token_budget_and_skips_failed_steps():
+    loader = ThreadHistoryLoader(max_messages=100)
+    steps = conversation(50)
+    steps.append(step("assistant_message", "broken", is_error=True))
+
+    history = loader.history_from_steps(steps, token_budget=30)
+
+    assert 0 < len(history) < 100
+    assert texts(history)[-1] == "answer 49"
+    assert "broken" not in texts(history)
@@ -0,0 +1,20 @@
+"""Tests of the shared HTTP client's pool statistics."""
+
+from app.llm.http_client import SharedHTTPClient
+
+
+def test_stats_read_the_pool_of_the_client():
+    client = SharedHTTPClient()
+    client.get()
+    stats = client.stats()
+    assert stats["requests"] == 0
+    assert stats["connections"] == stats["in_use"] == stats["queued"] == 0
+
+
+def test_stats_leave_out_the_pool_when_it_cannot_be_read():
+    client = SharedHTTPClient()
+    client.get()
+    # A pool without the internals the statistics read
+    client._transport._pool = object()
+    assert client.stats() == {"requests": 0, "waits": 0}
+    assert client._transport.pool_usage() is None
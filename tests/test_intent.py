@@ -0,0 +1,60 @@
+"""Tests of intent classification and of routing unmentioned messages."""
+
+import asyncio
+
+from app.agents import workflow as workflow_module
+from app.agents.intent import IntentClassifier
+
+
+TECH_QUESTION = (
+    "Which technology stack, database and backend architecture should we deploy?"
+)
+
+
+def test_classifier_picks_the_nearest_agent_only_when_confident():
+    classifier = IntentClassifier(threshold=0.1, min_margin=0.05)
+    classifier.fit(
+        {
+            "cto": ["technology stack architecture database backend"],
+            "landingpage": ["landing page website hero section layout"],
+        }
+    )
+
+    prediction = classifier.classify("Design the hero section of our landing page")
+    unrelated = classifier.classify("Good morning")
+
+    assert prediction.agent_name == "landingpage"
+    assert prediction.confident
+    assert not unrelated.confident
+
+
+def record_runs(monkeypatch, workflow):
+    runs = []
+
+    async def run_agent(run_id, agent_name, *args, **kwargs):
+        runs.append(agent_name)
+        return "answer"
+
+    monkeypatch.setattr(workflow, "_run_agent", run_agent)
+    return runs
+
+
+def test_intent_routed_agents_do_not_become_the_session_agent(monkeypatch):
+    workflow = workflow_module.AgentWorkflow()
+    runs = record_runs(monkeypatch, workflow)
+
+    _, session_agent = asyncio.run(workflow.run_streaming(TECH_QUESTION, "manager"))
+    asyncio.run(workflow.run_streaming("Thanks, what should we do next?", "manager"))
+
+    assert runs == ["cto", "manager"]
+    assert session_agent == "manager"
+
+
+def test_mentions_switch_the_session_agent(monkeypatch):
+    workflow = workflow_module.AgentWorkflow()
+    runs = record_runs(monkeypatch, workflow)
+
+    _, session_agent = asyncio.run(workflow.run_streaming("@cto hello", "manager"))
+
+    assert runs == ["cto"]
+    assert session_agent == "cto"
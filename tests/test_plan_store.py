@@ -0,0 +1,84 @@
+"""Tests of the Manager Agent's plan store and planning tools."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.agents.manager_agent import agent as manager_module
+from app.agents.manager_agent.plan import PlanStore
+from app.core import AgentDeps
+
+
+def test_plans_survive_a_reload_from_sqlite(tmp_path):
+    path = str(tmp_path / "plans.sqlite3")
+
+    async def build():
+        store = PlanStore(path=path)
+        plan = await store.create("t1", "Write a report", "Research, then write")
+        await store.add_step(plan, "Research the topic", "researcher")
+        step = await store.add_step(plan, "Write the report")
+        await store.update_step(
+            plan, step, status="completed", assigned_agent="writer", result="Done"
+        )
+        await store.add_note(plan, "Research took longer", status="in_progress")
+        await store.record_result(plan, "writer", "Done", step_number=2)
+        store.close()
+        return plan
+
+    async def reload():
+        store = PlanStore(path=path)
+        plan = await store.get("t1")
+        store.close()
+        return plan
+
+    written = asyncio.run(build())
+    loaded = asyncio.run(reload())
+    assert loaded == written
+    assert loaded.steps[1].status == "completed"
+    assert loaded.steps[1].assigned_agent == "writer"
+    assert loaded.status == "in_progress"
+
+
+def test_update_step_writes_only_its_row(tmp_path):
+    async def scenario():
+        store = PlanStore(path=str(tmp_path / "plans.sqlite3"))
+        plan = await store.create("t1", "Request", "Details")
+        for index in range(5):
+            await store.add_step(plan, f"Step {index + 1}")
+
+        statements = []
+        connection = store._get_disk()._conn
+        connection.set_trace_callback(statements.append)
+        changes = connection.total_changes
+        await store.update_step(plan, plan.steps[2], status="in_progress")
+        changed = connection.total_changes - changes
+        store.close()
+        return changed, statements
+
+    changed, statements = asyncio.run(scenario())
+    assert changed == 1
+    writes = [
+        sql for sql in statements if sql.lstrip().startswith(("INSERT", "UPDATE"))
+    ]
+    assert len(writes) == 1 and "plan_steps" in writes[0]
+
+
+def test_tools_work_on_the_plan_of_the_run_thread(tmp_path, monkeypatch):
+    store = PlanStore(path=str(tmp_path / "plans.sqlite3"))
+    monkeypatch.setattr(manager_module, "plan_store", store)
+    ctx = SimpleNamespace(deps=AgentDeps(thread_id="t1"))
+
+    async def scenario():
+        await manager_module.create_plan(ctx, "Request", "Details")
+        await manager_module.assign_task_to_agent(ctx, "researcher", "Research")
+        await manager_module.record_agent_result(ctx, "researcher", "Found it", 1)
+        return await store.get("t1")
+
+    plan = asyncio.run(scenario())
+    store.close()
+    assert ctx.deps.changed_state
+    assert plan.steps[0].status == "completed"
+    assert plan.steps[0].result == "Found it"
+    assert plan.results["researcher"].step_number == 1
+
+    other = SimpleNamespace(deps=AgentDeps(thread_id="t2"))
+    assert asyncio.run(manager_module.get_plan_status(other)) == "No plan exists yet."
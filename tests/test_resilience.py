@@ -0,0 +1,60 @@
+"""Tests of when the resilient caller retries a failed request."""
+
+import asyncio
+
+import pytest
+
+from app.core import CONFIG, CircuitOpenError, ProviderError
+from app.llm.resilience import ResilientCaller
+
+
+def failing_request(calls):
+    async def start(on_delta):
+        calls.append(1)
+        raise ProviderError("model", "HTTP 503", retryable=True)
+
+    return start
+
+
+def test_retries_a_request_without_effects(monkeypatch):
+    monkeypatch.setattr(ResilientCaller, "_backoff", staticmethod(lambda attempt: 0))
+    calls = []
+    with pytest.raises(ProviderError):
+        asyncio.run(
+            ResilientCaller().call("model", failing_request(calls), lambda _: None)
+        )
+    assert len(calls) == 3
+
+
+def test_never_retries_a_request_whose_tools_changed_state(monkeypatch):
+    monkeypatch.setattr(ResilientCaller, "_backoff", staticmethod(lambda attempt: 0))
+    calls = []
+    with pytest.raises(ProviderError):
+        asyncio.run(
+            ResilientCaller().call(
+                "model",
+                failing_request(calls),
+                lambda _: None,
+                committed=lambda: True,
+            )
+        )
+    assert len(calls) == 1
+
+
+def test_rejected_requests_open_the_circuit(monkeypatch):
+    class Rejected(Exception):
+        status_code = 400
+
+    async def start(on_delta):
+        raise Rejected("invalid request")
+
+    async def scenario():
+        caller = ResilientCaller()
+        for _ in range(CONFIG.circuit_failure_threshold):
+            with pytest.raises(ProviderError) as raised:
+                await caller.call("model", start, lambda _: None)
+            assert not raised.value.retryable
+        with pytest.raises(CircuitOpenError):
+            await caller.call("model", start, lambda _: None)
+
+    asyncio.run(scenario())
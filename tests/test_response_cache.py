@@ -0,0 +1,66 @@
+"""Tests of the response cache and of what the workflow stores in it."""
+
+import asyncio
+
+from pydantic_ai.messages import ModelRequest
+from pydantic_ai.usage import Usage
+
+from app.agents import workflow as workflow_module
+from app.cache import ResponseCache, make_cache_key
+
+
+def test_keys_ignore_whitespace_but_not_the_model():
+    history = [ModelRequest.user_text_prompt("hello   there")]
+
+    key = make_cache_key("model-a", "system", history, "question")
+
+    assert key == make_cache_key(
+        "model-a", "system", [ModelRequest.user_text_prompt("hello there")], "question "
+    )
+    assert key != make_cache_key("model-b", "system", history, "question")
+
+
+def test_responses_survive_a_restart_in_the_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+
+    async def scenario():
+        cache = ResponseCache(path=path)
+        await cache.put("key", "answer")
+        cache.close()
+
+        reopened = ResponseCache(path=path)
+        response = await reopened.get("key")
+        missing = await reopened.get("other")
+        reopened.close()
+        return response, missing, reopened.stats()
+
+    response, missing, stats = asyncio.run(scenario())
+
+    assert response == "answer"
+    assert missing is None
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_fallback_answers_are_stored_under_the_serving_model(monkeypatch):
+    cache = ResponseCache(path="")
+    monkeypatch.setattr(workflow_module, "response_cache", cache)
+    workflow = workflow_module.AgentWorkflow()
+    workflow.uncached_agents = set()
+
+    async def served_by_fallback(agent, route, user_input, history, on_delta, stats):
+        stats.model_name = "fallback-model"
+        on_delta("answer")
+        return "answer", Usage()
+
+    monkeypatch.setattr(workflow, "_stream_routed", served_by_fallback)
+
+    asyncio.run(workflow.run_streaming("@ideation question", "manager"))
+
+    system_prompt = workflow.get_profile("ideation").backstory
+    primary_key = make_cache_key(
+        workflow_module.CONFIG.model_name, system_prompt, [], "question"
+    )
+    fallback_key = make_cache_key("fallback-model", system_prompt, [], "question")
+    assert asyncio.run(cache.get(primary_key)) is None
+    assert asyncio.run(cache.get(fallback_key)) == "answer"
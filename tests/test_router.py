@@ -0,0 +1,30 @@
+"""Tests of the router's rolling model statistics."""
+
+from app.core import CONFIG
+from app.llm import router
+from app.llm.router import ModelRouter, RoutePolicy
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_failing_model_recovers_as_its_errors_age(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(router.time, "monotonic", clock)
+    model_router = ModelRouter()
+    decision = router.RouteDecision(agent_name="agent", model="vendor/model")
+    policy = RoutePolicy()
+
+    for _ in range(10):
+        model_router.record(decision, "vendor/model", None, 100, ok=False)
+    assert model_router._score("vendor/model", 100, policy) >= 1_000_000
+
+    clock.now += 3 * CONFIG.router_error_half_life_seconds
+    # About 0.9 after ten failures, an eighth of that three half-lives later
+    assert model_router.stats()["vendor/model"]["error_rate"] < 0.15
+    assert model_router._score("vendor/model", 100, policy) < 1_000_000
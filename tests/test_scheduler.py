@@ -0,0 +1,82 @@
+"""Tests of how agent runs are charged to the request scheduler."""
+
+import asyncio
+
+import pytest
+
+from app.llm.scheduler import RequestScheduler
+
+
+def make_scheduler() -> RequestScheduler:
+    return RequestScheduler(
+        requests_per_minute=600, tokens_per_minute=60000, burst_seconds=1
+    )
+
+
+def test_every_request_of_a_run_takes_a_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+        async with scheduler.run("user", 100) as scheduled:
+            # One attempt whose run makes a tool-call round trip
+            async with scheduler.attempt():
+                await scheduler.acquire_request()
+                await scheduler.acquire_request()
+            scheduled.settle(100)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler._requests.tokens == pytest.approx(8, abs=0.1)
+    assert scheduler._tokens.tokens == pytest.approx(900, abs=5)
+
+
+def test_a_failed_run_is_refunded():
+    async def scenario():
+        scheduler = make_scheduler()
+        with pytest.raises(RuntimeError):
+            async with scheduler.run("user", 500):
+                async with scheduler.attempt():
+                    raise RuntimeError("provider failed")
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler._tokens.tokens == pytest.approx(1000, abs=5)
+
+
+def test_requests_outside_a_run_are_not_scheduled():
+    async def scenario():
+        scheduler = make_scheduler()
+        await scheduler.acquire_request()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler._requests.tokens == pytest.approx(10, abs=0.1)
+
+
+def test_attempts_that_send_nothing_give_their_slot_back():
+    async def scenario():
+        scheduler = make_scheduler()
+        async with scheduler.run("user", 100):
+            # Two attempts fail before sending, the third sends its request
+            for _ in range(2):
+                with pytest.raises(ConnectionError):
+                    async with scheduler.attempt():
+                        raise ConnectionError("connect failed")
+            async with scheduler.attempt():
+                await scheduler.acquire_request()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler._requests.tokens == pytest.approx(9, abs=0.1)
+
+
+def test_a_waiter_that_cannot_run_yet_does_not_block_others():
+    async def scenario():
+        scheduler = make_scheduler()
+        scheduler._tokens.take(1000)
+        heavy = asyncio.create_task(scheduler.acquire("heavy", 500))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(scheduler.acquire("light", 0), 0.2)
+        assert not heavy.done()
+        await asyncio.wait_for(heavy, 2)
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+"""Tests of single-flight collapsing when the leading caller goes away."""
+
+import asyncio
+
+import pytest
+
+from app.cache.single_flight import FlightAbandoned, SingleFlight
+
+
+def test_follower_takes_over_when_leader_is_cancelled_before_streaming():
+    async def scenario():
+        group = SingleFlight()
+        started = asyncio.Event()
+
+        async def slow_producer(on_delta):
+            started.set()
+            await asyncio.sleep(10)
+
+        async def producer(on_delta):
+            on_delta("answer")
+            return "answer"
+
+        received = []
+        leader = asyncio.create_task(group.run("key", slow_producer, lambda _: None))
+        await started.wait()
+        follower = asyncio.create_task(group.run("key", producer, received.append))
+        await asyncio.sleep(0)
+        leader.cancel()
+        result = await follower
+        return group, result, received
+
+    group, result, received = asyncio.run(scenario())
+    assert result == ("answer", True)
+    assert received == ["answer"]
+    assert group.promoted == 1
+    assert group.in_flight() == 0
+
+
+def test_follower_fails_when_leader_is_cancelled_after_streaming():
+    async def scenario():
+        group = SingleFlight()
+        streamed = asyncio.Event()
+
+        async def producer(on_delta):
+            on_delta("partial")
+            streamed.set()
+            await asyncio.sleep(10)
+
+        received = []
+        leader = asyncio.create_task(group.run("key", producer, lambda _: None))
+        await streamed.wait()
+        follower = asyncio.create_task(group.run("key", producer, received.append))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(FlightAbandoned):
+            await follower
+        return received
+
+    assert asyncio.run(scenario()) == ["partial"]
+
+
+def test_cancelled_follower_stops_listening():
+    async def scenario():
+        group = SingleFlight()
+        release = asyncio.Event()
+
+        async def producer(on_delta):
+            await release.wait()
+            on_delta("late")
+            return "late"
+
+        received = []
+        leader = asyncio.create_task(group.run("key", producer, lambda _: None))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.run("key", producer, received.append))
+        await asyncio.sleep(0)
+        follower.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await leader, received
+
+    (result, is_leader), received = asyncio.run(scenario())
+    assert (result, is_leader) == ("late", True)
+    assert received == []
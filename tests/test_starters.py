@@ -0,0 +1,50 @@
+"""Tests of when starter answers are generated."""
+
+import asyncio
+import time
+
+from app.agents.workflow import AgentWorkflow
+from app.core import CONFIG
+from app.starters import StarterAnswerService, StarterPrompt
+
+
+PROMPTS = [
+    StarterPrompt(label="Ideas", message="@ideation Give me ideas"),
+    StarterPrompt(label="Plan", message="Plan my project"),
+]
+
+
+class RecordingWorkflow(AgentWorkflow):
+    """Workflow whose runs are only recorded."""
+
+    def __init__(self):
+        super().__init__()
+        self.refreshes = []
+
+    async def run_streaming(self, message, current_agent, refresh=False, **kwargs):
+        self.refreshes.append(refresh)
+        return "answer", current_agent
+
+
+def test_warm_counts_only_the_starters_that_ran():
+    workflow = RecordingWorkflow()
+    service = StarterAnswerService(workflow, PROMPTS)
+
+    warmed = asyncio.run(service.warm())
+
+    # The manager starter is never cached, so it is not warmed
+    assert warmed == 1
+    assert workflow.refreshes == [False]
+
+
+def test_answers_are_regenerated_only_near_their_cache_expiry(monkeypatch):
+    monkeypatch.setattr(CONFIG, "response_cache_ttl_seconds", 86400)
+    monkeypatch.setattr(CONFIG, "starter_refresh_interval_seconds", 3600)
+    service = StarterAnswerService(RecordingWorkflow(), PROMPTS)
+    asyncio.run(service.warm())
+
+    assert not service.near_expiry()
+    service._generated_at = time.monotonic() - 3600 * 2
+    assert not service.near_expiry()
+    service._generated_at = time.monotonic() - (86400 - 3600)
+    assert service.near_expiry()
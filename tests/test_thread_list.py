@@ -0,0 +1,49 @@
+"""Tests of thread listing cursors and queries."""
+
+from datetime import datetime
+
+from app.data.thread_list import (
+    ThreadListCache,
+    decode_cursor,
+    encode_cursor,
+    list_threads_query,
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 9, 30, 0, 123456)
+    cursor = encode_cursor(created_at, "thread-1")
+    assert decode_cursor(cursor) == (created_at, "thread-1")
+
+
+def test_bare_thread_id_is_not_a_position():
+    assert decode_cursor("3f0c9a62-thread") is None
+
+
+def test_listing_follows_creation_order():
+    query = list_threads_query(True, False, "position")
+    assert '(t."createdAt", t."id") < ($2::timestamp, $3)' in query
+    assert 'ORDER BY t."createdAt" DESC, t."id" DESC' in query
+    assert "LIMIT $4" in query
+
+
+def test_pages_read_across_an_invalidation_are_not_cached():
+    cache = ThreadListCache(ttl_seconds=60, max_entries=10)
+    generation = cache.generation
+    cache.invalidate("alice")
+    cache.put("alice", 20, "stale page", generation)
+    assert cache.get("alice", 20) is None
+
+    cache.put("alice", 20, "page", cache.generation)
+    assert cache.get("alice", 20) == "page"
+
+
+def test_created_threads_drop_every_cached_page():
+    cache = ThreadListCache(ttl_seconds=60, max_entries=10)
+    cache.put("alice", 20, "page")
+    cache.put("bob", 20, "page")
+
+    cache.invalidate_all()
+
+    assert cache.get("alice", 20) is None
+    assert cache.get("bob", 20) is None
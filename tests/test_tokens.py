@@ -0,0 +1,71 @@
+"""Tests of the token counter's tokenizer loading and per-model encodings."""
+
+import asyncio
+import sys
+import types
+
+from app.llm.tokens import MESSAGE_OVERHEAD_TOKENS, TokenCounter
+
+
+def word_encoding(name="words"):
+    return types.SimpleNamespace(name=name, encode=lambda text, **kwargs: text.split())
+
+
+def fake_tiktoken(get_encoding, encodings=None):
+    module = types.ModuleType("tiktoken")
+
+    def encoding_for_model(name):
+        if encodings and name in encodings:
+            return encodings[name]
+        raise KeyError(name)
+
+    module.encoding_for_model = encoding_for_model
+    module.get_encoding = get_encoding
+    return module
+
+
+def test_estimates_when_the_fallback_encoding_cannot_load(monkeypatch):
+    def get_encoding(name):
+        raise OSError("no network")
+
+    monkeypatch.setitem(sys.modules, "tiktoken", fake_tiktoken(get_encoding))
+    counter = TokenCounter(model_name="vendor/unknown-model")
+    assert counter.count_text("twelve chars") == 3
+
+
+def test_load_uses_the_fallback_encoding(monkeypatch):
+    encoding = word_encoding()
+    monkeypatch.setitem(sys.modules, "tiktoken", fake_tiktoken(lambda name: encoding))
+    counter = TokenCounter(model_name="vendor/unknown-model")
+    asyncio.run(counter.load())
+    assert counter.count_text("three short words") == 3
+
+
+def test_counts_made_while_loading_are_not_cached(monkeypatch):
+    monkeypatch.setitem(
+        sys.modules, "tiktoken", fake_tiktoken(lambda name: word_encoding())
+    )
+    counter = TokenCounter(model_name="vendor/unknown-model")
+    counter._loading.add("vendor/unknown-model")
+    # "one two three" is 13 characters: 4 estimated tokens plus overhead
+    assert counter.count_prompt("one two three") == 4 + MESSAGE_OVERHEAD_TOKENS
+    counter._loading.clear()
+    assert counter.count_prompt("one two three") == 3 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_counts_use_the_encoding_of_the_model(monkeypatch):
+    letters = types.SimpleNamespace(
+        name="letters", encode=lambda text, **kwargs: list(text.replace(" ", ""))
+    )
+    monkeypatch.setitem(
+        sys.modules,
+        "tiktoken",
+        fake_tiktoken(lambda name: word_encoding(), {"letter-model": letters}),
+    )
+    counter = TokenCounter(model_name="vendor/word-model")
+    assert counter.count_prompt("ab cd") == 2 + MESSAGE_OVERHEAD_TOKENS
+    assert (
+        counter.count_prompt("ab cd", "vendor/letter-model")
+        == 4 + MESSAGE_OVERHEAD_TOKENS
+    )
+    assert counter.count_text("ab cd", "vendor/letter-model") == 4
@@ -0,0 +1,58 @@
+"""Tests of the UI sink forwarding token deltas to chat streams."""
+
+import asyncio
+
+from app.events import EventBus, TokenDelta, UISink
+
+
+def delta(stream_id, text):
+    return TokenDelta(
+        run_id="run",
+        agent_name="manager",
+        display_name="Manager",
+        stream_id=stream_id,
+        delta=text,
+    )
+
+
+def test_close_stream_delivers_every_delta_in_order():
+    async def scenario():
+        bus = EventBus(queue_size=1)
+        sink = UISink()
+        bus.add_sink(sink)
+        received = []
+        sink.open_stream("reply", received.append)
+
+        # Far more deltas than the bus's default queue could hold
+        for index in range(100):
+            bus.emit(delta("reply", str(index)))
+        await sink.close_stream("reply")
+
+        assert received == [str(index) for index in range(100)]
+        assert bus.dropped_events() == {"ui": 0}
+        await bus.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_deltas_of_other_streams_are_ignored():
+    async def scenario():
+        bus = EventBus()
+        sink = UISink()
+        bus.add_sink(sink)
+        first, second = [], []
+        sink.open_stream("first", first.append)
+        sink.open_stream("second", second.append)
+
+        bus.emit(delta("first", "a"))
+        bus.emit(delta("second", "b"))
+        bus.emit(delta(None, "untagged"))
+        await sink.close_stream("first")
+        await sink.close_stream("second")
+        bus.emit(delta("first", "late"))
+        await bus.aclose()
+
+        assert first == ["a"]
+        assert second == ["b"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,130 @@
+"""Tests of the write-behind buffer's batching and shutdown path."""
+
+import asyncio
+import json
+
+from app.data.steps import _step_columns
+from app.data.write_behind import WriteBehindBuffer
+
+
+class SlowWrites:
+    """Stand-in for the database write that takes a while and records batches."""
+
+    def __init__(self, delay: float, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.started = asyncio.Event()
+        self.written = []
+        self.batches = []
+
+    async def __call__(self, steps, feedback):
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("database unreachable")
+        self.written.extend(steps)
+        self.batches.append((list(steps), list(feedback)))
+
+
+def make_buffer(tmp_path, writes: SlowWrites) -> WriteBehindBuffer:
+    buffer = WriteBehindBuffer(
+        flush_interval_ms=10,
+        batch_size=10,
+        max_pending=100,
+        spill_path=str(tmp_path / "spill.jsonl"),
+        max_retries=3,
+    )
+    buffer._write = writes
+    return buffer
+
+
+def test_close_waits_for_the_flush_in_progress(tmp_path):
+    async def scenario():
+        writes = SlowWrites(delay=0.2)
+        buffer = make_buffer(tmp_path, writes)
+        await buffer.put_step({"id": "s1", "threadId": "t1", "type": "run"})
+        await buffer.put_step({"id": "s2", "threadId": "t1", "type": "run"})
+        await writes.started.wait()
+        await buffer.close()
+        return buffer, writes
+
+    buffer, writes = asyncio.run(scenario())
+    assert writes.written == ["s1", "s2"]
+    assert buffer.pending == 0
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+def test_close_spills_a_batch_that_cannot_be_written(tmp_path):
+    async def scenario():
+        writes = SlowWrites(delay=0.2, fail=True)
+        buffer = make_buffer(tmp_path, writes)
+        await buffer.put_step({"id": "s1", "threadId": "t1", "type": "run"})
+        await writes.started.wait()
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.pending == 0
+    spilled = [json.loads(line) for line in open(tmp_path / "spill.jsonl")]
+    assert [entry["record"]["id"] for entry in spilled] == ["s1"]
+
+
+def test_cancelled_flush_keeps_its_batch(tmp_path):
+    async def scenario():
+        writes = SlowWrites(delay=1)
+        buffer = make_buffer(tmp_path, writes)
+        await buffer.put_step({"id": "s1", "threadId": "t1", "type": "run"})
+        flush = asyncio.create_task(buffer.flush())
+        await writes.started.wait()
+        flush.cancel()
+        try:
+            await flush
+        except asyncio.CancelledError:
+            pass
+        pending = buffer.pending
+        buffer._task.cancel()
+        return pending
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_feedback_waits_for_the_batch_of_its_step(tmp_path):
+    async def scenario():
+        writes = SlowWrites(delay=0)
+        buffer = make_buffer(tmp_path, writes)
+        buffer.batch_size = 2
+        buffer.max_pending = 100
+        for index in range(4):
+            await buffer.put_step({"id": f"s{index}", "threadId": "t1"})
+        await buffer.put_feedback({"id": "f0", "forId": "s0", "value": 1})
+        await buffer.put_feedback({"id": "f3", "forId": "s3", "value": 0})
+        assert await buffer.flush()
+        buffer._task.cancel()
+        return writes.batches
+
+    batches = asyncio.run(scenario())
+    assert batches == [(["s0", "s1"], []), (["s2", "s3"], []), ([], ["f0", "f3"])]
+
+
+def test_an_update_can_clear_a_pending_field(tmp_path):
+    async def scenario():
+        writes = SlowWrites(delay=0)
+        buffer = make_buffer(tmp_path, writes)
+        await buffer.put_step(
+            {"id": "s1", "threadId": "t1", "output": "draft", "metadata": {"a": 1}}
+        )
+        await buffer.put_step({"id": "s1", "output": None, "metadata": {}})
+        step = dict(buffer._steps["s1"])
+        buffer._task.cancel()
+        return step
+
+    step = asyncio.run(scenario())
+    assert step == {"id": "s1", "threadId": "t1", "output": None, "metadata": {"a": 1}}
+
+
+def test_upsert_flags_the_fields_a_step_sets():
+    columns = _step_columns(
+        [{"id": "s1", "output": None}, {"id": "s2", "input": "hi", "isError": False}]
+    )
+    # output is bit 3; input bit 1 and isError bit 5
+    assert columns[-1] == [8, 2 | 32]